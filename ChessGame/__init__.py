@@ -1,4 +1,4 @@
+# the rules engine only, the pygame GUI is imported from ChessGame.gui
 from .const import *
-from .gui_const import *
 from .type_defs import *
-from .gui import *
\ No newline at end of file
+from .component import *
\ No newline at end of file
@@ -1,6 +1,10 @@
+from .square import *
 from .chessman import *
+from .fen import *
 from .board import *
+from .bitboard import *
 from .game import *
-from .gui_chessman import *
-from .gui_board import *
-from .gui_panel import *
\ No newline at end of file
+from .pgn import *
+from .transposition import *
+from .engine import *
+from .engine_worker import *
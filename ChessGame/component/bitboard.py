@@ -0,0 +1,503 @@
+from __future__ import annotations
+from typing import Optional
+from .chessman import *
+from .square import *
+from .board import *
+from .zobrist import *
+from .fen import *
+from ..const import *
+from ..type_defs import *
+
+
+# the square index (SQUARE_POS, POS_SQUARE) and the directions are shared with the chessmen (component/square.py)
+
+def build_step_attacks(directions: Tuple[Tuple[int, int], ...]) -> Tuple[int, ...]:
+
+    attacks = list()
+    for square in range(64):
+        row, col = divmod(square, 8)
+        mask = 0
+        for delta_row, delta_col in directions:
+            next_row, next_col = row + delta_row, col + delta_col
+            if 0 <= next_row < 8 and 0 <= next_col < 8:
+                mask |= 1 << (next_row * 8 + next_col)
+        attacks.append(mask)
+    return tuple(attacks)
+
+def build_rays(direction: Tuple[int, int]) -> Tuple[int, ...]:
+
+    rays = list()
+    for square in range(64):
+        row, col = divmod(square, 8)
+        mask = 0
+        while True:
+            row, col = row + direction[0], col + direction[1]
+            if not (0 <= row < 8 and 0 <= col < 8): break
+            mask |= 1 << (row * 8 + col)
+        rays.append(mask)
+    return tuple(rays)
+
+KNIGHT_ATTACKS = build_step_attacks(KNIGHT_OFFSETS)
+KING_ATTACKS   = build_step_attacks(ROOK_DIRECTIONS + BISHOP_DIRECTIONS)
+# PAWN_ATTACKS[team][square]: the squares attacked by a pawn of the team on the square
+PAWN_ATTACKS   = {
+    Team.WHITE: build_step_attacks(((1, 1), (1, -1))),
+    Team.BLACK: build_step_attacks(((-1, 1), (-1, -1)))
+}
+
+# (ray_is_toward_higher_square, rays)
+ROOK_RAYS   = tuple((direction[0] * 8 + direction[1] > 0, build_rays(direction)) for direction in ROOK_DIRECTIONS)
+BISHOP_RAYS = tuple((direction[0] * 8 + direction[1] > 0, build_rays(direction)) for direction in BISHOP_DIRECTIONS)
+
+def slider_attacks(square: int, occupancy: int, directional_rays: Tuple[Tuple[bool, Tuple[int, ...]], ...]) -> int:
+
+    attacks = 0
+    for is_positive, rays in directional_rays:
+        ray = rays[square]
+        blockers = ray & occupancy
+        if blockers:
+            # the nearest blocker is the lowest bit on a positive ray, and the highest bit on a negative ray
+            if is_positive: blocker = (blockers & -blockers).bit_length() - 1
+            else:           blocker = blockers.bit_length() - 1
+            ray ^= rays[blocker]
+        attacks |= ray
+    return attacks
+
+def iterate_squares(bitboard: int):
+    while bitboard:
+        lowest_bit = bitboard & -bitboard
+        yield lowest_bit.bit_length() - 1
+        bitboard ^= lowest_bit
+
+class BitBoard:
+    # a ChessBoard alternative: every team and chessman type owns a 64-bit integer,
+    # the chessman objects are still kept by square for the identity used by ChessGame and the GUI
+
+    @staticmethod
+    def is_board_in_check(board: BitBoard, team: Team) -> bool:
+
+        king_bitboard = board.__pieces[team][King]
+        if king_bitboard == 0: return False
+
+        enemy_team = Team.BLACK if team == Team.WHITE else Team.WHITE
+        return board.__is_attacked(king_bitboard.bit_length() - 1, enemy_team, board.__get_occupancy())
+
+    @staticmethod
+    def is_board_checkmate(board: BitBoard, team: Team) -> bool:
+        # the move generation is skipped when the king is not in check
+        return BitBoard.is_board_in_check(board, team) and BitBoard.is_board_no_valid_moves(board, team)
+
+    @staticmethod
+    def is_board_no_valid_moves(board: BitBoard, team: Team) -> bool:
+
+        for square in iterate_squares(board.__occupancy[team]):
+            if len(board.get_valid_moves(board.__squares[square])) > 0:
+                return False
+        return True
+
+    def __init__(self) -> None:
+        self.reset_board()
+
+    def reset_board(self) -> None:
+
+        # set the chessmen
+        chessmen = list()
+        chessman_type_in_order = (Rook, Knight, Bishop, Queen, King, Bishop, Knight, Rook)
+        for col, chessman_class in zip(COL_VALUE_RANGE, chessman_type_in_order):
+            chessmen.append(chessman_class(1, col, Team.WHITE))
+            chessmen.append(Pawn(2, col, Team.WHITE))
+
+            chessmen.append(Pawn(7, col, Team.BLACK))
+            chessmen.append(chessman_class(8, col, Team.BLACK))
+
+        self.__set_chessmen(chessmen)
+
+    def from_fen(self, fen: str) -> Team:
+        # same as ChessBoard.from_fen
+
+        chessmen, turn, en_passant_pos, halfmove_clock, _ = parse_fen(fen)
+        self.__set_chessmen(chessmen)
+
+        if en_passant_pos is not None: en_passant_pos = self.__get_en_passant_pos(en_passant_pos)
+        self.__state = (en_passant_pos, self.__state[1], halfmove_clock)
+        return turn
+
+    def to_fen(self, turn: Team, fullmove_number: int = 1) -> str:
+        return build_fen(self, turn, fullmove_number)
+
+    print_text_board    = ChessBoard.print_text_board
+    print_graphic_board = ChessBoard.print_graphic_board
+
+    def get_chessman(self, row: int, col: str) -> BaseChessman:
+        return self.__squares[POS_SQUARE[(row, col)]]
+
+    def get_entire_board(self) -> BoardDictType:
+
+        board = {row: dict() for row in ROW_VALUE_RANGE}
+        for square, (row, col) in enumerate(SQUARE_POS):
+            board[row][col] = self.__squares[square]
+        return board
+
+    def get_chessmen(self, team: Team) -> Tuple[BaseChessman, ...]:
+        # same as ChessBoard.get_chessmen, from the occupancy of the team
+        return tuple(self.__squares[square] for square in iterate_squares(self.__occupancy[team]))
+
+    def get_king(self, team: Team) -> King:
+        return self.__kings[team]
+
+    def get_material(self, team: Team) -> MaterialType:
+        # same as ChessBoard.get_material
+        return tuple(self.__material[team])
+
+    def get_state(self) -> BoardStateType:
+        return self.__state
+
+    def get_en_passant_pos(self) -> Optional[BoardPosType]:
+        return self.__state[0]
+
+    def get_castling_rights(self) -> Tuple[bool, bool, bool, bool]:
+        return self.__state[1]
+
+    def get_halfmove_clock(self) -> int:
+        return self.__state[2]
+
+    def get_hash(self) -> int:
+        # same as ChessBoard.get_hash
+        return self.__chessmen_hash ^ castling_rights_hash(self.__state[1]) ^ en_passant_hash(self.__state[0])
+
+    def get_bitboard(self, team: Team, chessman_type: Type[BaseChessman]) -> int:
+        return self.__pieces[team][chessman_type]
+
+    def get_valid_moves(self, target_chessman: BaseChessman) -> set[MoveType]:
+
+        if target_chessman is None: return set()
+
+        square = POS_SQUARE[target_chessman.get_pos()]
+
+        if self.__squares[square] is not target_chessman:
+            raise ValueError
+
+        # the moves of the whole team are reused when they have been generated for this position
+        legal_moves = self.__legal_moves_cache.get(self.get_hash() ^ turn_hash(target_chessman.get_team()))
+        if legal_moves is not None: return legal_moves.get(SQUARE_POS[square], set())
+
+        return self.__get_legal_moves(target_chessman)
+
+    def generate_legal_moves(self, team: Team) -> LegalMovesType:
+        # same as ChessBoard.generate_legal_moves, the moves of every chessman are already legal here
+
+        cache_key = self.get_hash() ^ turn_hash(team)
+        legal_moves = self.__legal_moves_cache.get(cache_key)
+        if legal_moves is not None: return legal_moves
+
+        legal_moves = dict()
+        for square in iterate_squares(self.__occupancy[team]):
+            chessman_moves = self.__get_legal_moves(self.__squares[square])
+            if len(chessman_moves) > 0: legal_moves[SQUARE_POS[square]] = chessman_moves
+
+        self.__legal_moves_cache[cache_key] = legal_moves
+        return legal_moves
+
+    def __get_legal_moves(self, target_chessman: BaseChessman) -> set[MoveType]:
+
+        square = POS_SQUARE[target_chessman.get_pos()]
+        team = target_chessman.get_team()
+        enemy_team = Team.BLACK if team == Team.WHITE else Team.WHITE
+        own_occupancy, enemy_occupancy = self.__occupancy[team], self.__occupancy[enemy_team]
+        occupancy = own_occupancy | enemy_occupancy
+        chessman_type = type(target_chessman)
+
+        # (action, dest_square, killed_square)
+        candidate_moves = list()
+
+        if chessman_type is Pawn:
+            forward = 8 if team == Team.WHITE else -8
+            last_row = ROW_VALUE_RANGE[-1] if team == Team.WHITE else ROW_VALUE_RANGE[0]
+
+            # the pawn has not moved yet: the pawn can go forward 2 cells
+            if not target_chessman.get_moved():
+                next_square = square
+                for _ in range(2):
+                    next_square += forward
+                    if not 0 <= next_square < 64 or (occupancy >> next_square) & 1: break
+                    candidate_moves.append(("Move", next_square, None))
+            # normal move: the pawn can only go forward 1 cell
+            else:
+                next_square = square + forward
+                if 0 <= next_square < 64 and not (occupancy >> next_square) & 1:
+                    action = "Promotion" if SQUARE_POS[next_square][0] == last_row else "Move"
+                    candidate_moves.append((action, next_square, None))
+
+            if can_take_en_passant(target_chessman, self.__state[0]):
+                dest_square = POS_SQUARE[self.__state[0]]
+                candidate_moves.append(("Attack", dest_square, dest_square - forward))
+
+            for dest_square in iterate_squares(PAWN_ATTACKS[team][square] & enemy_occupancy):
+                candidate_moves.append(("Attack", dest_square, dest_square))
+        else:
+            if chessman_type is King:     attacks = KING_ATTACKS[square]
+            elif chessman_type is Knight: attacks = KNIGHT_ATTACKS[square]
+            elif chessman_type is Rook:   attacks = slider_attacks(square, occupancy, ROOK_RAYS)
+            elif chessman_type is Bishop: attacks = slider_attacks(square, occupancy, BISHOP_RAYS)
+            else:                         attacks = slider_attacks(square, occupancy, ROOK_RAYS) | slider_attacks(square, occupancy, BISHOP_RAYS)
+
+            for dest_square in iterate_squares(attacks & ~occupancy):
+                candidate_moves.append(("Move", dest_square, None))
+            for dest_square in iterate_squares(attacks & enemy_occupancy):
+                candidate_moves.append(("Attack", dest_square, dest_square))
+
+            if chessman_type is King:
+                # same as get_castling_moves, from the castling rights of the board state
+                team_rights = self.__state[1][:2] if team == Team.WHITE else self.__state[1][2:]
+                start_row = 1 if team == Team.WHITE else ROW_VALUE_RANGE[-1]
+
+                for castling, _, king_dest_col, between_cols, king_pass_cols in CASTLING_PATHS:
+                    if team_rights[castling] and self.__check_castling(start_row, enemy_team, occupancy, between_cols, king_pass_cols):
+                        candidate_moves.append(("Castling", POS_SQUARE[(start_row, king_dest_col)], None))
+
+        king_bitboard = self.__pieces[team][King]
+        king_square = king_bitboard.bit_length() - 1
+
+        valid_moves = set()
+        # make sure the moves that can't make the king attacked
+        for action, dest_square, killed_square in candidate_moves:
+            if king_bitboard == 0:
+                valid_moves.add((action, SQUARE_POS[dest_square]))
+                continue
+
+            killed_mask = 0 if killed_square is None else 1 << killed_square
+            next_occupancy = (occupancy & ~(1 << square) & ~killed_mask) | (1 << dest_square)
+            attacked_square = dest_square if chessman_type is King else king_square
+
+            if not self.__is_attacked(attacked_square, enemy_team, next_occupancy, killed_mask):
+                valid_moves.add((action, SQUARE_POS[dest_square]))
+        return valid_moves
+
+    def chessman_move(
+            self,
+            target_chessman : BaseChessman,
+            dest_pos        : BoardPosType
+        ) -> Tuple[Optional[SpecialMove], Optional[BaseChessman]]:
+        # same as ChessBoard.chessman_move
+
+        killed_enemy, case = None, None
+        origin_pos = target_chessman.get_pos()
+        en_passant_pos, castling_rights, halfmove_clock = self.__state
+        next_en_passant_pos = None
+        dest_square = POS_SQUARE[dest_pos]
+        self.__remove(POS_SQUARE[origin_pos])
+        self.__legal_moves_cache.clear()
+
+        target_chessman.set_moved()
+        target_chessman.set_pos(dest_pos)
+
+        # special case I: promotion
+        if isinstance(target_chessman, Pawn) and \
+           (target_chessman.get_team() == Team.WHITE and dest_pos[0] == ROW_VALUE_RANGE[-1] or\
+           target_chessman.get_team() == Team.BLACK and dest_pos[0] == ROW_VALUE_RANGE[0]):
+
+            killed_enemy = self.__remove(dest_square)
+            self.__place(target_chessman, dest_square)
+            case = SpecialMove.PROMOTION
+
+        # special case II: en_passant
+        elif isinstance(target_chessman, Pawn) and dest_pos == en_passant_pos:
+
+            if target_chessman.get_team() == Team.WHITE: enemy_square = dest_square - 8
+            else:                                        enemy_square = dest_square + 8
+
+            killed_enemy = self.__remove(enemy_square)
+            self.__place(target_chessman, dest_square)
+            case = SpecialMove.EN_PASSANT
+
+        # special case III: castling
+        elif isinstance(target_chessman, King) and origin_pos[1] == 'e' and dest_pos in CASTLING_POS:
+
+            self.__place(target_chessman, dest_square)
+
+            # long castling
+            if dest_pos[1] == 'c':
+                case, rook_col, rook_dest_col = SpecialMove.LONG_CASTLING, 'a', 'd'
+            # short castling
+            else:
+                case, rook_col, rook_dest_col = SpecialMove.SHORT_CASTLING, 'h', 'f'
+
+            castling_rook = self.__remove(POS_SQUARE[(dest_pos[0], rook_col)])
+            castling_rook.set_moved()
+            castling_rook.set_pos((dest_pos[0], rook_dest_col))
+            self.__place(castling_rook, POS_SQUARE[(dest_pos[0], rook_dest_col)])
+
+        # Pawn special move: go forward 2 cells
+        elif isinstance(target_chessman, Pawn) and abs(dest_pos[0] - origin_pos[0]) == 2:
+            self.__place(target_chessman, dest_square)
+
+            next_en_passant_pos = self.__get_en_passant_pos(((origin_pos[0] + dest_pos[0]) // 2, dest_pos[1]))
+        else:
+            killed_enemy = self.__remove(dest_square)
+            self.__place(target_chessman, dest_square)
+
+        if killed_enemy is not None: self.__update_material(killed_enemy, -1)
+
+        self.__state = (
+            next_en_passant_pos,
+            update_castling_rights(castling_rights, origin_pos, dest_pos),
+            0 if isinstance(target_chessman, Pawn) or killed_enemy is not None else halfmove_clock + 1
+        )
+        return (case, killed_enemy)
+
+    def promotion(self, target_pawn: Pawn, new_chessman_type: PromotionType) -> None:
+
+        curr_pos = target_pawn.get_pos()
+        new_chessman = new_chessman_type(curr_pos[0], curr_pos[1], target_pawn.get_team())
+        new_chessman.set_moved()
+        self.__remove(POS_SQUARE[curr_pos])
+        self.__place(new_chessman, POS_SQUARE[curr_pos])
+        self.__update_material(target_pawn, -1)
+        self.__update_material(new_chessman, 1)
+        self.__legal_moves_cache.clear()
+
+    def make_move(
+            self,
+            target_chessman : BaseChessman,
+            dest_pos        : BoardPosType,
+            promotion_type  : Optional[PromotionType] = None
+        ) -> UndoType:
+        # same as ChessBoard.make_move
+
+        source_pos, has_moved, board_state = target_chessman.get_pos(), target_chessman.get_moved(), self.__state
+
+        case, killed_enemy = self.chessman_move(target_chessman, dest_pos)
+
+        castling_rook, promoted_chessman = None, None
+        if case == SpecialMove.LONG_CASTLING:
+            castling_rook = self.get_chessman(dest_pos[0], 'd')
+        elif case == SpecialMove.SHORT_CASTLING:
+            castling_rook = self.get_chessman(dest_pos[0], 'f')
+        elif case == SpecialMove.PROMOTION and promotion_type is not None:
+            self.promotion(target_chessman, promotion_type)
+            promoted_chessman = self.get_chessman(dest_pos[0], dest_pos[1])
+
+        return (target_chessman, source_pos, has_moved, killed_enemy, castling_rook, promoted_chessman, board_state)
+
+    def unmake_move(self, undo: UndoType) -> None:
+
+        target_chessman, source_pos, has_moved, killed_enemy, castling_rook, promoted_chessman, board_state = undo
+        self.__legal_moves_cache.clear()
+
+        if castling_rook is not None:
+            rook_pos = castling_rook.get_pos()
+            origin_pos = (rook_pos[0], 'a' if rook_pos[1] == 'd' else 'h')
+            self.__remove(POS_SQUARE[rook_pos])
+            self.__place(castling_rook, POS_SQUARE[origin_pos])
+            castling_rook.set_pos(origin_pos)
+            castling_rook.set_moved(False)
+
+        self.__remove(POS_SQUARE[target_chessman.get_pos()])
+        self.__place(target_chessman, POS_SQUARE[source_pos])
+        target_chessman.set_pos(source_pos)
+        target_chessman.set_moved(has_moved)
+
+        # the killed enemy keeps its position (the en passant victim is not on dest_pos)
+        if killed_enemy is not None:
+            self.__place(killed_enemy, POS_SQUARE[killed_enemy.get_pos()])
+            self.__update_material(killed_enemy, 1)
+
+        if promoted_chessman is not None:
+            self.__update_material(promoted_chessman, -1)
+            self.__update_material(target_chessman, 1)
+
+        self.__state = board_state
+
+    def __get_en_passant_pos(self, en_passant_pos: BoardPosType) -> Optional[BoardPosType]:
+        # same as ChessBoard.__get_en_passant_pos, the capture is tried on the occupancy like the move generation
+
+        for pawn in get_en_passant_pawns(self, en_passant_pos):
+            team = pawn.get_team()
+            king_bitboard = self.__pieces[team][King]
+            if king_bitboard == 0: return en_passant_pos
+
+            dest_square = POS_SQUARE[en_passant_pos]
+            killed_mask = 1 << POS_SQUARE[(pawn.get_pos()[0], en_passant_pos[1])]
+            next_occupancy = (self.__get_occupancy() & ~(1 << POS_SQUARE[pawn.get_pos()]) & ~killed_mask) | (1 << dest_square)
+            enemy_team = Team.BLACK if team == Team.WHITE else Team.WHITE
+
+            if not self.__is_attacked(king_bitboard.bit_length() - 1, enemy_team, next_occupancy, killed_mask): return en_passant_pos
+        return None
+
+    def __set_chessmen(self, chessmen: List[BaseChessman]) -> None:
+        self.__squares = [None] * 64
+        self.__pieces = {
+            team: {chessman_type: 0 for chessman_type in (King, Queen, Rook, Bishop, Knight, Pawn)}
+            for team in (Team.WHITE, Team.BLACK)
+        }
+        self.__occupancy = {Team.WHITE: 0, Team.BLACK: 0}
+        self.__kings = dict()               # key: team, value: the king of the team
+        self.__material = {Team.WHITE: [0] * 7, Team.BLACK: [0] * 7}
+        self.__legal_moves_cache = dict()   # key: board hash (with the team), value: the legal moves of the team
+        self.__chessmen_hash = 0
+
+        for chessman in chessmen:
+            self.__place(chessman, POS_SQUARE[chessman.get_pos()])
+            self.__update_material(chessman, 1)
+            if isinstance(chessman, King): self.__kings[chessman.get_team()] = chessman
+
+        self.__state = (None, get_castling_rights(self), 0)
+
+    def __place(self, chessman: BaseChessman, square: int) -> None:
+
+        bit = 1 << square
+        self.__squares[square] = chessman
+        self.__pieces[chessman.get_team()][type(chessman)] |= bit
+        self.__occupancy[chessman.get_team()] |= bit
+        self.__chessmen_hash ^= chessman_hash(chessman, SQUARE_POS[square])
+
+    def __update_material(self, chessman: BaseChessman, delta: int) -> None:
+        self.__material[chessman.get_team()][get_material_index(chessman, POS_SQUARE[chessman.get_pos()])] += delta
+
+    def __remove(self, square: int) -> Optional[BaseChessman]:
+
+        chessman = self.__squares[square]
+        if chessman is None: return None
+
+        bit = 1 << square
+        self.__squares[square] = None
+        self.__pieces[chessman.get_team()][type(chessman)] &= ~bit
+        self.__occupancy[chessman.get_team()] &= ~bit
+        self.__chessmen_hash ^= chessman_hash(chessman, SQUARE_POS[square])
+        return chessman
+
+    def __get_occupancy(self) -> int:
+        return self.__occupancy[Team.WHITE] | self.__occupancy[Team.BLACK]
+
+    def __is_attacked(self, square: int, by_team: Team, occupancy: int, killed_mask: int = 0) -> bool:
+        # killed_mask: the chessmen of by_team which are captured and can't attack anymore
+
+        pieces = self.__pieces[by_team]
+        alive_mask = ~killed_mask
+        defend_team = Team.BLACK if by_team == Team.WHITE else Team.WHITE
+
+        if KNIGHT_ATTACKS[square] & pieces[Knight] & alive_mask:           return True
+        if KING_ATTACKS[square] & pieces[King] & alive_mask:               return True
+        if PAWN_ATTACKS[defend_team][square] & pieces[Pawn] & alive_mask:  return True
+        if slider_attacks(square, occupancy, BISHOP_RAYS) & (pieces[Bishop] | pieces[Queen]) & alive_mask: return True
+        if slider_attacks(square, occupancy, ROOK_RAYS) & (pieces[Rook] | pieces[Queen]) & alive_mask:     return True
+        return False
+
+    def __check_castling(
+            self,
+            start_row      : int,
+            enemy_team     : Team,
+            occupancy      : int,
+            between_cols   : Tuple[str, ...],
+            king_pass_cols : Tuple[str, ...]
+        ) -> bool:
+        # the castling right is checked by the caller
+
+        # all the cells between the king and the rook are clear.
+        for col in between_cols:
+            if (occupancy >> POS_SQUARE[(start_row, col)]) & 1: return False
+
+        # the cells that the king passes through can't be attacked.
+        for col in king_pass_cols:
+            if self.__is_attacked(POS_SQUARE[(start_row, col)], enemy_team, occupancy): return False
+        return True
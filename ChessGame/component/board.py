@@ -1,12 +1,89 @@
 from __future__ import annotations
 from enum import Enum, auto
-from copy import deepcopy
 from typing import Optional
 from .chessman import *
+from .square import *
+from .zobrist import *
+from .fen import *
 from ..const import *
 from ..type_defs import *
 
 
+def get_castling_rights(chess_board: ChessBoard) -> Tuple[bool, bool, bool, bool]:
+    # (white_long_castling, white_short_castling, black_long_castling, black_short_castling)
+    # a castling is kept while the king and the rook have not moved
+
+    castling_rights = [False, False, False, False]
+
+    for i, row in enumerate((ROW_VALUE_RANGE[0], ROW_VALUE_RANGE[-1])):
+        king_chessman = chess_board.get_chessman(row, 'e')
+        if not isinstance(king_chessman, King) or king_chessman.get_moved(): continue
+
+        for j, rook_col in enumerate(('a', 'h')):
+            rook_chessman = chess_board.get_chessman(row, rook_col)
+            if isinstance(rook_chessman, Rook) and rook_chessman.get_moved() == False:
+                castling_rights[2 * i + j] = True
+
+    return tuple(castling_rights)
+
+def update_castling_rights(
+        castling_rights : Tuple[bool, bool, bool, bool], 
+        source_pos      : BoardPosType, 
+        dest_pos        : BoardPosType
+    ) -> Tuple[bool, bool, bool, bool]:
+    # a castling is lost once its king or rook leaves the start cell, or the rook is captured there
+
+    lost_rights = CASTLING_RIGHTS_CELLS.get(source_pos, ()) + CASTLING_RIGHTS_CELLS.get(dest_pos, ())
+    if len(lost_rights) == 0: return castling_rights
+    return tuple(has_right and i not in lost_rights for i, has_right in enumerate(castling_rights))
+
+# (castling, rook_col, king_dest_col, between_cols, king_pass_cols)
+#   castling: the index in the castling rights of the team, 0: long castling, 1: short castling
+CASTLING_PATHS = (
+    (0, 'a', 'c', ('b', 'c', 'd'), ('c', 'd', 'e')),
+    (1, 'h', 'g', ('f', 'g'),      ('e', 'f', 'g'))
+)
+
+def get_castling_moves(
+        king            : King, 
+        board           : BoardDictType, 
+        castling_rights : Tuple[bool, bool, bool, bool]
+    ) -> set[MoveType]:
+    # the castling rights say the king and the rook are on their start cells and have not moved,
+    # so only the cells between them and the cells that the king passes through are checked
+
+    team_rights = castling_rights[:2] if king.get_team() == Team.WHITE else castling_rights[2:]
+    if not any(team_rights): return set()
+
+    start_row = 1 if king.get_team() == Team.WHITE else ROW_VALUE_RANGE[-1]
+    enemy_team = Team.BLACK if king.get_team() == Team.WHITE else Team.WHITE
+
+    castling_moves = set()
+    for castling, _, king_dest_col, between_cols, king_pass_cols in CASTLING_PATHS:
+        if not team_rights[castling]: continue
+        # all the cells between the king and the rook are clear.
+        if any(board[start_row][col] is not None for col in between_cols): continue
+        # the cells that the king passes through can't be attacked.
+        if any(is_pos_attacked((start_row, col), enemy_team, board) for col in king_pass_cols): continue
+        castling_moves.add(("Castling", (start_row, king_dest_col)))
+    return castling_moves
+
+def can_take_en_passant(pawn: Pawn, en_passant_pos: Optional[BoardPosType]) -> bool:
+    # the en passant square is behind an enemy pawn (row 6 is taken by white, row 3 by black), and the pawn attacks it
+
+    if en_passant_pos is None or (en_passant_pos[0] == 6) != (pawn.get_team() == Team.WHITE): return False
+    return en_passant_pos in PAWN_ATTACK_TARGETS[pawn.get_advance_direction()][POS_SQUARE[pawn.get_pos()]]
+
+# key: chessman type, value: the index in MaterialType (a bishop adds the color index of its cell)
+MATERIAL_INDEX = {King: 0, Queen: 1, Rook: 2, Bishop: 3, Knight: 5, Pawn: 6}
+
+def get_material_index(chessman: BaseChessman, square: int) -> int:
+
+    material_index = MATERIAL_INDEX[type(chessman)]
+    # a bishop never leaves the color of its cell, so only the captures and the promotions change the material
+    if material_index == 3: material_index += SQUARE_COLORS[square]
+    return material_index
+
 class SpecialMove(Enum):
     PROMOTION      = auto()
     EN_PASSANT     = auto()
@@ -18,64 +95,60 @@ class ChessBoard:
     @staticmethod
     def is_board_in_check(board: ChessBoard, team: Team) -> bool:
         
+        # the check state is cached until the board changes
+        in_check = board.__check_cache.get(team)
+        if in_check is not None: return in_check
+
+        king = board.__kings[team]
+        king_row, king_col = king.get_pos()
         enemy_team = Team.BLACK if team == Team.WHITE else Team.WHITE
-        team_attack_area = get_all_team_attack_area(enemy_team, board.get_entire_board())
 
-        for pos in team_attack_area:
-            pos_chessman = board.get_chessman(pos[0], pos[1])
+        # the king has been captured
+        if board.__board[king_row][king_col] is not king: in_check = False
+        else:                                               in_check = is_pos_attacked(king.get_pos(), enemy_team, board.__board)
 
-            if isinstance(pos_chessman, King) and \
-                pos_chessman.get_team() == team:
-                return True
-            
-        return False
+        board.__check_cache[team] = in_check
+        return in_check
     
     @staticmethod
     def is_board_checkmate(board: ChessBoard, team: Team) -> bool:
-
-        is_check = ChessBoard.is_board_in_check(board, team)
-        no_valid_moves = ChessBoard.is_board_no_valid_moves(board, team)
-        return is_check and no_valid_moves
+        # the move generation is skipped when the king is not in check
+        return ChessBoard.is_board_in_check(board, team) and ChessBoard.is_board_no_valid_moves(board, team)
 
     @staticmethod
     def is_board_no_valid_moves(board: ChessBoard, team: Team) -> bool:
-        
-        for row in ROW_VALUE_RANGE:
-            for col in COL_VALUE_RANGE:
-                curr_chessman = board.get_chessman(row, col)
-                if curr_chessman is not None and \
-                   curr_chessman.get_team() == team:
-                    
-                    # try all the valid moves of the chessman
-                    valid_moves = board.get_valid_moves(curr_chessman)
-                    
-                    for action, pos in valid_moves:
-                        next_board = board.peak_move(curr_chessman, pos)
-                        in_check = ChessBoard.is_board_in_check(next_board, team)
-                        del next_board
-
-                        if not in_check:  return False
-        return True
+        return len(board.generate_legal_moves(team)) == 0
 
     def __init__(self) -> None:
         self.reset_board()
 
     def reset_board(self) -> None:
-        self.__board = dict()
 
-        for row in ROW_VALUE_RANGE:
-            self.__board[row] = dict()
-            for col in COL_VALUE_RANGE:
-                self.__board[row][col] = None
-        
         # set the chessmen
+        chessmen = list()
         chessman_type_in_order = (Rook, Knight, Bishop, Queen, King, Bishop, Knight, Rook)
         for col, chessman_class in zip(COL_VALUE_RANGE, chessman_type_in_order):
-            self.__board[1][col] = chessman_class(1, col, Team.WHITE)
-            self.__board[2][col] = Pawn(2, col, Team.WHITE)
-            
-            self.__board[7][col] = Pawn(7, col, Team.BLACK)
-            self.__board[8][col] = chessman_class(8, col, Team.BLACK)
+            chessmen.append(chessman_class(1, col, Team.WHITE))
+            chessmen.append(Pawn(2, col, Team.WHITE))
+
+            chessmen.append(Pawn(7, col, Team.BLACK))
+            chessmen.append(chessman_class(8, col, Team.BLACK))
+
+        self.__set_chessmen(chessmen)
+
+    def from_fen(self, fen: str) -> Team:
+        # set the board to the position of the FEN string, and return the team to move
+
+        chessmen, turn, en_passant_pos, halfmove_clock, _ = parse_fen(fen)
+        self.__set_chessmen(chessmen)
+
+        if en_passant_pos is not None: en_passant_pos = self.__get_en_passant_pos(en_passant_pos)
+        self.__state = (en_passant_pos, self.__state[1], halfmove_clock)
+        return turn
+
+    def to_fen(self, turn: Team, fullmove_number: int = 1) -> str:
+        # the board keeps no fullmove number, it is given by the caller (ChessGame.to_fen)
+        return build_fen(self, turn, fullmove_number)
 
     def print_text_board(self) -> None:
 
@@ -113,6 +186,18 @@ class ChessBoard:
     def get_entire_board(self) -> BoardDictType:
         return self.__board
 
+    def get_chessmen(self, team: Team) -> Tuple[BaseChessman, ...]:
+        # the chessmen of the team on the board, without scanning the 64 cells
+        # it is a snapshot, so the board may be changed while it is iterated
+        return tuple(self.__chessmen[team])
+
+    def get_king(self, team: Team) -> King:
+        return self.__kings[team]
+
+    def get_material(self, team: Team) -> MaterialType:
+        # the chessman counts are updated by the captures and the promotions, so it is read without scanning the board
+        return tuple(self.__material[team])
+
     def get_valid_moves(self, target_chessman: BaseChessman) -> set[MoveType]:
 
         if target_chessman is None: return set()
@@ -121,118 +206,347 @@ class ChessBoard:
 
         if self.__board[curr_row][curr_col] is not target_chessman:
             raise ValueError
-        
-        chessman_moves = target_chessman.get_valid_moves(self.__board)
-        
-        valid_moves = set()
-        # make sure the moves that can't make the king attacked
-        for action, pos in chessman_moves:
-            next_board = self.peak_move(target_chessman, pos)
 
-            if not ChessBoard.is_board_in_check(next_board, target_chessman.get_team()):
-                valid_moves.add((action, pos))
-        return valid_moves
-        
-    def refresh_en_passant(self, turn: Team) -> None:
+        # the moves of the whole team are reused when they have been generated for this position
+        team = target_chessman.get_team()
+        legal_moves = self.__legal_moves_cache.get(self.get_hash() ^ turn_hash(team))
+        if legal_moves is not None: return legal_moves.get((curr_row, curr_col), set())
 
-        for row in ROW_VALUE_RANGE:
-            for col in COL_VALUE_RANGE:
-                chessman = self.get_chessman(row, col)
-                
-                if isinstance(chessman, Pawn) and chessman.get_team() == turn:
-                    chessman.clear_en_passant()
+        return self.__get_legal_moves(target_chessman, self.__get_check_info(team))
+
+    def generate_legal_moves(self, team: Team) -> LegalMovesType:
+        # the legal moves of the whole team (key: source position, only the chessmen which can move),
+        # the checks and the pins are found once for all the chessmen
+        # the result is cached by the position hash until the next move, so the callers must not modify it
+
+        cache_key = self.get_hash() ^ turn_hash(team)
+        legal_moves = self.__legal_moves_cache.get(cache_key)
+        if legal_moves is not None: return legal_moves
+
+        check_info = self.__get_check_info(team)
+
+        legal_moves = dict()
+        for chessman in self.get_chessmen(team):
+            chessman_moves = self.__get_legal_moves(chessman, check_info)
+            if len(chessman_moves) > 0: legal_moves[chessman.get_pos()] = chessman_moves
+
+        self.__legal_moves_cache[cache_key] = legal_moves
+        return legal_moves
 
     def chessman_move(
             self, 
             target_chessman : BaseChessman, 
             dest_pos        : BoardPosType
         ) -> Tuple[Optional[SpecialMove], Optional[BaseChessman]]:
+        # play a whole move (with the rook of castling) and update the board state, a promotion is finished by promotion()
 
-        killed_enemy = None
+        killed_enemy, case = None, None
         origin_pos = target_chessman.get_pos()
-        self.__board[origin_pos[0]][origin_pos[1]] = None
+        en_passant_pos, castling_rights, halfmove_clock = self.__state
+        next_en_passant_pos = None
+        self.__remove(origin_pos)
+        self.__check_cache.clear()
+        self.__legal_moves_cache.clear()
+
+        target_chessman.set_moved()
+        target_chessman.set_pos(dest_pos)
 
         # special case I: promotion
         if isinstance(target_chessman, Pawn) and \
            (target_chessman.get_team() == Team.WHITE and dest_pos[0] == ROW_VALUE_RANGE[-1] or\
            target_chessman.get_team() == Team.BLACK and dest_pos[0] == ROW_VALUE_RANGE[0]):
             
-            target_chessman.set_moved()
-            target_chessman.set_pos(dest_pos)
-
-            killed_enemy = self.__board[dest_pos[0]][dest_pos[1]]
-            self.__board[dest_pos[0]][dest_pos[1]] = target_chessman
-
-            return (SpecialMove.PROMOTION, killed_enemy)
+            killed_enemy = self.__remove(dest_pos)
+            self.__place(target_chessman, dest_pos)
+            case = SpecialMove.PROMOTION
 
         # special case II: en_passant
-        elif isinstance(target_chessman, Pawn) and dest_pos in target_chessman.get_en_passant():
+        elif isinstance(target_chessman, Pawn) and dest_pos == en_passant_pos:
 
-            target_chessman.set_moved()
-            target_chessman.set_pos(dest_pos)
-            
-            if target_chessman.get_team() == Team.WHITE: _, enemy_pos = calc_position(dest_pos, -1, 0)
-            else:                                        _, enemy_pos = calc_position(dest_pos, 1, 0)
+            if target_chessman.get_team() == Team.WHITE: enemy_pos = SQUARE_POS[POS_SQUARE[dest_pos] - 8]
+            else:                                        enemy_pos = SQUARE_POS[POS_SQUARE[dest_pos] + 8]
             
-            killed_enemy = self.__board[enemy_pos[0]][enemy_pos[1]]
-            self.__board[enemy_pos[0]][enemy_pos[1]] = None
-            self.__board[dest_pos[0]][dest_pos[1]] = target_chessman
-
-            return (SpecialMove.EN_PASSANT, killed_enemy)
+            killed_enemy = self.__remove(enemy_pos)
+            self.__place(target_chessman, dest_pos)
+            case = SpecialMove.EN_PASSANT
         
         # special case III: castling
-        elif isinstance(target_chessman, King) and not target_chessman.get_moved() and dest_pos in CASTLING_POS:
+        elif isinstance(target_chessman, King) and origin_pos[1] == 'e' and dest_pos in CASTLING_POS:
             
-            target_chessman.set_moved()
-            target_chessman.set_pos(dest_pos)
-            self.__board[dest_pos[0]][dest_pos[1]] = target_chessman
+            self.__place(target_chessman, dest_pos)
 
             # long castling
             if dest_pos[1] == 'c':
-                return (SpecialMove.LONG_CASTLING, None)
+                case, rook_col, rook_dest_col = SpecialMove.LONG_CASTLING, 'a', 'd'
             # short castling
             else:
-                return (SpecialMove.SHORT_CASTLING, None)
+                case, rook_col, rook_dest_col = SpecialMove.SHORT_CASTLING, 'h', 'f'
+
+            castling_rook = self.__remove((dest_pos[0], rook_col))
+            castling_rook.set_moved()
+            castling_rook.set_pos((dest_pos[0], rook_dest_col))
+            self.__place(castling_rook, (dest_pos[0], rook_dest_col))
         
         # Pawn special move: go forward 2 cells
-        elif isinstance(target_chessman, Pawn) and not target_chessman.get_moved() and dest_pos[0] in (4, 5):
-            target_chessman.set_moved()
-            target_chessman.set_pos(dest_pos)
-            self.__board[dest_pos[0]][dest_pos[1]] = target_chessman
-            
-            for delta_col in (-1, 1):
-                valid, neighbor_pos = calc_position(dest_pos, 0, delta_col)
-                
-                if not valid: continue
-                neighbor_chessman = self.get_chessman(neighbor_pos[0], neighbor_pos[1])
-
-                if neighbor_chessman is not None and \
-                    isinstance(neighbor_chessman, Pawn) and \
-                    neighbor_chessman.get_team() != target_chessman.get_team():
-
-                    advance_direction = 1 if neighbor_chessman.get_team() == Team.WHITE else -1
-                    neighbor_chessman.add_en_passant(( dest_pos[0] + advance_direction, dest_pos[1]))
-            return (None, killed_enemy)
+        elif isinstance(target_chessman, Pawn) and abs(dest_pos[0] - origin_pos[0]) == 2:
+            self.__place(target_chessman, dest_pos)
+
+            next_en_passant_pos = self.__get_en_passant_pos(((origin_pos[0] + dest_pos[0]) // 2, dest_pos[1]))
         else:
-            target_chessman.set_moved()
-            target_chessman.set_pos(dest_pos)
+            killed_enemy = self.__remove(dest_pos)
+            self.__place(target_chessman, dest_pos)
 
-            killed_enemy = self.__board[dest_pos[0]][dest_pos[1]]
-            self.__board[dest_pos[0]][dest_pos[1]] = target_chessman
+        if killed_enemy is not None: self.__update_material(killed_enemy, -1)
 
-            return (None, killed_enemy)
+        # the halfmove clock counts the plies since the last pawn move or capture
+        self.__state = (
+            next_en_passant_pos, 
+            update_castling_rights(castling_rights, origin_pos, dest_pos), 
+            0 if isinstance(target_chessman, Pawn) or killed_enemy is not None else halfmove_clock + 1
+        )
+        return (case, killed_enemy)
 
     def promotion(self, target_pawn: Pawn, new_chessman_type: PromotionType) -> None:
         
         curr_pos = target_pawn.get_pos()
         new_chessman = new_chessman_type(curr_pos[0], curr_pos[1], target_pawn.get_team())
         new_chessman.set_moved()
-        self.__board[curr_pos[0]][curr_pos[1]] = new_chessman
+        self.__remove(curr_pos)
+        self.__place(new_chessman, curr_pos)
+        self.__update_material(target_pawn, -1)
+        self.__update_material(new_chessman, 1)
+        self.__check_cache.clear()
+        self.__legal_moves_cache.clear()
+
+    def make_move(
+            self, 
+            target_chessman : BaseChessman, 
+            dest_pos        : BoardPosType, 
+            promotion_type  : Optional[PromotionType] = None
+        ) -> UndoType:
+        # play a whole move in place (chessman_move and the promotion), 
+        # the returned undo record is used by unmake_move to restore the board
+
+        source_pos, has_moved, board_state = target_chessman.get_pos(), target_chessman.get_moved(), self.__state
+
+        case, killed_enemy = self.chessman_move(target_chessman, dest_pos)
+
+        castling_rook, promoted_chessman = None, None
+        if case == SpecialMove.LONG_CASTLING:
+            castling_rook = self.__board[dest_pos[0]]['d']
+        elif case == SpecialMove.SHORT_CASTLING:
+            castling_rook = self.__board[dest_pos[0]]['f']
+        elif case == SpecialMove.PROMOTION and promotion_type is not None:
+            self.promotion(target_chessman, promotion_type)
+            promoted_chessman = self.__board[dest_pos[0]][dest_pos[1]]
+
+        return (target_chessman, source_pos, has_moved, killed_enemy, castling_rook, promoted_chessman, board_state)
+
+    def unmake_move(self, undo: UndoType) -> None:
+
+        target_chessman, source_pos, has_moved, killed_enemy, castling_rook, promoted_chessman, board_state = undo
+        dest_pos = target_chessman.get_pos()
+        self.__check_cache.clear()
+        self.__legal_moves_cache.clear()
+
+        if castling_rook is not None:
+            rook_pos = castling_rook.get_pos()
+            origin_col = 'a' if rook_pos[1] == 'd' else 'h'
+            self.__remove(rook_pos)
+            self.__place(castling_rook, (rook_pos[0], origin_col))
+            castling_rook.set_pos((rook_pos[0], origin_col))
+            castling_rook.set_moved(False)
+
+        self.__remove(dest_pos)
+        self.__place(target_chessman, source_pos)
+        target_chessman.set_pos(source_pos)
+        target_chessman.set_moved(has_moved)
+
+        # the killed enemy keeps its position (the en passant victim is not on dest_pos)
+        if killed_enemy is not None:
+            self.__place(killed_enemy, killed_enemy.get_pos())
+            self.__update_material(killed_enemy, 1)
+
+        if promoted_chessman is not None:
+            self.__update_material(promoted_chessman, -1)
+            self.__update_material(target_chessman, 1)
+
+        self.__state = board_state
+
+    def get_state(self) -> BoardStateType:
+        # the state besides the chessmen, an immutable tuple which is replaced by every move
+        return self.__state
+
+    def get_en_passant_pos(self) -> Optional[BoardPosType]:
+        return self.__state[0]
+
+    def get_castling_rights(self) -> Tuple[bool, bool, bool, bool]:
+        return self.__state[1]
+
+    def get_halfmove_clock(self) -> int:
+        return self.__state[2]
+
+    def get_hash(self) -> int:
+        # the chessmen part is updated in place, the castling rights and the en passant square are mixed in on demand
+        return self.__chessmen_hash ^ castling_rights_hash(self.__state[1]) ^ en_passant_hash(self.__state[0])
+
+    def __get_check_info(self, team: Team) -> Optional[Tuple[int, set[BoardPosType], Dict[BaseChessman, set[BoardPosType]]]]:
+        # (checker_count, evasion_cells, pin_cells)
+        #   evasion_cells: the checker and the cells between it and the king, a single check is only answered there
+        #   pin_cells:     key: a pinned chessman, value: the cells between the king and the pinner (with the pinner)
+        # None when the king has been captured
+
+        king = self.__kings[team]
+        king_row, king_col = king.get_pos()
+        if self.__board[king_row][king_col] is not king: return None
+
+        square = POS_SQUARE[king.get_pos()]
+        checker_count, evasion_cells, pin_cells = 0, set(), dict()
+
+        for row, col in KNIGHT_TARGETS[square]:
+            chessman = self.__board[row][col]
+            if isinstance(chessman, Knight) and chessman.get_team() != team:
+                checker_count += 1
+                evasion_cells.add((row, col))
+
+        # the enemy pawns which attack the king stand where a pawn of the team on the king cell would attack
+        advance_direction = 1 if team == Team.WHITE else -1
+        for row, col in PAWN_ATTACK_TARGETS[advance_direction][square]:
+            chessman = self.__board[row][col]
+            if isinstance(chessman, Pawn) and chessman.get_team() != team:
+                checker_count += 1
+                evasion_cells.add((row, col))
+
+        for ray_targets, slider_type in ((ROOK_RAY_TARGETS, Rook), (BISHOP_RAY_TARGETS, Bishop)):
+            for ray in ray_targets[square]:
+                blocker = None
+                for i, (row, col) in enumerate(ray):
+                    chessman = self.__board[row][col]
+                    if chessman is None: continue
+
+                    if chessman.get_team() == team:
+                        # a second chessman of the team behind the first one: no pin on this ray
+                        if blocker is not None: break
+                        blocker = chessman
+                        continue
+
+                    if isinstance(chessman, (slider_type, Queen)):
+                        if blocker is None:
+                            checker_count += 1
+                            evasion_cells.update(ray[:i + 1])
+                        else:
+                            pin_cells[blocker] = set(ray[:i + 1])
+                    break
+
+        return (checker_count, evasion_cells, pin_cells)
+
+    def __get_legal_moves(
+            self, 
+            target_chessman : BaseChessman, 
+            check_info      : Optional[Tuple[int, set[BoardPosType], Dict[BaseChessman, set[BoardPosType]]]]
+        ) -> set[MoveType]:
+
+        if isinstance(target_chessman, King):
+            # the king is lifted, so the cells behind it on the ray of a slider count as attacked
+            king_row, king_col = target_chessman.get_pos()
+            self.__board[king_row][king_col] = None
+            chessman_moves = target_chessman.get_valid_moves(self.__board)
+            self.__board[king_row][king_col] = target_chessman
+            chessman_moves.update(get_castling_moves(target_chessman, self.__board, self.__state[1]))
+            return chessman_moves
+
+        chessman_moves = target_chessman.get_valid_moves(self.__board)
+        en_passant_pos = None
+        if isinstance(target_chessman, Pawn) and can_take_en_passant(target_chessman, self.__state[0]):
+            en_passant_pos = self.__state[0]
+            chessman_moves.add(("Attack", en_passant_pos))
+        if check_info is None: return chessman_moves
+
+        checker_count, evasion_cells, pin_cells = check_info
+        # double check: only the king can move
+        if checker_count >= 2: return set()
+
+        chessman_pin_cells = pin_cells.get(target_chessman)
+
+        valid_moves = set()
+        for action, pos in chessman_moves:
+            if pos == en_passant_pos:
+                if not self.__is_en_passant_legal(target_chessman, pos): continue
+            else:
+                if chessman_pin_cells is not None and pos not in chessman_pin_cells: continue
+                if checker_count == 1 and pos not in evasion_cells:                   continue
+
+            valid_moves.add((action, pos))
+        return valid_moves
+
+    def __get_en_passant_pos(self, en_passant_pos: BoardPosType) -> Optional[BoardPosType]:
+        # the en passant square is only kept (and hashed) when a pawn can take en passant legally,
+        # otherwise the same positions would not match in the repetition record
+        for pawn in get_en_passant_pawns(self, en_passant_pos):
+            if self.__is_en_passant_legal(pawn, en_passant_pos): return en_passant_pos
+        return None
+
+    def __is_en_passant_legal(self, pawn: Pawn, en_passant_pos: BoardPosType) -> bool:
+        # en passant removes two chessmen from their cells (the pin on the row is not found by __get_check_info),
+        # so the cells are changed for the attack search and restored
+
+        king = self.__kings[pawn.get_team()]
+        king_row, king_col = king.get_pos()
+        # the king has been captured
+        if self.__board[king_row][king_col] is not king: return True
+
+        (pawn_row, pawn_col), (dest_row, dest_col) = pawn.get_pos(), en_passant_pos
+        enemy_pawn = self.__board[pawn_row][dest_col]
+        self.__board[pawn_row][pawn_col], self.__board[pawn_row][dest_col], self.__board[dest_row][dest_col] = None, None, pawn
+
+        enemy_team = Team.BLACK if pawn.get_team() == Team.WHITE else Team.WHITE
+        in_check = is_pos_attacked(king.get_pos(), enemy_team, self.__board)
+
+        self.__board[pawn_row][pawn_col], self.__board[pawn_row][dest_col], self.__board[dest_row][dest_col] = pawn, enemy_pawn, None
+        return not in_check
+
+    def __set_chessmen(self, chessmen: List[BaseChessman]) -> None:
+        self.__board = dict()
+        self.__kings = dict()               # key: team, value: the king of the team
+        self.__chessmen = {                 # key: team, value: the chessmen of the team on the board (a dict as an ordered set)
+            Team.WHITE: dict(), 
+            Team.BLACK: dict()
+        }
+        self.__material = {                 # key: team, value: the chessman counts of the team (MaterialType)
+            Team.WHITE: [0] * 7, 
+            Team.BLACK: [0] * 7
+        }
+        self.__check_cache = dict()         # key: team, value: whether the king of the team is in check
+        self.__legal_moves_cache = dict()   # key: board hash (with the team), value: the legal moves of the team
+        self.__chessmen_hash = 0
+
+        for row in ROW_VALUE_RANGE:
+            self.__board[row] = dict()
+            for col in COL_VALUE_RANGE:
+                self.__board[row][col] = None
+
+        for chessman in chessmen:
+            self.__place(chessman, chessman.get_pos())
+            self.__update_material(chessman, 1)
+            if isinstance(chessman, King): self.__kings[chessman.get_team()] = chessman
+
+        # the castling rights are read from the moved flags once, and then updated by the moves
+        self.__state = (None, get_castling_rights(self), 0)
+
+    def __place(self, chessman: BaseChessman, pos: BoardPosType) -> None:
+        self.__board[pos[0]][pos[1]] = chessman
+        self.__chessmen[chessman.get_team()][chessman] = None
+        self.__chessmen_hash ^= chessman_hash(chessman, pos)
+
+    def __update_material(self, chessman: BaseChessman, delta: int) -> None:
+        self.__material[chessman.get_team()][get_material_index(chessman, POS_SQUARE[chessman.get_pos()])] += delta
 
-    def peak_move(self, target_chessman: BaseChessman, dest_pos: BoardPosType) -> ChessBoard:
+    def __remove(self, pos: BoardPosType) -> Optional[BaseChessman]:
 
-        row, col = target_chessman.get_pos()
-        copied_chess_board = deepcopy(self)
-        copied_chess_board.chessman_move(copied_chess_board.get_chessman(row, col), dest_pos)
+        chessman = self.__board[pos[0]][pos[1]]
+        if chessman is None: return None
 
-        return copied_chess_board
\ No newline at end of file
+        self.__board[pos[0]][pos[1]] = None
+        del self.__chessmen[chessman.get_team()][chessman]
+        self.__chessmen_hash ^= chessman_hash(chessman, pos)
+        return chessman
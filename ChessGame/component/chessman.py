@@ -1,6 +1,7 @@
 from __future__ import annotations
 from enum import Enum, auto
 from typing import override, Optional, Tuple, List
+from .square import *
 from ..const import *
 from ..type_defs import *
 
@@ -11,52 +12,58 @@ def check_valid_pos(pos: BoardPosType) -> bool:
         return True
     return False
 
-def calc_position(
-        current_pos : BoardPosType, 
-        row_move    : int, 
-        col_move    : int
-    ) -> Tuple[bool, Optional[BoardPosType]]:
-
-    def letter_to_int(col_alpha: str) -> int:
-        return COL_VALUE_RANGE.index(col_alpha)
-    
-    def int_to_letter(col_idx: int) -> str:
-        if col_idx >= len(COL_VALUE_RANGE) or col_idx < 0: return "#" # error chars
-        return COL_VALUE_RANGE[col_idx]
-
-    row_move_range = range(-len(ROW_VALUE_RANGE) + 1, len(ROW_VALUE_RANGE))
-    col_move_range = range(-len(COL_VALUE_RANGE) + 1, len(COL_VALUE_RANGE))
-    
-    if not (check_valid_pos(current_pos) and row_move in row_move_range and col_move in col_move_range):    return False, None
-
-    next_row = current_pos[0] + row_move
-    next_col = int_to_letter(letter_to_int(current_pos[1]) + col_move)
-    next_pos = (next_row, next_col)
-    if not check_valid_pos(next_pos): return False, None
-
-    return True, next_pos
-
-def get_all_team_attack_area(team: Team, board: BoardDictType) -> set[BoardPosType]:
-
-    team_attack_area = set()
-
-    for row in ROW_VALUE_RANGE:
-        for col in COL_VALUE_RANGE:
-            chessman = board[row][col]
+def is_pos_attacked(pos: BoardPosType, team: Team, board: BoardDictType) -> bool:
+    # search outward from pos for the chessmen of the team which can attack it,
+    # instead of building the attack area of every chessman of the team
+
+    square = POS_SQUARE[pos]
+
+    for row, col in KNIGHT_TARGETS[square]:
+        chessman = board[row][col]
+        if isinstance(chessman, Knight) and chessman.get_team() == team:
+            return True
+
+    for row, col in KING_TARGETS[square]:
+        chessman = board[row][col]
+        if isinstance(chessman, King) and chessman.get_team() == team:
+            return True
+
+    # a pawn of the team attacks pos from the cells which a pawn of the other side on pos would attack
+    pawn_advance_direction = -1 if team == Team.WHITE else 1
+    for row, col in PAWN_ATTACK_TARGETS[pawn_advance_direction][square]:
+        chessman = board[row][col]
+        if isinstance(chessman, Pawn) and chessman.get_team() == team:
+            return True
+
+    for ray_targets, slider_type in ((ROOK_RAY_TARGETS, Rook), (BISHOP_RAY_TARGETS, Bishop)):
+        for ray in ray_targets[square]:
+            for row, col in ray:
+                chessman = board[row][col]
+                if chessman is None: continue
+
+                if chessman.get_team() == team and isinstance(chessman, (slider_type, Queen)):
+                    return True
+                break
+    return False
 
-            if chessman is not None and chessman.get_team() == team:
-                chessman_attack_area = chessman.get_attack_area(board)
+def get_ray_attack_area(rays: Tuple[Tuple[BoardPosType, ...], ...], board: BoardDictType) -> set[BoardPosType]:
+    # walk every ray until it touches a chessman (the touched position is attackable too)
 
-                team_attack_area.update(chessman_attack_area)
-                
-    return team_attack_area
+    attack_area = set()
+    for ray in rays:
+        for pos in ray:
+            attack_area.add(pos)
+            if board[pos[0]][pos[1]] is not None: break
+    return attack_area
 
 class Team(Enum):
     WHITE = 37 # for \033[37m ... \033[0m
     BLACK = 30 # for \033[30m ... \033[0m
 
 class BaseChessman:
-    
+    # the chessmen keep no __dict__, many of them are kept by the stored positions and the board copies
+    __slots__ = ("__current_row", "__current_col", "__team", "__has_moved")
+
     def __init__(self, init_row: int, init_col: str, team: Team) -> None:
         if not check_valid_pos((init_row, init_col)):
             raise ValueError(f"Fail to initialize a chessman whose has wrong position ({init_row}, {init_col})")
@@ -88,8 +95,8 @@ class BaseChessman:
     def get_attack_area(self, board: BoardDictType) -> set[BoardPosType]:
         pass
 
-    def set_moved(self) -> None:
-        self.__has_moved = True
+    def set_moved(self, has_moved: bool = True) -> None:
+        self.__has_moved = has_moved
 
     def get_pos(self) -> BoardPosType:
         return (self.__current_row, self.__current_col)
@@ -100,7 +107,18 @@ class BaseChessman:
     def get_moved(self) -> bool:
         return self.__has_moved
 
+    # copy and pickle a chessman as its constructor arguments and a small state tuple
+    def __reduce__(self) -> Tuple[type, Tuple[int, str, Team], Tuple]:
+        return (type(self), (self.__current_row, self.__current_col, self.__team), self.__getstate__())
+
+    def __getstate__(self) -> Tuple:
+        return (self.__has_moved,)
+
+    def __setstate__(self, state: Tuple) -> None:
+        self.__has_moved = state[0]
+
 class King(BaseChessman):
+    __slots__ = ()
 
     def __init__(self, init_row: int, init_col: str, team: Team) -> None:
         super().__init__(init_row, init_col, team)
@@ -112,84 +130,30 @@ class King(BaseChessman):
     
     @override
     def get_valid_moves(self, board: BoardDictType) -> set[MoveType]:
-
-        def check_castling(
-                start_row             : int, 
-                board                 : BoardDictType, 
-                all_enemy_attack_area : set[BoardPosType], 
-                between_cells         : Tuple[str], 
-                king_pass_cells       : Tuple[str]
-            ) -> bool:
-
-            target_rook = board[start_row][COL_VALUE_RANGE[0]]
-            if isinstance(target_rook, Rook) and target_rook.get_moved() is False:
-                # all the cells between the king and the rook are clear.
-                for col in between_cells:
-                    if board[start_row][col] is not None:
-                        return False
-
-                # the cells that the king passes through can't be attacked.
-                for col in king_pass_cells:
-                    if (start_row, col) in all_enemy_attack_area:
-                        return False
-                return True
-            return False
         
         valid_moves = set()
 
-        if self.get_team() == Team.BLACK:
-            all_enemy_attack_area = get_all_team_attack_area(Team.WHITE, board)
-        else:
-            all_enemy_attack_area = get_all_team_attack_area(Team.BLACK, board)
+        enemy_team = Team.WHITE if self.get_team() == Team.BLACK else Team.BLACK
 
         attack_area = self.get_attack_area(board)
 
         for pos in attack_area:
-            if pos not in all_enemy_attack_area:
+            if not is_pos_attacked(pos, enemy_team, board):
                 chessman = board[pos[0]][pos[1]]
                 if chessman is None:
                     valid_moves.add(("Move", pos))
                 elif chessman.get_team() != self.get_team():
                     valid_moves.add(("Attack", pos))
 
-        if self.get_moved() is True: 
-            return valid_moves
-
-        start_row = 1 if self.get_team() == Team.WHITE else ROW_VALUE_RANGE[-1]
-
-        # long castling
-        if check_castling(start_row, board, all_enemy_attack_area, ('b', 'c', 'd'), ('c', 'd', 'e')):
-            valid_moves.add(('Castling', (start_row, 'c')))
-
-        # short castling
-        if check_castling(start_row, board, all_enemy_attack_area, ('f', 'g'), ('e', 'f', 'g')):
-            valid_moves.add(('Castling', (start_row, 'g')))
-
+        # the castling moves are added by the board, which keeps the castling rights
         return valid_moves
 
     @override
     def get_attack_area(self, board: BoardDictType) -> set[BoardPosType]:
-
-        attack_area = set() # store the attackable position 
-
-        # 8 directions 
-        directions = [
-            (-1, -1), (-1,  0), (-1,  1), 
-            ( 0, -1),           ( 0,  1), 
-            ( 1, -1), ( 1,  0), ( 1,  1)
-        ]
-
-        for dir in directions:
-            delta_row, delta_col = dir[0], dir[1]
-
-            valid, attack_pos = calc_position(self.get_pos(), delta_row, delta_col)
-
-            if valid is True:
-                attack_area.add(attack_pos)
-
-        return attack_area
+        return set(KING_TARGETS[POS_SQUARE[self.get_pos()]])
 
 class Queen(BaseChessman):
+    __slots__ = ()
 
     def __init__(self, init_row: int, init_col: str, team: Team) -> None:
         super().__init__(init_row, init_col, team)
@@ -218,34 +182,10 @@ class Queen(BaseChessman):
 
     @override
     def get_attack_area(self, board: BoardDictType) -> set[BoardPosType]:
-        
-        attack_area = set() # store the attackable position 
-
-        # 8 directions 
-        directions = [
-            (-1, -1), (-1,  0), (-1,  1), 
-            ( 0, -1),           ( 0,  1), 
-            ( 1, -1), ( 1,  0), ( 1,  1)
-        ]
-
-        for dir in directions:
-            for delta in range(1, len(ROW_VALUE_RANGE)):
-                delta_row, delta_col = dir[0] * delta, dir[1] * delta
-
-                valid, attack_pos = calc_position(self.get_pos(), delta_row, delta_col)
-
-                # out of bounds (attack_pos is not on the board)
-                if valid is False:
-                    break
-                # touch other chessmen
-                elif board[attack_pos[0]][attack_pos[1]] is not None:
-                    attack_area.add(attack_pos)
-                    break
-                else:
-                    attack_area.add(attack_pos)
-        return attack_area
+        return get_ray_attack_area(QUEEN_RAY_TARGETS[POS_SQUARE[self.get_pos()]], board)
 
 class Rook(BaseChessman):
+    __slots__ = ()
 
     def __init__(self, init_row: int, init_col: str, team: Team) -> None:
         super().__init__(init_row, init_col, team)
@@ -274,34 +214,10 @@ class Rook(BaseChessman):
 
     @override
     def get_attack_area(self, board: BoardDictType) -> set[BoardPosType]:
-        
-        attack_area = set() # store the attackable position 
-
-        # 4 directions 
-        directions = [
-                      (-1,  0), 
-            ( 0, -1),           ( 0,  1), 
-                      ( 1,  0), 
-        ]
-
-        for dir in directions:
-            for delta in range(1, len(ROW_VALUE_RANGE)):
-                delta_row, delta_col = dir[0] * delta, dir[1] * delta
-
-                valid, attack_pos = calc_position(self.get_pos(), delta_row, delta_col)
-
-                # out of bounds (attack_pos is not on the board)
-                if valid is False:
-                    break
-                # touch other chessmen
-                elif board[attack_pos[0]][attack_pos[1]] is not None:
-                    attack_area.add(attack_pos)
-                    break
-                else:
-                    attack_area.add(attack_pos)
-        return attack_area
+        return get_ray_attack_area(ROOK_RAY_TARGETS[POS_SQUARE[self.get_pos()]], board)
 
 class Bishop(BaseChessman):
+    __slots__ = ()
 
     def __init__(self, init_row: int, init_col: str, team: Team) -> None:
         super().__init__(init_row, init_col, team)
@@ -330,34 +246,10 @@ class Bishop(BaseChessman):
 
     @override
     def get_attack_area(self, board: BoardDictType) -> set[BoardPosType]:
-        
-        attack_area = set() # store the attackable position 
-
-        # 4 directions 
-        directions = [
-            (-1, -1),           (-1,  1), 
-             
-            ( 1, -1),           ( 1,  1)
-        ]
-
-        for dir in directions:
-            for delta in range(1, len(ROW_VALUE_RANGE)):
-                delta_row, delta_col = dir[0] * delta, dir[1] * delta
-
-                valid, attack_pos = calc_position(self.get_pos(), delta_row, delta_col)
-
-                # out of bounds (attack_pos is not on the board)
-                if valid is False:
-                    break
-                # touch other chessmen
-                elif board[attack_pos[0]][attack_pos[1]] is not None:
-                    attack_area.add(attack_pos)
-                    break
-                else:
-                    attack_area.add(attack_pos)
-        return attack_area
+        return get_ray_attack_area(BISHOP_RAY_TARGETS[POS_SQUARE[self.get_pos()]], board)
 
 class Knight(BaseChessman):
+    __slots__ = ()
 
     def __init__(self, init_row: int, init_col: str, team: Team) -> None:
         super().__init__(init_row, init_col, team)
@@ -386,36 +278,14 @@ class Knight(BaseChessman):
 
     @override
     def get_attack_area(self, board: BoardDictType) -> set[BoardPosType]:
-        
-        attack_area = set() # store the attackable position 
-
-        # 8 directions 
-        directions = [
-            ( 2,  1), ( 2, -1),
-            ( 1,  2), ( 1, -2), 
-            (-2,  1), (-2, -1),
-            (-1,  2), (-1, -2)
-        ]
-
-        for dir in directions:
-            delta_row, delta_col = dir[0], dir[1]
-
-            valid, attack_pos = calc_position(self.get_pos(), delta_row, delta_col)
-
-            # out of bounds (attack_pos is not on the board)
-            if valid is False:
-                continue
-
-            attack_area.add(attack_pos)
-    
-        return attack_area
+        return set(KNIGHT_TARGETS[POS_SQUARE[self.get_pos()]])
 
 class Pawn(BaseChessman):
+    __slots__ = ("__advance_direction",)
 
     def __init__(self, init_row: int, init_col: str, team: Team) -> None:
         super().__init__(init_row, init_col, team)
 
-        self.__en_passant = list()
         self.__advance_direction = 1 if self.get_team() == Team.WHITE else -1
 
     @override
@@ -428,30 +298,32 @@ class Pawn(BaseChessman):
 
         valid_moves = set()
 
+        square = POS_SQUARE[self.get_pos()]
+        forward = 8 * self.__advance_direction
+
         # the pawn has not moved yet: the pawn can go forward 2 cells 
         if not self.get_moved():
-            for delta in range(1, 3):
-                valid, next_pos = calc_position(self.get_pos(), delta * self.__advance_direction, 0)
+            next_square = square
+            for _ in range(2):
+                next_square += forward
+                if not 0 <= next_square < 64: break
 
-                if not valid or board[next_pos[0]][next_pos[1]] is not None: break
+                next_pos = SQUARE_POS[next_square]
+                if board[next_pos[0]][next_pos[1]] is not None: break
                 valid_moves.add(("Move", next_pos))
         # normal move: the pawn can only go forward 1 cell 
-        else:
-            valid, next_pos = calc_position(self.get_pos(), self.__advance_direction, 0)
+        elif 0 <= square + forward < 64:
+            next_pos = SQUARE_POS[square + forward]
 
-            if valid and board[next_pos[0]][next_pos[1]] is None: 
+            if board[next_pos[0]][next_pos[1]] is None: 
                 
                 if (self.get_team() == Team.WHITE and next_pos[0] == ROW_VALUE_RANGE[-1]) or \
                    (self.get_team() == Team.BLACK and next_pos[0] == ROW_VALUE_RANGE[0]):
                     valid_moves.add(("Promotion", next_pos))
                 else:
                     valid_moves.add(("Move", next_pos))
-                
 
-        
-        # add en_passant moves
-        for pos in self.get_en_passant():
-            valid_moves.add(("Attack", pos))
+        # the en passant moves are added by the board, which keeps the en passant square
 
         # add attack_area
         attack_area = self.get_attack_area(board)
@@ -466,27 +338,8 @@ class Pawn(BaseChessman):
 
     @override
     def get_attack_area(self, board: BoardDictType) -> set[BoardPosType]:
-        
-        attack_area = set() # store the attackable position 
-
-        directions = [ (self.__advance_direction, 1), (self.__advance_direction, -1)]
-
-        for dir in directions:
-            delta_row, delta_col = dir[0], dir[1]
-
-            valid, attack_pos = calc_position(self.get_pos(), delta_row, delta_col)
-
-            if valid is True:
-                attack_area.add(attack_pos)
-    
-        return attack_area
-
-    def clear_en_passant(self) -> None:
-        self.__en_passant.clear()
-
-    def add_en_passant(self, pos: BoardPosType) -> None:
-        self.__en_passant.append(pos)
+        return set(PAWN_ATTACK_TARGETS[self.__advance_direction][POS_SQUARE[self.get_pos()]])
 
-    def get_en_passant(self) -> List[BoardPosType]:
-        return self.__en_passant
+    def get_advance_direction(self) -> int:
+        return self.__advance_direction
     
\ No newline at end of file
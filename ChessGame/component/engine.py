@@ -0,0 +1,391 @@
+from __future__ import annotations
+import time
+from typing import Optional, Callable
+from .chessman import *
+from .board import *
+from .zobrist import *
+from .transposition import *
+from ..const import *
+from ..type_defs import *
+
+
+class SearchTimeout(Exception):
+    pass
+
+MATE_SCORE = 100000
+MATE_BOUND = MATE_SCORE - 1000  # the scores beyond it are mate scores
+QUIESCENCE_DEPTH = 4
+
+CHESSMAN_VALUES = {
+    "King":   0,
+    "Queen":  900,
+    "Rook":   500,
+    "Bishop": 330,
+    "Knight": 320,
+    "Pawn":   100,
+}
+
+PROMOTION_ORDER = (Queen, Knight, Rook, Bishop)
+
+# piece-square tables from the view of white, the first 8 values are row 8 ('a' to 'h'), the last 8 values are row 1
+PIECE_SQUARE_TABLES = {
+    "King": (
+        -30, -40, -40, -50, -50, -40, -40, -30,
+        -30, -40, -40, -50, -50, -40, -40, -30,
+        -30, -40, -40, -50, -50, -40, -40, -30,
+        -30, -40, -40, -50, -50, -40, -40, -30,
+        -20, -30, -30, -40, -40, -30, -30, -20,
+        -10, -20, -20, -20, -20, -20, -20, -10,
+         20,  20,   0,   0,   0,   0,  20,  20,
+         20,  30,  10,   0,   0,  10,  30,  20,
+    ),
+    "Queen": (
+        -20, -10, -10,  -5,  -5, -10, -10, -20,
+        -10,   0,   0,   0,   0,   0,   0, -10,
+        -10,   0,   5,   5,   5,   5,   0, -10,
+         -5,   0,   5,   5,   5,   5,   0,  -5,
+          0,   0,   5,   5,   5,   5,   0,  -5,
+        -10,   5,   5,   5,   5,   5,   0, -10,
+        -10,   0,   5,   0,   0,   0,   0, -10,
+        -20, -10, -10,  -5,  -5, -10, -10, -20,
+    ),
+    "Rook": (
+          0,   0,   0,   0,   0,   0,   0,   0,
+          5,  10,  10,  10,  10,  10,  10,   5,
+         -5,   0,   0,   0,   0,   0,   0,  -5,
+         -5,   0,   0,   0,   0,   0,   0,  -5,
+         -5,   0,   0,   0,   0,   0,   0,  -5,
+         -5,   0,   0,   0,   0,   0,   0,  -5,
+         -5,   0,   0,   0,   0,   0,   0,  -5,
+          0,   0,   0,   5,   5,   0,   0,   0,
+    ),
+    "Bishop": (
+        -20, -10, -10, -10, -10, -10, -10, -20,
+        -10,   0,   0,   0,   0,   0,   0, -10,
+        -10,   0,   5,  10,  10,   5,   0, -10,
+        -10,   5,   5,  10,  10,   5,   5, -10,
+        -10,   0,  10,  10,  10,  10,   0, -10,
+        -10,  10,  10,  10,  10,  10,  10, -10,
+        -10,   5,   0,   0,   0,   0,   5, -10,
+        -20, -10, -10, -10, -10, -10, -10, -20,
+    ),
+    "Knight": (
+        -50, -40, -30, -30, -30, -30, -40, -50,
+        -40, -20,   0,   0,   0,   0, -20, -40,
+        -30,   0,  10,  15,  15,  10,   0, -30,
+        -30,   5,  15,  20,  20,  15,   5, -30,
+        -30,   0,  15,  20,  20,  15,   0, -30,
+        -30,   5,  10,  15,  15,  10,   5, -30,
+        -40, -20,   0,   5,   5,   0, -20, -40,
+        -50, -40, -30, -30, -30, -30, -40, -50,
+    ),
+    "Pawn": (
+          0,   0,   0,   0,   0,   0,   0,   0,
+         50,  50,  50,  50,  50,  50,  50,  50,
+         10,  10,  20,  30,  30,  20,  10,  10,
+          5,   5,  10,  25,  25,  10,   5,   5,
+          0,   0,   0,  20,  20,   0,   0,   0,
+          5,  -5, -10,   0,   0, -10,  -5,   5,
+          5,  10,  10, -20, -20,  10,  10,   5,
+          0,   0,   0,   0,   0,   0,   0,   0,
+    ),
+}
+
+def evaluate_board(chess_board: ChessBoard, turn: Team) -> int:
+    # material + piece-square score, from the view of the turn
+
+    score = 0
+    for chessman in chess_board.get_chessmen(Team.WHITE):
+        row, col = chessman.get_pos()
+        type_name = type(chessman).__name__
+        score += CHESSMAN_VALUES[type_name] + PIECE_SQUARE_TABLES[type_name][(8 - row) * 8 + COL_VALUE_RANGE.index(col)]
+
+    for chessman in chess_board.get_chessmen(Team.BLACK):
+        row, col = chessman.get_pos()
+        type_name = type(chessman).__name__
+        score -= CHESSMAN_VALUES[type_name] + PIECE_SQUARE_TABLES[type_name][(row - 1) * 8 + COL_VALUE_RANGE.index(col)]
+
+    return score if turn == Team.WHITE else -score
+
+# the mate scores are stored relative to the node (not the root), so they stay right in other move orders
+def score_to_table(score: int, ply: int) -> int:
+    if score >  MATE_BOUND: return score + ply
+    if score < -MATE_BOUND: return score - ply
+    return score
+
+def score_from_table(score: int, ply: int) -> int:
+    if score >  MATE_BOUND: return score - ply
+    if score < -MATE_BOUND: return score + ply
+    return score
+
+class SearchEngine:
+    # iterative deepening alpha-beta (negamax) search with a time budget (seconds) and an optional node budget
+
+    def __init__(
+            self,
+            time_limit          : float = 0.1,
+            node_limit          : Optional[int] = None,
+            max_depth           : int = 32,
+            transposition_table : Optional[TranspositionTable] = None
+        ) -> None:
+
+        self.__time_limit = time_limit
+        self.__node_limit = node_limit
+        self.__max_depth = max_depth
+        # the table is kept between searches, the positions of the previous move are often reached again
+        self.__transposition_table = TranspositionTable() if transposition_table is None else transposition_table
+
+        self.__chess_board = None
+        self.__board_class = None
+        self.__deadline = 0.0
+        self.__stop_check = None
+        self.__nodes = 0
+        self.__depth = 0
+        self.__score = 0
+        self.__principal_variation = list()
+
+    def search(
+            self,
+            chess_board       : ChessBoard,
+            turn              : Team,
+            time_limit        : Optional[float] = None,
+            stop_check        : Optional[Callable[[], bool]] = None,
+            progress_callback : Optional[Callable[[SearchProgressType], None]] = None
+        ) -> Optional[SearchMoveType]:
+        # chess_board is searched in place with make_move/unmake_move, and is restored when the search returns
+        #   time_limit:        the time budget of this search (pondering has a longer one), the engine time limit when None
+        #   stop_check:        polled at every node, the search stops (and keeps the last finished depth) once it returns True
+        #   progress_callback: called after every finished depth
+
+        start_time = time.perf_counter()
+        self.__chess_board = chess_board
+        self.__board_class = type(chess_board)
+        self.__deadline = start_time + (self.__time_limit if time_limit is None else time_limit)
+        self.__stop_check = stop_check
+        self.__nodes = 0
+        self.__depth = 0
+        self.__score = 0
+        self.__principal_variation = list()
+
+        root_moves = self.__generate_moves(turn)
+        if len(root_moves) == 0: return None
+
+        # the first move is kept in case the budget runs out before depth 1 is finished
+        best_move = root_moves[0]
+        for depth in range(1, self.__max_depth + 1):
+            try:
+                score, move = self.__search_root(turn, depth, root_moves, best_move)
+            except SearchTimeout:
+                break
+
+            best_move, self.__score, self.__depth = move, score, depth
+            self.__principal_variation = self.__get_principal_variation(turn, depth)
+            if progress_callback is not None:
+                progress_callback((depth, score, self.__nodes, time.perf_counter() - start_time, self.__principal_variation))
+
+            # a forced mate has been found
+            if abs(score) >= MATE_SCORE - self.__max_depth: break
+
+        return best_move
+
+    def get_nodes(self) -> int:
+        return self.__nodes
+
+    def get_depth(self) -> int:
+        return self.__depth
+
+    def get_score(self) -> int:
+        return self.__score
+
+    def get_principal_variation(self) -> List[SearchMoveType]:
+        # the expected moves of both teams from the last finished depth, the first one is the best move
+        return self.__principal_variation
+
+    def get_transposition_table(self) -> TranspositionTable:
+        return self.__transposition_table
+
+    def __search_root(
+            self,
+            turn       : Team,
+            depth      : int,
+            root_moves : List[SearchMoveType],
+            prev_best  : SearchMoveType
+        ) -> Tuple[int, SearchMoveType]:
+
+        enemy_team = Team.BLACK if turn == Team.WHITE else Team.WHITE
+        alpha, beta = -MATE_SCORE - 1, MATE_SCORE + 1
+
+        # search the best move of the previous iteration first
+        ordered_moves = [prev_best] + [move for move in root_moves if move != prev_best]
+
+        best_move = prev_best
+        for move in ordered_moves:
+            undo = self.__make_move(move)
+            try:
+                score = -self.__alpha_beta(enemy_team, depth - 1, -beta, -alpha, 1)
+            finally:
+                self.__chess_board.unmake_move(undo)
+
+            if score > alpha:
+                alpha, best_move = score, move
+
+        root_key = self.__chess_board.get_hash() ^ turn_hash(turn)
+        self.__transposition_table.store(root_key, depth, score_to_table(alpha, 0), Bound.EXACT, best_move)
+        return alpha, best_move
+
+    def __alpha_beta(self, turn: Team, depth: int, alpha: int, beta: int, ply: int) -> int:
+
+        self.__count_node()
+
+        if depth <= 0:
+            return self.__quiescence(turn, alpha, beta, QUIESCENCE_DEPTH)
+
+        key = self.__chess_board.get_hash() ^ turn_hash(turn)
+        entry = self.__transposition_table.probe(key)
+        hash_move = None
+
+        if entry is not None:
+            _, entry_depth, entry_score, bound, hash_move = entry
+            entry_score = score_from_table(entry_score, ply)
+
+            if entry_depth >= depth:
+                if bound == Bound.EXACT:                           return entry_score
+                if bound == Bound.LOWER and entry_score >= beta:   return beta
+                if bound == Bound.UPPER and entry_score <= alpha:  return alpha
+
+        original_alpha = alpha
+        best_move = None
+        enemy_team = Team.BLACK if turn == Team.WHITE else Team.WHITE
+
+        # the cached best move is searched before generating the other moves, a cutoff skips the move generation
+        if hash_move is not None and self.__is_valid_move(turn, hash_move):
+            score = self.__search_move(hash_move, enemy_team, depth, alpha, beta, ply)
+
+            if score >= beta:
+                self.__transposition_table.store(key, depth, score_to_table(beta, ply), Bound.LOWER, hash_move)
+                return beta
+            if score > alpha: alpha = score
+            best_move = hash_move
+        else:
+            hash_move = None
+
+        moves = self.__generate_moves(turn)
+        if len(moves) == 0:
+            if self.__board_class.is_board_in_check(self.__chess_board, turn): return -MATE_SCORE + ply
+            else:                                                               return 0 # stalemate
+
+        for move in moves:
+            if move == hash_move: continue
+            score = self.__search_move(move, enemy_team, depth, alpha, beta, ply)
+
+            if score >= beta:
+                self.__transposition_table.store(key, depth, score_to_table(beta, ply), Bound.LOWER, move)
+                return beta
+            if score > alpha:
+                alpha, best_move = score, move
+
+        bound = Bound.EXACT if alpha > original_alpha else Bound.UPPER
+        self.__transposition_table.store(key, depth, score_to_table(alpha, ply), bound, best_move)
+        return alpha
+
+    def __search_move(self, move: SearchMoveType, enemy_team: Team, depth: int, alpha: int, beta: int, ply: int) -> int:
+
+        undo = self.__make_move(move)
+        try:
+            return -self.__alpha_beta(enemy_team, depth - 1, -beta, -alpha, ply + 1)
+        finally:
+            self.__chess_board.unmake_move(undo)
+
+    def __is_valid_move(self, turn: Team, move: SearchMoveType) -> bool:
+        # a cached move may come from another position with the same hash
+
+        source_pos, dest_pos, promotion_type = move
+        chessman = self.__chess_board.get_chessman(source_pos[0], source_pos[1])
+        if chessman is None or chessman.get_team() != turn: return False
+
+        is_promotion = isinstance(chessman, Pawn) and dest_pos[0] in (ROW_VALUE_RANGE[0], ROW_VALUE_RANGE[-1])
+        if is_promotion != (promotion_type is not None): return False
+
+        return any(pos == dest_pos for _, pos in self.__chess_board.get_valid_moves(chessman))
+
+    def __get_principal_variation(self, turn: Team, max_length: int) -> List[SearchMoveType]:
+        # follow the best moves of the transposition table from the root, a repeated position ends the line
+
+        principal_variation, undos, seen_keys = list(), list(), set()
+        for _ in range(max_length):
+            key = self.__chess_board.get_hash() ^ turn_hash(turn)
+            entry = self.__transposition_table.probe(key)
+            if key in seen_keys or entry is None or entry[4] is None or not self.__is_valid_move(turn, entry[4]): break
+
+            seen_keys.add(key)
+            principal_variation.append(entry[4])
+            undos.append(self.__make_move(entry[4]))
+            turn = Team.BLACK if turn == Team.WHITE else Team.WHITE
+
+        for undo in reversed(undos):
+            self.__chess_board.unmake_move(undo)
+        return principal_variation
+
+    def __quiescence(self, turn: Team, alpha: int, beta: int, depth: int) -> int:
+        # only the captures are searched, so the evaluation is not taken in the middle of an exchange
+
+        self.__count_node()
+
+        stand_pat = evaluate_board(self.__chess_board, turn)
+        if stand_pat >= beta: return beta
+        if stand_pat > alpha: alpha = stand_pat
+        if depth == 0:        return alpha
+
+        enemy_team = Team.BLACK if turn == Team.WHITE else Team.WHITE
+        for move in self.__generate_moves(turn, captures_only = True):
+            undo = self.__make_move(move)
+            try:
+                score = -self.__quiescence(enemy_team, -beta, -alpha, depth - 1)
+            finally:
+                self.__chess_board.unmake_move(undo)
+
+            if score >= beta: return beta
+            if score > alpha: alpha = score
+        return alpha
+
+    def __generate_moves(self, turn: Team, captures_only: bool = False) -> List[SearchMoveType]:
+        # the legal moves of the turn, captures (most valuable victim first) and promotions are ordered first
+
+        scored_moves = list()
+        for source_pos, chessman_moves in self.__chess_board.generate_legal_moves(turn).items():
+            chessman = self.__chess_board.get_chessman(source_pos[0], source_pos[1])
+            attacker_value = CHESSMAN_VALUES[type(chessman).__name__]
+
+            for action, pos in chessman_moves:
+                if captures_only and action != "Attack": continue
+
+                if action == "Attack":
+                    victim = self.__chess_board.get_chessman(pos[0], pos[1])
+                    victim_value = CHESSMAN_VALUES["Pawn"] if victim is None else CHESSMAN_VALUES[type(victim).__name__]  # en passant
+                    order = 10 * victim_value - attacker_value
+                else:
+                    order = -10000
+
+                if isinstance(chessman, Pawn) and pos[0] in (ROW_VALUE_RANGE[0], ROW_VALUE_RANGE[-1]):
+                    for i, promotion_type in enumerate(PROMOTION_ORDER):
+                        scored_moves.append((order + CHESSMAN_VALUES[promotion_type.__name__] * 10 - i, (source_pos, pos, promotion_type)))
+                else:
+                    scored_moves.append((order, (source_pos, pos, None)))
+
+        scored_moves.sort(key = lambda scored_move: scored_move[0], reverse = True)
+        return [move for _, move in scored_moves]
+
+    def __make_move(self, move: SearchMoveType) -> UndoType:
+        source_pos, dest_pos, promotion_type = move
+        chessman = self.__chess_board.get_chessman(source_pos[0], source_pos[1])
+        return self.__chess_board.make_move(chessman, dest_pos, promotion_type)
+
+    def __count_node(self) -> None:
+
+        self.__nodes += 1
+        if self.__node_limit is not None and self.__nodes > self.__node_limit:
+            raise SearchTimeout
+        if time.perf_counter() > self.__deadline:
+            raise SearchTimeout
+        if self.__stop_check is not None and self.__stop_check():
+            raise SearchTimeout
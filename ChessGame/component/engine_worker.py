@@ -0,0 +1,144 @@
+from __future__ import annotations
+import multiprocessing
+from typing import Optional
+from .chessman import *
+from .board import *
+from .bitboard import *
+from .game import ChessGame
+from .engine import *
+from ..const import *
+from ..type_defs import *
+
+# The engine runs in a worker process, so the search has its own interpreter (and core) instead of sharing the GIL with the GUI.
+# The positions are sent as FEN strings, the messages of the pipe are:
+#   to the worker:   ("search", search_id, fen, None) / ("ponder", search_id, fen, expected_move) / ("quit",)
+#   from the worker: ("progress", search_id, progress) / ("best_move", search_id, best_move, principal_variation)
+# A search stops cooperatively once the shared stop id reaches its search id, the ids only increase,
+# so a stop can never cancel a later search.
+
+
+def run_search_worker(
+        connection        : multiprocessing.connection.Connection,
+        stop_id           : multiprocessing.sharedctypes.Synchronized,
+        time_limit        : float,
+        node_limit        : Optional[int],
+        use_bitboard      : bool,
+        ponder_time_limit : float
+    ) -> None:
+
+    # the transposition table of the engine is kept between the searches, which is what pondering fills
+    engine = SearchEngine(time_limit = time_limit, node_limit = node_limit)
+    board_class = BitBoard if use_bitboard else ChessBoard
+
+    while True:
+        command = connection.recv()
+        if command[0] == "quit": break
+
+        kind, search_id, fen, expected_move = command
+        if stop_id.value >= search_id:
+            connection.send(("best_move", search_id, None, list()))
+            continue
+
+        chess_board = board_class()
+        turn = chess_board.from_fen(fen)
+        if kind == "ponder":
+            # search the position after the expected move of the opponent
+            source_pos, dest_pos, promotion_type = expected_move
+            chess_board.make_move(chess_board.get_chessman(source_pos[0], source_pos[1]), dest_pos, promotion_type)
+            turn = Team.BLACK if turn == Team.WHITE else Team.WHITE
+
+        best_move = engine.search(
+            chess_board, turn,
+            time_limit        = ponder_time_limit if kind == "ponder" else None,
+            stop_check        = lambda: stop_id.value >= search_id,
+            progress_callback = lambda progress: connection.send(("progress", search_id, progress))
+        )
+        connection.send(("best_move", search_id, best_move, engine.get_principal_variation()))
+
+    connection.close()
+
+class EngineWorker:
+    # the GUI side of the worker process, every method returns at once:
+    #   search: search the game position within the time limit, poll returns the best move when it is finished
+    #   ponder: search the position after the expected move of the opponent until the next search, stop,
+    #           or ponder_time_limit, so an idle player turn does not keep a core busy
+
+    def __init__(
+            self, 
+            time_limit        : float = 0.1, 
+            node_limit        : Optional[int] = None, 
+            use_bitboard      : bool = False, 
+            ponder_time_limit : float = 10.0
+        ) -> None:
+
+        # a spawned process does not inherit the threads and the display of the GUI process
+        context = multiprocessing.get_context("spawn")
+        self.__connection, worker_connection = context.Pipe()
+        self.__stop_id = context.Value('q', 0, lock = False)
+        self.__process = context.Process(
+            target = run_search_worker,
+            args   = (worker_connection, self.__stop_id, time_limit, node_limit, use_bitboard, ponder_time_limit),
+            daemon = True
+        )
+        self.__process.start()
+        worker_connection.close()
+
+        self.__search_id = 0
+        self.__searching = False            # a timed search is running, a running ponder is not counted
+        self.__progress = None
+        self.__principal_variation = list()
+
+    def search(self, chess_game: ChessGame) -> None:
+        self.__start("search", chess_game.to_fen(), None)
+        self.__searching = True
+
+    def ponder(self, chess_game: ChessGame, expected_move: SearchMoveType) -> None:
+        self.__start("ponder", chess_game.to_fen(), expected_move)
+        self.__searching = False
+
+    def stop(self) -> None:
+        self.__stop_id.value = self.__search_id
+        self.__searching = False
+
+    def poll(self) -> Optional[SearchMoveType]:
+        # read the messages of the worker without blocking, return the best move once the timed search is finished
+
+        best_move = None
+        while self.__connection.poll():
+            message = self.__connection.recv()
+            # the messages of the stopped searches are dropped
+            if message[1] != self.__search_id: continue
+
+            if message[0] == "progress":
+                self.__progress = message[2]
+            elif message[0] == "best_move" and self.__searching:
+                best_move, self.__principal_variation = message[2], message[3]
+                self.__searching = False
+        return best_move
+
+    def is_searching(self) -> bool:
+        return self.__searching
+
+    def get_progress(self) -> Optional[SearchProgressType]:
+        # the last finished depth of the current search (or ponder), None before the first one
+        return self.__progress
+
+    def get_expected_move(self) -> Optional[SearchMoveType]:
+        # the expected reply of the opponent after the last best move, from its principal variation
+        return self.__principal_variation[1] if len(self.__principal_variation) > 1 else None
+
+    def close(self) -> None:
+
+        self.stop()
+        self.__connection.send(("quit",))
+        self.__process.join(timeout = 1.0)
+        if self.__process.is_alive(): self.__process.terminate()
+        self.__connection.close()
+
+    def __start(self, kind: str, fen: str, expected_move: Optional[SearchMoveType]) -> None:
+
+        # the running search (or ponder) is stopped first
+        self.stop()
+        self.__search_id += 1
+        self.__progress = None
+        self.__connection.send((kind, self.__search_id, fen, expected_move))
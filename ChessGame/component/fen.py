@@ -0,0 +1,146 @@
+from __future__ import annotations
+from typing import Optional
+from .chessman import *
+from ..const import *
+from ..type_defs import *
+
+
+START_FEN = "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1"
+
+FEN_CHESSMAN_TYPES = {'k': King, 'q': Queen, 'r': Rook, 'b': Bishop, 'n': Knight, 'p': Pawn}
+
+# castling letter => (row, rook_col)
+FEN_CASTLING_ROOKS = {'K': (1, 'h'), 'Q': (1, 'a'), 'k': (8, 'h'), 'q': (8, 'a')}
+
+def parse_fen(fen: str) -> Tuple[List[BaseChessman], Team, Optional[BoardPosType], int, int]:
+    # (chessmen, turn, en_passant_pos, halfmove_clock, fullmove_number)
+    # the moved flags of the kings and the rooks follow the castling field (the board reads its castling rights from them),
+    # and a pawn has moved when it is not on its start row
+
+    fields = fen.split()
+    if len(fields) == 4: fields += ['0', '1']
+    if len(fields) != 6:
+        raise ValueError(f"Fail to parse the FEN string \"{fen}\"")
+
+    placement, turn_field, castling_field, en_passant_field, halfmove_field, fullmove_field = fields
+
+    rows = placement.split('/')
+    if len(rows) != len(ROW_VALUE_RANGE):
+        raise ValueError(f"Fail to parse the piece placement \"{placement}\"")
+
+    if castling_field != '-' and any(letter not in FEN_CASTLING_ROOKS for letter in castling_field):
+        raise ValueError(f"Fail to parse the castling rights \"{castling_field}\"")
+
+    chessmen = list()
+    king_count = {Team.WHITE: 0, Team.BLACK: 0}
+    # the placement starts from the 8th row
+    for row, row_field in zip(reversed(ROW_VALUE_RANGE), rows):
+        col_idx = 0
+        for letter in row_field:
+            if letter.isdigit():
+                col_idx += int(letter)
+                continue
+            if letter.lower() not in FEN_CHESSMAN_TYPES or col_idx >= len(COL_VALUE_RANGE):
+                raise ValueError(f"Fail to parse the row \"{row_field}\" of the piece placement")
+
+            team = Team.WHITE if letter.isupper() else Team.BLACK
+            chessman_type = FEN_CHESSMAN_TYPES[letter.lower()]
+            chessman = chessman_type(row, COL_VALUE_RANGE[col_idx], team)
+            col_idx += 1
+
+            if chessman_type is Pawn:
+                start_row = 2 if team == Team.WHITE else 7
+                chessman.set_moved(row != start_row)
+            elif chessman_type is King:
+                king_count[team] += 1
+                king_pos = (1, 'e') if team == Team.WHITE else (8, 'e')
+                king_letters = "KQ" if team == Team.WHITE else "kq"
+                has_castling = any(king_letter in castling_field for king_letter in king_letters)
+                chessman.set_moved(not (chessman.get_pos() == king_pos and has_castling))
+            elif chessman_type is Rook:
+                chessman.set_moved(not any(
+                    FEN_CASTLING_ROOKS[rook_letter] == chessman.get_pos() for rook_letter in castling_field if rook_letter != '-'
+                ))
+            chessmen.append(chessman)
+
+        if col_idx != len(COL_VALUE_RANGE):
+            raise ValueError(f"Fail to parse the row \"{row_field}\" of the piece placement")
+
+    if king_count[Team.WHITE] != 1 or king_count[Team.BLACK] != 1:
+        raise ValueError(f"Fail to parse the piece placement \"{placement}\" without one king per team")
+
+    if turn_field not in ('w', 'b'):
+        raise ValueError(f"Fail to parse the active color \"{turn_field}\"")
+    turn = Team.WHITE if turn_field == 'w' else Team.BLACK
+
+    en_passant_pos = None
+    if en_passant_field != '-':
+        if len(en_passant_field) != 2 or en_passant_field[0] not in COL_VALUE_RANGE or en_passant_field[1] not in ('3', '6'):
+            raise ValueError(f"Fail to parse the en passant square \"{en_passant_field}\"")
+        en_passant_pos = (int(en_passant_field[1]), en_passant_field[0])
+
+    if not (halfmove_field.isdigit() and fullmove_field.isdigit()):
+        raise ValueError(f"Fail to parse the move counters \"{halfmove_field} {fullmove_field}\"")
+
+    return (chessmen, turn, en_passant_pos, int(halfmove_field), int(fullmove_field))
+
+def get_en_passant_pawns(chess_board: ChessBoard, en_passant_pos: BoardPosType) -> List[Pawn]:
+    # the enemy pawns beside the pawn which has just gone forward 2 cells through en_passant_pos,
+    # the board still checks whether their en passant captures are legal
+
+    pushed_row = en_passant_pos[0] + 1 if en_passant_pos[0] == 3 else en_passant_pos[0] - 1
+    pushed_pawn = chess_board.get_chessman(pushed_row, en_passant_pos[1])
+    if not isinstance(pushed_pawn, Pawn): return list()
+
+    en_passant_pawns = list()
+    col_idx = COL_VALUE_RANGE.index(en_passant_pos[1])
+    for delta_col in (-1, 1):
+        if not 0 <= col_idx + delta_col < len(COL_VALUE_RANGE): continue
+
+        neighbor_chessman = chess_board.get_chessman(pushed_row, COL_VALUE_RANGE[col_idx + delta_col])
+        if isinstance(neighbor_chessman, Pawn) and neighbor_chessman.get_team() != pushed_pawn.get_team():
+            en_passant_pawns.append(neighbor_chessman)
+    return en_passant_pawns
+
+def build_fen(
+        chess_board     : ChessBoard,
+        turn            : Team,
+        fullmove_number : int = 1
+    ) -> str:
+    # the inverse of parse_fen, the en passant square, the castling rights and the halfmove clock are kept by the board,
+    # the en passant square is only kept when a pawn can take en passant legally
+
+    chessman_letters = {chessman_type: letter for letter, chessman_type in FEN_CHESSMAN_TYPES.items()}
+
+    row_fields = list()
+    for row in reversed(ROW_VALUE_RANGE):
+        row_field, empty_count = "", 0
+        for col in COL_VALUE_RANGE:
+            chessman = chess_board.get_chessman(row, col)
+            if chessman is None:
+                empty_count += 1
+                continue
+
+            if empty_count > 0: row_field += str(empty_count)
+            empty_count = 0
+
+            letter = chessman_letters[type(chessman)]
+            row_field += letter.upper() if chessman.get_team() == Team.WHITE else letter
+
+        if empty_count > 0: row_field += str(empty_count)
+        row_fields.append(row_field)
+
+    # (white_long_castling, white_short_castling, black_long_castling, black_short_castling)
+    castling_rights = chess_board.get_castling_rights()
+    castling_field = "".join(letter for letter, has_right in zip("QKqk", castling_rights) if has_right)
+    castling_field = "".join(sorted(castling_field, key = "KQkq".index)) or '-'
+    en_passant_pos = chess_board.get_en_passant_pos()
+
+    return " ".join((
+        "/".join(row_fields),
+        'w' if turn == Team.WHITE else 'b',
+        castling_field,
+        '-' if en_passant_pos is None else f"{en_passant_pos[1]}{en_passant_pos[0]}",
+        str(chess_board.get_halfmove_clock()),
+        str(fullmove_number)
+    ))
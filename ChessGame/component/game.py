@@ -2,6 +2,8 @@ from __future__ import annotations
 from enum import Enum, auto
 from typing import Optional
 from .board import *
+from .bitboard import *
+from .zobrist import *
 from .chessman import *
 from ..const import *
 from ..type_defs import *
@@ -12,6 +14,39 @@ class GameState(Enum):
     NEXT_TURN = auto()
     PROMOTION = auto()
 
+class DrawReason(Enum):
+    STALEMATE             = auto()
+    THREEFOLD_REPETITION  = auto()
+    FIFTY_MOVE_RULE       = auto()
+    INSUFFICIENT_MATERIAL = auto()
+
+# the (white, black) materials which can't checkmate, see MaterialType
+ONLY_KING            = (1, 0, 0, 0, 0, 0, 0)
+ONLY_KING_AND_KNIGHT = (1, 0, 0, 0, 0, 1, 0)
+ONLY_KING_AND_BISHOP = ((1, 0, 0, 1, 0, 0, 0), (1, 0, 0, 0, 1, 0, 0))
+INSUFFICIENT_MATERIALS = {
+    # 王 對 王 (K vs K)
+    (ONLY_KING, ONLY_KING), 
+    # 王和騎士 對 王 (K + N vs K)
+    (ONLY_KING_AND_KNIGHT, ONLY_KING), 
+    (ONLY_KING, ONLY_KING_AND_KNIGHT), 
+    # 王和主教 對 王 (K + B vs K)
+    *((bishop_material, ONLY_KING) for bishop_material in ONLY_KING_AND_BISHOP), 
+    *((ONLY_KING, bishop_material) for bishop_material in ONLY_KING_AND_BISHOP), 
+    # 王和主教 對 王和主教，且雙方象位於同一色格子內 (K + B vs K + B, and the two bishops are on the same color cells)
+    *((bishop_material, bishop_material) for bishop_material in ONLY_KING_AND_BISHOP)
+}
+
+# the chessman letter of the long algebraic notation
+NOTATION_ABBR = {
+    "King":   'K',
+    "Queen":  'Q',
+    "Rook":   'R',
+    "Bishop": 'B',
+    "Knight": 'N',
+    "Pawn":   '', # 'P' or ''
+}
+
 class Record:
     
     def __init__(self) -> None:
@@ -19,8 +54,12 @@ class Record:
         self.__move_lst = list()        # (team, chessman_type_name, case, source_pos, dest_pos, killed_enemy_pos, is_check, is_checkmate)
         self.__promotion_info = dict()  # key: move_lst_index, value: chessman_type_name
 
+        # the notations are kept up to date with the moves, the version counts their changes
+        self.__notations = dict()       # key: round, value: {team: notation}
+        self.__version = 0
+
         # for threefold repetition rule
-        self.__board_lst = list()       # (board_representation, white_long_castling, white_short_castling, black_long_castling, black_short_castling)
+        self.__board_count = dict()     # key: board hash (with the side to move), value: count
         self.__repetition_count = 0      
 
     def add_move(
@@ -39,108 +78,75 @@ class Record:
             source_pos, dest_pos    , killed_enemy_pos  , 
             in_check  , is_checkmate
         ))
+        self.__update_notation(len(self.__move_lst) - 1)
 
     def add_promotion_info(self, chessman_type_name: str) -> None:
         self.__promotion_info[len(self.__move_lst) - 1] = chessman_type_name
+        self.__update_notation(len(self.__move_lst) - 1)
 
-    def add_board(self, chess_board: ChessBoard) -> None:
-        
-        # white_long_castling, white_short_castling, black_long_castling, black_short_castling)
-        long_short = [False, False, False, False]
-        
-        for i, _ in enumerate((Team.WHITE, Team.BLACK)):
-            row = (i * (-1) + len(ROW_VALUE_RANGE)) % len(ROW_VALUE_RANGE) + 1
-            
-            king_chessman, rook_chessman = chess_board.get_chessman(row, 'e'), chess_board.get_chessman(row, 'a')
-            if isinstance(king_chessman, King) and isinstance(rook_chessman, Rook) and \
-               king_chessman.get_moved() == False and rook_chessman.get_moved() == False:
-                long_short[2 * i] = True
-            
-            king_chessman, rook_chessman = chess_board.get_chessman(row, 'e'), chess_board.get_chessman(row, 'h')
-            if isinstance(king_chessman, King) and isinstance(rook_chessman, Rook) and \
-               king_chessman.get_moved() == False and rook_chessman.get_moved() == False:
-                long_short[2 * i + 1] = True
-
-        board_str = ""
-
-        name_abbr = {
-            "King":   'K',
-            "Queen":  'Q',
-            "Rook":   'R',
-            "Bishop": 'B',
-            "Knight": 'N',
-            "Pawn":   '', # 'P' or ''
-        }
-        
-        for row in ROW_VALUE_RANGE:
-            for col in COL_VALUE_RANGE:
-                chessman = chess_board.get_chessman(row, col)
-                
-                if chessman is None:                 board_str += "n,"
-                elif not isinstance(chessman, Pawn): board_str += f"{name_abbr[type(chessman).__name__]},"
-                else:
-                    board_str += 'P'
-                    for pos in chessman.get_en_passant():
-                        board_str += f"({pos[0]}{pos[1]})"
-                    board_str += ','
-        board_representation = (board_str, *long_short)
-        self.__repetition_count = max(self.__repetition_count, self.__board_lst.count(board_representation) + 1)
-        self.__board_lst.append(board_representation)
+    def add_board(self, chess_board: ChessBoard, turn: Team) -> None:
+
+        # the board hash covers the chessmen, the castling rights and the en passant square
+        board_hash = chess_board.get_hash() ^ turn_hash(turn)
+        board_count = self.__board_count.get(board_hash, 0) + 1
+        self.__board_count[board_hash] = board_count
+        self.__repetition_count = max(self.__repetition_count, board_count)
 
     # long algebraic notation
     def get_chess_notation(self) -> Tuple[int, NotationType]:
+        # the notations are shared with the record, the callers must not modify them
+        return (len(self.__move_lst) + 1) // 2, self.__notations
 
-        name_abbr = {
-            "King":   'K',
-            "Queen":  'Q',
-            "Rook":   'R',
-            "Bishop": 'B',
-            "Knight": 'N',
-            "Pawn":   '', # 'P' or ''
-        }
+    def get_version(self) -> int:
+        return self.__version
 
-        round = 0
-        notations = dict()
+    def get_repetitions(self) -> int:
+        return self.__repetition_count
+
+    def __update_notation(self, index: int) -> None:
+
+        team, case, chessman_type_name, source_pos, dest_pos, killed_enemy_pos, in_check, is_checkmate = self.__move_lst[index]
         pos_to_str = lambda pos: pos[1] + str(pos[0])
+        source_pos_str, dest_pos_str = pos_to_str(source_pos), pos_to_str(dest_pos)
 
-        for i, move in enumerate(self.__move_lst):
-            team, case, chessman_type_name, source_pos, dest_pos, killed_enemy_pos, in_check, is_checkmate = move
-            source_pos_str, dest_pos_str = pos_to_str(source_pos), pos_to_str(dest_pos)
-
-            round = (i // 2) + 1
-
-            notation = name_abbr[chessman_type_name]
-            
-            if case == SpecialMove.EN_PASSANT:
-                notation += source_pos_str + 'x' + dest_pos_str + " e.p."
-            elif case == SpecialMove.LONG_CASTLING:
-                notation = "0-0-0"
-            elif case == SpecialMove.SHORT_CASTLING:
-                notation = "0-0"
-            elif killed_enemy_pos is None:
-                notation += source_pos_str + dest_pos_str
-            else:   # killed_enemy_pos is not None
-                notation += source_pos_str + 'x' + dest_pos_str
-
-            if case == SpecialMove.PROMOTION and i in self.__promotion_info:
-                notation += name_abbr[self.__promotion_info[i]]
-
-            if is_checkmate:
-                notation += '#'
-            elif in_check:
-                notation += '+'
-            
-            notations.setdefault(round, dict())
-            notations[round][team] = notation
-        return round, notations
+        notation = NOTATION_ABBR[chessman_type_name]
 
-    def get_repetitions(self) -> int:
-        return self.__repetition_count
+        if case == SpecialMove.EN_PASSANT:
+            notation += source_pos_str + 'x' + dest_pos_str + " e.p."
+        elif case == SpecialMove.LONG_CASTLING:
+            notation = "0-0-0"
+        elif case == SpecialMove.SHORT_CASTLING:
+            notation = "0-0"
+        elif killed_enemy_pos is None:
+            notation += source_pos_str + dest_pos_str
+        else:   # killed_enemy_pos is not None
+            notation += source_pos_str + 'x' + dest_pos_str
+
+        if case == SpecialMove.PROMOTION and index in self.__promotion_info:
+            notation += NOTATION_ABBR[self.__promotion_info[index]]
+
+        if is_checkmate:
+            notation += '#'
+        elif in_check:
+            notation += '+'
+
+        self.__notations.setdefault((index // 2) + 1, dict())[team] = notation
+        self.__version += 1
+
+    def get_moves(self) -> List[SearchMoveType]:
+        # the recorded moves in the form of the search engine
+
+        promotion_types = {Queen.__name__: Queen, Rook.__name__: Rook, Bishop.__name__: Bishop, Knight.__name__: Knight}
+        return [
+            (move[3], move[4], promotion_types.get(self.__promotion_info.get(i)))
+            for i, move in enumerate(self.__move_lst)
+        ]
 
 class ChessGame: 
 
-    def __init__(self) -> None:
-        self.__chess_board = ChessBoard()
+    def __init__(self, use_bitboard: bool = False) -> None:
+        self.__board_class = BitBoard if use_bitboard else ChessBoard
+        self.__chess_board = self.__board_class()
         self.__current_turn = Team.WHITE
         self.__dead_white_count = dict()
         self.__dead_black_count = dict()
@@ -151,12 +157,9 @@ class ChessGame:
         self.__in_check = False
         self.__checkmate = False
         self.__draw = False
-        self.__rule_50_counter = 0
-
-        self.__round_record = {
-            "Pawn Move": False,
-            "Chessman Killed": False
-        }
+        self.__draw_reason = None
+        self.__fullmove_number = 1
+        self.__start_fen = None         # None: the standard start position
 
         for chessman_type_name in CHESSMAN_TYPE_NAMES:
             self.__dead_white_count[chessman_type_name] = 0
@@ -166,20 +169,59 @@ class ChessGame:
 
     def next_turn(self) -> None:
 
-        self.__chess_board.refresh_en_passant(self.get_current_turn())
         self.__current_turn = Team.BLACK if self.get_current_turn() == Team.WHITE else Team.WHITE
 
-        # check round_info
-        if self.get_current_turn() == Team.WHITE:
-            if self.__round_record["Pawn Move"] is False and self.__round_record["Chessman Killed"] is False:
-                self.__rule_50_counter += 1
-            else:
-                self.__rule_50_counter = 0
-            self.__round_record = {
-                "Pawn Move": False,
-                "Chessman Killed": False
-            }
+        # the halfmove clock of the 50-move rule is kept by the board
+        if self.get_current_turn() == Team.WHITE: self.__fullmove_number += 1
         
+    def from_fen(self, fen: str) -> None:
+        # restart the game from the position of the FEN string
+
+        self.__current_turn = self.__chess_board.from_fen(fen)
+        self.__start_fen = fen
+        _, _, _, _, fullmove_number = parse_fen(fen)
+
+        # the missing chessmen of the start position are counted as dead (a promoted pawn is not traced back)
+        self.__dead_white_count = dict(START_CHESSMAN_COUNT)
+        self.__dead_black_count = dict(START_CHESSMAN_COUNT)
+        for team, dead_count in zip((Team.WHITE, Team.BLACK), (self.__dead_white_count, self.__dead_black_count)):
+            for chessman in self.get_chessmen(team):
+                dead_count[type(chessman).__name__] = max(0, dead_count[type(chessman).__name__] - 1)
+
+        self.__record = Record()
+        self.__game_end = False
+        self.__winner = None
+        self.__fullmove_number = fullmove_number
+
+        self.record_board()
+        self.update_in_check()
+        self.update_checkmate()
+        self.update_draw()
+
+    def to_fen(self) -> str:
+        return self.__chess_board.to_fen(self.__current_turn, self.__fullmove_number)
+
+    def get_start_fen(self) -> Optional[str]:
+        return self.__start_fen
+
+    def play_move(self, move: SearchMoveType) -> None:
+        # the same steps as a turn of the GUI, for the headless callers (simulation, PGN replay)
+
+        source_pos, dest_pos, promotion_type = move
+        target_chessman = self.get_chessman(source_pos[0], source_pos[1])
+        game_state, _ = self.chessman_move(target_chessman, dest_pos)
+
+        if game_state == GameState.PROMOTION:
+            promotion_type = Queen if promotion_type is None else promotion_type
+            self.promotion(target_chessman, promotion_type)
+            self.record_promotion_info(promotion_type.__name__)
+
+        self.next_turn()
+        self.record_board()
+        self.update_in_check()
+        self.update_checkmate()
+        self.update_draw()
+
     def get_current_turn(self) -> Team:
         return self.__current_turn
 
@@ -189,8 +231,14 @@ class ChessGame:
     def get_chessman(self, row: int, col: str) -> Optional[BaseChessman]:
         return self.__chess_board.get_chessman(row, col)
 
+    def get_chessmen(self, team: Team) -> Tuple[BaseChessman, ...]:
+        return self.__chess_board.get_chessmen(team)
+
     def get_entire_board(self) -> BoardDictType:
         return self.__chess_board.get_entire_board()
+
+    def get_chess_board(self) -> ChessBoard:
+        return self.__chess_board
     
     def get_winner(self) -> Optional[Team]:
         return self.__winner
@@ -216,6 +264,9 @@ class ChessGame:
     def get_draw(self) -> bool:
         return self.__draw
 
+    def get_draw_reason(self) -> Optional[DrawReason]:
+        return self.__draw_reason
+
     def promotion(
             self, 
             target_pawn       : Pawn, 
@@ -232,13 +283,10 @@ class ChessGame:
         
         source_pos = target_chessman.get_pos()
         case, killed_enemy = self.__chess_board.chessman_move(target_chessman, dest_pos)
-        
-        if isinstance(target_chessman, Pawn): self.__round_record["Pawn Move"] = True
 
         ret_state = GameState.NEXT_TURN
 
         if killed_enemy is not None:
-            self.__round_record["Chessman Killed"] = True
             if killed_enemy.get_team() == Team.WHITE: self.__dead_white_count[f"{type(killed_enemy).__name__}"] += 1
             else:                                     self.__dead_black_count[f"{type(killed_enemy).__name__}"] += 1
 
@@ -248,12 +296,9 @@ class ChessGame:
                 else:                                       self.__winner = Team.WHITE
                 ret_state = GameState.END
 
+        # the board has moved the rook of castling
         if case == SpecialMove.PROMOTION:
             ret_state = GameState.PROMOTION
-        elif case == SpecialMove.LONG_CASTLING:
-            _, _ = self.__chess_board.chessman_move(self.get_chessman(dest_pos[0], 'a'), (dest_pos[0], 'd'))
-        elif case == SpecialMove.SHORT_CASTLING:
-            _, _ = self.__chess_board.chessman_move(self.get_chessman(dest_pos[0], 'h'), (dest_pos[0], 'f'))
 
         enemy_team = Team.BLACK if self.get_current_turn() == Team.WHITE else Team.WHITE
         self.record_move(
@@ -263,8 +308,8 @@ class ChessGame:
             source_pos, 
             dest_pos, 
             killed_enemy_pos = None if killed_enemy is None else killed_enemy.get_pos(),
-            in_check = ChessBoard.is_board_in_check(self.__chess_board, enemy_team),
-            is_checkmate = ChessBoard.is_board_checkmate(self.__chess_board, enemy_team)
+            in_check = self.__board_class.is_board_in_check(self.__chess_board, enemy_team),
+            is_checkmate = self.__board_class.is_board_checkmate(self.__chess_board, enemy_team)
         )
         return ret_state, killed_enemy
     
@@ -272,11 +317,11 @@ class ChessGame:
         self.__chess_board.print_text_board()
 
     def update_in_check(self) -> None:
-        self.__in_check = ChessBoard.is_board_in_check(self.__chess_board, self.get_current_turn())
+        self.__in_check = self.__board_class.is_board_in_check(self.__chess_board, self.get_current_turn())
     
     def update_checkmate(self) -> None:
 
-        if ChessBoard.is_board_checkmate(self.__chess_board, self.get_current_turn()):
+        if self.__board_class.is_board_checkmate(self.__chess_board, self.get_current_turn()):
             self.__checkmate = True
             self.__winner = Team.BLACK if self.get_current_turn() == Team.WHITE else Team.WHITE 
         else:
@@ -285,84 +330,33 @@ class ChessGame:
     def update_draw(self) -> None:
         
         self.__draw = False
+        self.__draw_reason = None
 
         # 逼和 stalemate
         self.update_in_check()
         if not self.get_in_check() and \
-           ChessBoard.is_board_no_valid_moves(self.__chess_board, self.get_current_turn()):
+           self.__board_class.is_board_no_valid_moves(self.__chess_board, self.get_current_turn()):
             self.__draw = True
+            self.__draw_reason = DrawReason.STALEMATE
             return 
 
         # 三次重複局面 threefold repetition rule
         if self.__record.get_repetitions() >= 3:
             self.__draw = True
+            self.__draw_reason = DrawReason.THREEFOLD_REPETITION
             return 
 
-        # 50個回合內，雙方既沒有棋子被吃掉，也沒有士兵被移動過 50-move rule
-        if self.__rule_50_counter == 50: 
+        # 50個回合內，雙方既沒有棋子被吃掉，也沒有士兵被移動過 50-move rule (100 plies)
+        if self.__chess_board.get_halfmove_clock() >= 100: 
             self.__draw = True
+            self.__draw_reason = DrawReason.FIFTY_MOVE_RULE
             return 
         
         # 兵力不足 insufficient material draw
-
-        # [0]King, [1]Queen, [2]Rook, [3]Bishop_in_BOARDCELL_COLORS[0], [4]Bishop_in_BOARDCELL_COLORS[1], [5]Knight, [6]Pawn
-        chessman_count = {
-            Team.WHITE: ([0] * 7), 
-            Team.BLACK: ([0] * 7)
-        }
-        
-        for i, row in enumerate(ROW_VALUE_RANGE):
-            for j, col in enumerate(COL_VALUE_RANGE):
-                chessman = self.__chess_board.get_chessman(row, col)
-                
-                if chessman is None: continue
-
-                chessman_type  = type(chessman).__name__
-                chessman_team = chessman.get_team()
-                color_index = ((len(ROW_VALUE_RANGE) - 1 - i) + j) % 2
-
-                conditions = [
-                    lambda type_name: type_name == King.__name__,
-                    lambda type_name: type_name == Queen.__name__,
-                    lambda type_name: type_name == Rook.__name__,
-                    lambda type_name: type_name == Bishop.__name__ and color_index == 0,
-                    lambda type_name: type_name == Bishop.__name__ and color_index == 1,
-                    lambda type_name: type_name == Knight.__name__,
-                    lambda type_name: type_name == Pawn.__name__,
-                ]
-                
-                for k, cond in enumerate(conditions):
-                    if cond(chessman_type):
-                        chessman_count[chessman_team][k] += 1
-                        break
-
-        only_king = lambda count_list: count_list == [1, 0, 0, 0, 0, 0, 0]
-        only_king_and_knight = lambda count_list: count_list == [1, 0, 0, 0, 0, 1, 0]
-        only_king_and_bishop = lambda count_list: \
-            (count_list == [1, 0, 0, 1, 0, 0, 0]) or (count_list == [1, 0, 0, 0, 1, 0, 0])
-
-        ## 王 對 王 (K vs K)
-        if only_king(chessman_count[Team.BLACK]) and \
-           only_king(chessman_count[Team.WHITE]):
-            self.__draw = True
-            return
-
-        ## 王和主教 對 王 (K + B vs K)
-        if (only_king_and_bishop(chessman_count[Team.BLACK]) and only_king(chessman_count[Team.WHITE])) or \
-           (only_king_and_bishop(chessman_count[Team.WHITE]) and only_king(chessman_count[Team.BLACK])):
-            self.__draw = True
-            return
-
-        ## 王和騎士 對 王 (K + N vs K)
-        if (only_king_and_knight(chessman_count[Team.BLACK]) and only_king(chessman_count[Team.WHITE])) or \
-           (only_king_and_knight(chessman_count[Team.WHITE]) and only_king(chessman_count[Team.BLACK])):
-            self.__draw = True
-            return
-
-        ## 王和主教 對 王和主教，且雙方象位於同一色格子內 (K + B vs K + B, and the two bishops are on the same color cells)
-        if (chessman_count[Team.BLACK] == [1, 0, 0, 1, 0, 0, 0] and chessman_count[Team.WHITE] == [1, 0, 0, 0, 1, 0, 0]) or \
-           (chessman_count[Team.WHITE] == [1, 0, 0, 1, 0, 0, 0] and chessman_count[Team.BLACK] == [1, 0, 0, 0, 1, 0, 0]):
+        material = (self.__chess_board.get_material(Team.WHITE), self.__chess_board.get_material(Team.BLACK))
+        if material in INSUFFICIENT_MATERIALS:
             self.__draw = True
+            self.__draw_reason = DrawReason.INSUFFICIENT_MATERIAL
             return
 
     def record_move(
@@ -392,4 +386,4 @@ class ChessGame:
         self.__record.add_promotion_info(chessman_type_name)
 
     def record_board(self) -> None:
-        self.__record.add_board(self.__chess_board)
\ No newline at end of file
+        self.__record.add_board(self.__chess_board, self.get_current_turn())
\ No newline at end of file
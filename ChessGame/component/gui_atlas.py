@@ -0,0 +1,126 @@
+from __future__ import annotations
+import io
+import os
+import time
+import pygame
+from typing import Optional
+from .chessman import *
+from ..const import *
+from ..gui_const import *
+from ..type_defs import *
+
+
+def get_chessman_image_path(team: Team, chessman_type_name: str) -> str:
+    return os.path.join(IMAGE_FOLDER, "chessman", f"{chessman_type_name.title()}_{team.name.lower()}.png")
+
+def read_atlas_files(bundle_path: Optional[str] = None) -> Dict[str, bytes]:
+    # the raw files of the chessman images (and the bundle), key: path
+    # it touches no pygame surface, so it can run on a background thread before the atlas is built on the main thread
+
+    paths = [get_chessman_image_path(team, chessman_type_name) for team in (Team.WHITE, Team.BLACK) for chessman_type_name in CHESSMAN_TYPE_NAMES]
+    if bundle_path is not None and os.path.isfile(bundle_path): paths.append(bundle_path)
+
+    atlas_files = dict()
+    for path in paths:
+        with open(path, "rb") as file:
+            atlas_files[path] = file.read()
+    return atlas_files
+
+class ChessmanAtlas:
+    # the chessman images scaled once for every side length, and shared by all the sprites and panels
+    # the bundle is an optional pre-scaled atlas image: one row per side length, one column per (team, chessman type),
+    # it is rebuilt when it is older than any chessman image
+    # atlas_files: the files read ahead by read_atlas_files, the missing ones are read from the disk
+
+    def __init__(
+            self, 
+            side_lengths : Tuple[int, ...] = ATLAS_SIDE_LENGTHS, 
+            bundle_path  : Optional[str] = None, 
+            atlas_files  : Optional[Dict[str, bytes]] = None
+        ) -> None:
+
+        start_time = time.perf_counter()
+        self.__atlas_files = dict() if atlas_files is None else atlas_files
+        self.__images = dict()      # key: (team, chessman_type_name, side_length), value: the scaled image
+        self.__keys = [(team, chessman_type_name) for team in (Team.WHITE, Team.BLACK) for chessman_type_name in CHESSMAN_TYPE_NAMES]
+
+        self.__from_bundle = bundle_path is not None and self.__load_bundle(bundle_path, side_lengths)
+        if not self.__from_bundle:
+            for team, chessman_type_name in self.__keys:
+                source_image = self.__load_source(team, chessman_type_name)
+                for side_length in side_lengths:
+                    self.__images[(team, chessman_type_name, side_length)] = self.__scale(source_image, side_length)
+            if bundle_path is not None: self.__save_bundle(bundle_path, side_lengths)
+
+        self.__load_time = time.perf_counter() - start_time
+
+    def get_image(self, team: Team, chessman_type_name: str, side_length: int = CHESSMAN_SIDE_LENGTH) -> pygame.Surface:
+        # the images are shared, so they must not be drawn on
+
+        key = (team, chessman_type_name, side_length)
+        if key not in self.__images:
+            self.__images[key] = self.__scale(self.__load_source(team, chessman_type_name), side_length)
+        return self.__images[key]
+
+    def get_load_time(self) -> float:
+        return self.__load_time
+
+    def get_report(self) -> str:
+        source = "pre-scaled bundle" if self.__from_bundle else "chessman images"
+        return f"[atlas] {len(self.__images)} images loaded from the {source} in {1000 * self.__load_time:.2f} ms"
+
+    def __load_source(self, team: Team, chessman_type_name: str) -> pygame.Surface:
+        return self.__load_image(get_chessman_image_path(team, chessman_type_name))
+
+    def __load_image(self, path: str) -> pygame.Surface:
+        # the surfaces are converted on the main thread, from the file read ahead when there is one
+        if path in self.__atlas_files: return pygame.image.load(io.BytesIO(self.__atlas_files[path]), path).convert()
+        return pygame.image.load(path).convert()
+
+    def __scale(self, source_image: pygame.Surface, side_length: int) -> pygame.Surface:
+        image = pygame.transform.scale(source_image, (side_length, side_length))
+        image.set_colorkey(RED)
+        return image
+
+    def __load_bundle(self, bundle_path: str, side_lengths: Tuple[int, ...]) -> bool:
+
+        if not os.path.isfile(bundle_path): return False
+        bundle_time = os.path.getmtime(bundle_path)
+        if any(os.path.getmtime(get_chessman_image_path(team, chessman_type_name)) > bundle_time for team, chessman_type_name in self.__keys):
+            return False
+
+        try:
+            bundle = self.__load_image(bundle_path)
+        except pygame.error:
+            return False
+        if bundle.get_size() != self.__bundle_size(side_lengths): return False
+
+        y = 0
+        for side_length in side_lengths:
+            for i, (team, chessman_type_name) in enumerate(self.__keys):
+                image = bundle.subsurface((i * max(side_lengths), y, side_length, side_length)).copy()
+                image.set_colorkey(RED)
+                self.__images[(team, chessman_type_name, side_length)] = image
+            y += side_length
+        return True
+
+    def __save_bundle(self, bundle_path: str, side_lengths: Tuple[int, ...]) -> None:
+
+        bundle = pygame.Surface(self.__bundle_size(side_lengths))
+        bundle.fill(RED)
+        y = 0
+        for side_length in side_lengths:
+            for i, (team, chessman_type_name) in enumerate(self.__keys):
+                image = self.__images[(team, chessman_type_name, side_length)]
+                # the colorkey is not blitted as transparent, so the atlas keeps the exact pixels
+                colorkey = image.get_colorkey()
+                image.set_colorkey(None)
+                bundle.blit(image, (i * max(side_lengths), y))
+                image.set_colorkey(colorkey)
+            y += side_length
+
+        os.makedirs(os.path.dirname(os.path.abspath(bundle_path)), exist_ok = True)
+        pygame.image.save(bundle, bundle_path)
+
+    def __bundle_size(self, side_lengths: Tuple[int, ...]) -> CoordinateType:
+        return (len(self.__keys) * max(side_lengths), sum(side_lengths))
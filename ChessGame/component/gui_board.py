@@ -1,13 +1,82 @@
 from __future__ import annotations
 import pygame
+from collections import OrderedDict
 from .chessman import *
 from .board import *
 from .gui_chessman import *
 from ..const import *
 from ..gui_const import *
 from ..type_defs import *
+from ..gui_type_defs import *
 
 
+class TextCache:
+    # the fonts are kept per size, and the rendered texts per (text, size, color) in LRU order
+
+    def __init__(self, max_entries: int) -> None:
+        self.__fonts = dict()               # key: size, value: font
+        self.__surfaces = OrderedDict()     # key: (text, size, color), value: text surface, the latest used is the last
+        self.__max_entries = max_entries
+
+        self.__font_hits,    self.__font_misses    = 0, 0
+        self.__surface_hits, self.__surface_misses = 0, 0
+
+    def get_font(self, size: int) -> pygame.font.Font:
+
+        font = self.__fonts.get(size)
+        if font is not None:
+            self.__font_hits += 1
+            return font
+
+        self.__font_misses += 1
+        font = pygame.font.Font(None, size)
+        self.__fonts[size] = font
+        return font
+
+    def render(self, text: str, size: int, color: ColorType) -> pygame.Surface:
+        # the returned surface is shared, the callers only blit it
+
+        key = (text, size, tuple(color))
+        text_surface = self.__surfaces.get(key)
+        if text_surface is not None:
+            self.__surface_hits += 1
+            self.__surfaces.move_to_end(key)
+            return text_surface
+
+        self.__surface_misses += 1
+        text_surface = self.get_font(size).render(text, True, color)
+        self.__surfaces[key] = text_surface
+        if len(self.__surfaces) > self.__max_entries:
+            self.__surfaces.popitem(last = False)
+        return text_surface
+
+    def get_stats(self) -> Dict[str, float]:
+
+        font_count, surface_count = self.__font_hits + self.__font_misses, self.__surface_hits + self.__surface_misses
+        return {
+            "font_hits":        self.__font_hits,
+            "font_misses":      self.__font_misses,
+            "font_hit_rate":    self.__font_hits / font_count if font_count > 0 else 0.0,
+            "text_hits":        self.__surface_hits,
+            "text_misses":      self.__surface_misses,
+            "text_hit_rate":    self.__surface_hits / surface_count if surface_count > 0 else 0.0,
+            "text_entries":     len(self.__surfaces),
+        }
+
+    def get_report(self) -> str:
+        # the counts since the start
+
+        stats = self.get_stats()
+        return (f"[text cache] fonts {stats['font_hits']} hits / {stats['font_misses']} misses ({100 * stats['font_hit_rate']:.1f}%), "
+                f"texts {stats['text_hits']} hits / {stats['text_misses']} misses ({100 * stats['text_hit_rate']:.1f}%), "
+                f"{stats['text_entries']} texts kept")
+
+    def clear(self) -> None:
+        self.__fonts.clear()
+        self.__surfaces.clear()
+
+text_cache = TextCache(TEXT_CACHE_SIZE)
+
 def draw_text(
         screen           : pygame.Surface, 
         text             : str, 
@@ -18,8 +87,7 @@ def draw_text(
         background_color : Optional[ColorType] = None
     ) -> pygame.Surface:
 
-    font = pygame.font.Font(None, fontSize)
-    text_surface = font.render(f"{text}", True, Fontcolor)
+    text_surface = text_cache.render(f"{text}", fontSize, Fontcolor)
     text_rect = text_surface.get_rect()
     text_rect.center = (center_x, center_y)
     if background_color: screen.fill(background_color, text_rect)
@@ -34,15 +102,21 @@ class GuiBoardCell(pygame.sprite.Sprite):
         pygame.sprite.Sprite.__init__(self)
         self.image = pygame.Surface((CELL_SIDE_LENGTH, CELL_SIDE_LENGTH))
         self.image.fill(color)
+        self.color = color
 
         self.rect = self.image.get_rect()
         self.rect.x = INIT_X + CELL_SIDE_LENGTH * cell_x
         self.rect.y = INIT_Y + CELL_SIDE_LENGTH * cell_y
         pygame.draw.rect(self.image, BLACK, self.image.get_rect(), 1)
 
-    def set_color(self, color: ColorType) -> None:
+    def set_color(self, color: ColorType) -> bool:
+        # return whether the color has changed (the cell has to be drawn again)
+        if color == self.color: return False
+
+        self.color = color
         self.image.fill(color)
         pygame.draw.rect(self.image, BLACK, self.image.get_rect(), 1)
+        return True
     
 class GuiBoard:
     
@@ -54,6 +128,8 @@ class GuiBoard:
     def __init__(self) -> None:
         self.board = list()
         self.boardcell_sprite = pygame.sprite.Group()
+        self.rect = pygame.Rect(INIT_X, INIT_Y, CELL_SIDE_LENGTH * len(COL_VALUE_RANGE), CELL_SIDE_LENGTH * len(ROW_VALUE_RANGE))
+        self.__dirty_rects = list()     # the cells repainted since the last pop_dirty_rects
 
         for i in range(len(ROW_VALUE_RANGE)):
             self.board.append(list())
@@ -66,7 +142,7 @@ class GuiBoard:
 
         for i in range(len(ROW_VALUE_RANGE)):
             for j in range(len(COL_VALUE_RANGE)):
-                self.board[i][j].set_color(BOARDCELL_COLORS[(i + j) % 2])
+                self.__set_cell_color(self.board[i][j], BOARDCELL_COLORS[(i + j) % 2])
         
     def paint_move_area(self, current_turn: Team, valid_moves: set[MoveType]) -> None:
         
@@ -74,13 +150,13 @@ class GuiBoard:
             cell_x, cell_y = GuiChessman.calc_cell_x_y(pos[0], pos[1], current_turn)
 
             if action == "Move":
-                self.board[cell_y][cell_x].set_color(MOVE_COLOR)
+                self.__set_cell_color(self.board[cell_y][cell_x], MOVE_COLOR)
             elif action == "Attack":
-                self.board[cell_y][cell_x].set_color(ATTACK_COLOR)
+                self.__set_cell_color(self.board[cell_y][cell_x], ATTACK_COLOR)
             elif action == "Promotion":
-                self.board[cell_y][cell_x].set_color(PROMOTION_COLOR)
+                self.__set_cell_color(self.board[cell_y][cell_x], PROMOTION_COLOR)
             elif action == "Castling":
-                self.board[cell_y][cell_x].set_color(CASTLING_COLOR)
+                self.__set_cell_color(self.board[cell_y][cell_x], CASTLING_COLOR)
     
     def draw_board(self, screen: pygame.Surface, current_turn: Team) -> None:
         self.get_bordcell_sprite().draw(screen)
@@ -98,3 +174,10 @@ class GuiBoard:
 
     def get_bordcell_sprite(self) -> pygame.sprite.Group:
         return self.boardcell_sprite
+
+    def pop_dirty_rects(self) -> List[pygame.Rect]:
+        dirty_rects, self.__dirty_rects = self.__dirty_rects, list()
+        return dirty_rects
+
+    def __set_cell_color(self, cell: GuiBoardCell, color: ColorType) -> None:
+        if cell.set_color(color): self.__dirty_rects.append(cell.rect)
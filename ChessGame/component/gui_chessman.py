@@ -1,12 +1,14 @@
 from __future__ import annotations
 import pygame
 from enum import Enum, auto
+from typing import Optional
 from .game import ChessGame
 from .chessman import *
 from .board import *
 from ..const import *
 from ..gui_const import *
 from ..type_defs import *
+from ..gui_type_defs import *
 
 
 class GuiChessmanState(Enum):
@@ -16,13 +18,13 @@ class GuiChessmanState(Enum):
 class GuiChessman(pygame.sprite.Sprite):
 
     @staticmethod
-    def repaint_chessmen(chess_game: ChessGame, chessman_bind: ChessmanBindType) -> None:
-        for r in ROW_VALUE_RANGE:
-            for c in COL_VALUE_RANGE:
-                chessman = chess_game.get_chessman(r, c)
-                if chessman is not None:
-                    c_x, c_y = GuiChessman.calc_cell_x_y(r, c, chess_game.get_current_turn())
-                    chessman_bind[chessman].set_cell_x_y(c_x, c_y)  
+    def repaint_chessmen(chess_game: ChessGame, chessman_bind: ChessmanBindType, view_team: Optional[Team] = None) -> None:
+        if view_team is None: view_team = chess_game.get_current_turn()
+
+        for team in (Team.WHITE, Team.BLACK):
+            for chessman in chess_game.get_chessmen(team):
+                c_x, c_y = GuiChessman.calc_cell_x_y(chessman.get_pos()[0], chessman.get_pos()[1], view_team)
+                chessman_bind[chessman].set_cell_x_y(c_x, c_y)  
 
     @staticmethod
     def calc_cell_x_y(row: int, col: str, current_turn: Team) -> CellPosType:
@@ -56,8 +58,8 @@ class GuiChessman(pygame.sprite.Sprite):
         
         pygame.sprite.Sprite.__init__(self)
 
-        self.image = pygame.transform.scale(image, (CHESSMAN_SIDE_LENGTH, CHESSMAN_SIDE_LENGTH))
-        self.image.set_colorkey(RED)
+        # the image is pre-scaled and shared by the chessman atlas
+        self.image = image
 
         self.team = team
         self.cell_x = cell_x
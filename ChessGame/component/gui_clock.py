@@ -0,0 +1,103 @@
+from __future__ import annotations
+import time
+import pygame
+from typing import Optional, Callable
+from ..const import *
+from ..gui_const import *
+from ..type_defs import *
+
+
+class FrameClock:
+    # the pacing of the GUI loops:
+    #   event-driven: the loop blocks on pygame.event.wait while nothing animates (no input, no computer search),
+    #                 and is capped at fps by pygame.time.Clock while something animates
+    #   polling:      the loop is always capped at fps
+    # the frame time is the work of one loop iteration, from its events to the events of the next one
+
+    def __init__(
+            self, 
+            fps             : int = FPS, 
+            event_driven    : bool = True, 
+            report_interval : float = 0.0, 
+            extra_reports   : Tuple[Callable[[], str], ...] = ()
+        ) -> None:
+        self.__clock = pygame.time.Clock()
+        self.__fps = fps
+        self.__event_driven = event_driven
+        self.__report_interval = report_interval    # seconds between the reports printed on the console, 0: no report
+        self.__extra_reports = extra_reports        # the reports printed after the frame report (e.g. the text cache)
+
+        self.__frame_start = None
+        self.__reset_window()
+
+    def get_events(self, animating: bool = False) -> List[pygame.event.Event]:
+
+        if self.__frame_start is not None:
+            frame_time = time.perf_counter() - self.__frame_start
+            self.__busy_time += frame_time
+            self.__max_frame_time = max(self.__max_frame_time, frame_time)
+            self.__loop_count += 1
+
+        if self.__event_driven and not animating:
+            # the wait wakes up for the next report even without input
+            timeout = int(self.__report_interval * 1000) if self.__report_interval > 0 else 0
+            event = pygame.event.wait(timeout) if timeout > 0 else pygame.event.wait()
+            events = ([] if event.type == pygame.NOEVENT else [event]) + pygame.event.get()
+            self.__clock.tick()
+        else:
+            self.__clock.tick(self.__fps)
+            events = pygame.event.get()
+
+        if self.__report_interval > 0 and time.perf_counter() - self.__window_start >= self.__report_interval:
+            print(self.get_report(), flush = True)
+            for extra_report in self.__extra_reports:
+                print(extra_report(), flush = True)
+            self.__reset_window()
+
+        self.__frame_start = time.perf_counter()
+        return events
+
+    def add_rendered_frame(self) -> None:
+        self.__rendered_count += 1
+
+    def get_stats(self) -> Dict[str, float]:
+        # the measures since the last report
+
+        elapsed = max(time.perf_counter() - self.__window_start, 1e-9)
+        return {
+            "seconds":            elapsed,
+            "loops_per_second":   self.__loop_count / elapsed,
+            "frames_per_second":  self.__rendered_count / elapsed,
+            "mean_frame_time_ms": 1000 * self.__busy_time / self.__loop_count if self.__loop_count > 0 else 0.0,
+            "max_frame_time_ms":  1000 * self.__max_frame_time,
+            "busy_ratio":         self.__busy_time / elapsed,
+        }
+
+    def get_report(self) -> str:
+
+        stats = self.get_stats()
+        mode = "event-driven" if self.__event_driven else "polling"
+        return (f"[{mode}] {stats['frames_per_second']:.1f} fps rendered, {stats['loops_per_second']:.1f} loops/s, "
+                f"frame time {stats['mean_frame_time_ms']:.2f} ms (max {stats['max_frame_time_ms']:.2f} ms), "
+                f"busy {100 * stats['busy_ratio']:.1f}% over {stats['seconds']:.1f} s")
+
+    def __reset_window(self) -> None:
+        self.__window_start = time.perf_counter()
+        self.__loop_count, self.__rendered_count = 0, 0
+        self.__busy_time, self.__max_frame_time = 0.0, 0.0
+
+class StartupTimer:
+    # the times of the startup stages, in seconds since the timer is created (only the first mark of a stage is kept)
+
+    def __init__(self) -> None:
+        self.__start_time = time.perf_counter()
+        self.__marks = dict()
+
+    def mark(self, stage: str) -> None:
+        self.__marks.setdefault(stage, time.perf_counter() - self.__start_time)
+
+    def get_time(self, stage: str) -> Optional[float]:
+        return self.__marks.get(stage)
+
+    def get_report(self, stages: Tuple[str, ...]) -> str:
+        return "[startup] " + ", ".join(f"{stage} at {1000 * self.__marks[stage]:.1f} ms" for stage in stages if stage in self.__marks)
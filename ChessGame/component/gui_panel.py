@@ -6,9 +6,11 @@ from .board import *
 from .game import *
 from .gui_chessman import *
 from .gui_board import *
+from .gui_atlas import *
 from ..const import *
 from ..gui_const import *
 from ..type_defs import *
+from ..gui_type_defs import *
 
 
 class PanelChessman(pygame.sprite.Sprite):
@@ -19,13 +21,12 @@ class PanelChessman(pygame.sprite.Sprite):
             y                  : int, 
             team               : Team, 
             chessman_type_name : str, 
-            chessman_images    : ImageDictType, 
+            chessman_atlas     : ChessmanAtlas, 
             side_length        : int = CHESSMAN_SIDE_LENGTH
         ) -> None:
 
         pygame.sprite.Sprite.__init__(self)
-        self.image = pygame.transform.scale(chessman_images[team][chessman_type_name], (side_length, side_length))
-        self.image.set_colorkey(RED)
+        self.image = chessman_atlas.get_image(team, chessman_type_name, side_length)
         self.rect = self.image.get_rect()
         self.rect.x = x
         self.rect.y = y
@@ -36,7 +37,7 @@ class PanelChessman(pygame.sprite.Sprite):
 
 class PromotionPanel(pygame.sprite.Sprite):
 
-    def __init__(self, team: Team, chessman_images: ImageDictType) -> None:
+    def __init__(self, team: Team, chessman_atlas: ChessmanAtlas) -> None:
         pygame.sprite.Sprite.__init__(self)
         self.__promotion_panel = pygame.Surface((PANEL_WIDTH, PANEL_HEIGHT - 150))
         self.__promotion_panel.fill(GRAY)
@@ -47,7 +48,7 @@ class PromotionPanel(pygame.sprite.Sprite):
         self.chessman_sprite = pygame.sprite.Group()
 
         for i, chessman_type_name in enumerate(CHESSMAN_TYPE_NAMES[1: 5]):
-            panel_chessman = PanelChessman(170 + (100 * i), 320 , team, chessman_type_name, chessman_images)
+            panel_chessman = PanelChessman(170 + (100 * i), 320 , team, chessman_type_name, chessman_atlas)
             self.chessman_sprite.add(panel_chessman)
             self.chessman_types.append(panel_chessman)
         
@@ -59,6 +60,9 @@ class PromotionPanel(pygame.sprite.Sprite):
                 return chessman_type.name
         return None
     
+    def get_rect(self) -> pygame.Rect:
+        return self.__rect.unionall([panel_chessman.rect for panel_chessman in self.chessman_types])
+
     def draw(self, screen: pygame.Surface) -> None:
         pygame.draw.rect(self.__promotion_panel, BLACK, self.__promotion_panel.get_rect(), 1)
         screen.blit(self.__promotion_panel, self.__rect)
@@ -66,7 +70,7 @@ class PromotionPanel(pygame.sprite.Sprite):
 
 class InfoPanel(pygame.sprite.Sprite):
 
-    def __init__(self, chessman_images: ImageDictType) -> None:
+    def __init__(self, chessman_atlas: ChessmanAtlas) -> None:
         
         pygame.sprite.Sprite.__init__(self)
         self.__main_panel = pygame.Surface((PANEL_WIDTH, PANEL_HEIGHT - 35))
@@ -85,13 +89,16 @@ class InfoPanel(pygame.sprite.Sprite):
         self.chessman_sprite = pygame.sprite.Group()
 
         for i, chessman_type_name in enumerate(CHESSMAN_TYPE_NAMES):
-            white_chessman = PanelChessman(WIDTH // 2 - 160 + i * 55, HEIGHT // 2 - 60, Team.WHITE, chessman_type_name, chessman_images, side_length = 50)
-            black_chessman = PanelChessman(WIDTH // 2 - 160 + i * 55, HEIGHT // 2 + 5, Team.BLACK, chessman_type_name, chessman_images, side_length = 50)
+            white_chessman = PanelChessman(WIDTH // 2 - 160 + i * 55, HEIGHT // 2 - 60, Team.WHITE, chessman_type_name, chessman_atlas, side_length = INFO_CHESSMAN_SIDE_LENGTH)
+            black_chessman = PanelChessman(WIDTH // 2 - 160 + i * 55, HEIGHT // 2 + 5, Team.BLACK, chessman_type_name, chessman_atlas, side_length = INFO_CHESSMAN_SIDE_LENGTH)
             self.chessman_sprite.add(white_chessman)
             self.chessman_sprite.add(black_chessman)
             self.__white_chessmen[chessman_type_name] = white_chessman
             self.__black_chessman[chessman_type_name] = black_chessman
 
+    def get_rect(self) -> pygame.Rect:
+        return self.__main_panel_rect.unionall([self.__exit_panel_rect] + [panel_chessman.rect for panel_chessman in self.chessman_sprite])
+
     def draw(self, screen: pygame.Surface, dead_chessmen: DeadChessmenType) -> None:
         
         pygame.draw.rect(self.__main_panel, BLACK, self.__main_panel.get_rect(), 1)
@@ -168,9 +175,16 @@ class RecordPanel(pygame.sprite.Sprite):
         self.__end_round = self.__max_display_count
         self.__latest = True
         
+        # the panel is rendered on its own surface, which is only redrawn when the record or the scroll changes
+        panel_x, panel_y = INIT_X + CELL_SIDE_LENGTH * 8, INIT_Y - 20
+        self.__surface = pygame.Surface((WIDTH - panel_x, 50 + RECORD_CELL_HEIGHT * self.__max_display_count))
+        self.__surface_rect = self.__surface.get_rect(topleft = (panel_x, panel_y))
+        self.__render_key = None        # (record, record_version, start_round)
+
+        # the record cells are placed in the coordinates of the panel surface
         self.__record_cells = dict()
         self.__record_cells_rect = dict()
-        start_x, start_y = INIT_X + CELL_SIDE_LENGTH * 8 + 70, INIT_Y + 30
+        start_x, start_y = 70, INIT_Y + 30 - panel_y
         for i in range(self.__max_display_count):
             self.__record_cells[i] = dict()
             self.__record_cells_rect[i] = dict()
@@ -183,29 +197,45 @@ class RecordPanel(pygame.sprite.Sprite):
             self.__record_cells[i][Team.BLACK] = panel
             self.__record_cells_rect[i][Team.BLACK] = panel_rect
 
-    def draw(
-            self, 
-            screen          : pygame.Surface, 
-            rounds          : int, 
-            chess_notations : NotationType
-        ) -> None:
+    def update(self, record: Record) -> bool:
+        # render the panel again if the record or the scroll has changed, and return whether it has been rendered
 
+        rounds, chess_notations = record.get_chess_notation()
         self.__max_round = max(self.__max_round, rounds)
 
         if self.__latest: 
             self.__end_round = self.__max_round
             self.__start_round = max(1, self.__end_round - self.__max_display_count + 1)
 
-        draw_text(screen, "White", INIT_X + CELL_SIDE_LENGTH * 8 + 70 + 60, INIT_Y + 5, 40, WHITE)
-        draw_text(screen, "Black", INIT_X + CELL_SIDE_LENGTH * 8 + 70 + 120 + 60, INIT_Y + 5, 40, GRAY)
+        render_key = (record, record.get_version(), self.__start_round)
+        if render_key == self.__render_key: return False
+
+        self.__render(rounds, chess_notations)
+        self.__render_key = render_key
+        return True
+
+    def draw(self, screen: pygame.Surface, record: Record) -> None:
+        self.update(record)
+        screen.blit(self.__surface, self.__surface_rect)
+
+    def get_rect(self) -> pygame.Rect:
+        return self.__surface_rect
+
+    def __render(self, rounds: int, chess_notations: NotationType) -> None:
+
+        surface = self.__surface
+        surface.fill(BACKGROUND_COLOR)
+
+        draw_text(surface, "White", 70 + 60, 25, 40, WHITE)
+        draw_text(surface, "Black", 70 + 120 + 60, 25, 40, GRAY)
         
         for i in range(self.__max_display_count):
             round_index = i + self.__start_round
-            draw_text(screen, str(round_index), self.__record_cells_rect[i][Team.WHITE].x - 30, self.__record_cells_rect[i][Team.WHITE].center[1], 40, WHITE)
+            draw_text(surface, str(round_index), self.__record_cells_rect[i][Team.WHITE].x - 30, self.__record_cells_rect[i][Team.WHITE].center[1], 40, WHITE)
 
             for team in (Team.WHITE, Team.BLACK):
                 pygame.draw.rect(self.__record_cells[i][team], BACKGROUND_COLOR, self.__record_cells[i][team].get_rect(), 2)
-                screen.blit(self.__record_cells[i][team], self.__record_cells_rect[i][team])
+                surface.blit(self.__record_cells[i][team], self.__record_cells_rect[i][team])
             
             if round_index > rounds: continue
 
@@ -213,7 +243,7 @@ class RecordPanel(pygame.sprite.Sprite):
                                    (     WHITE,      BLACK)):
                 if team not in chess_notations[round_index]: continue
                 center_x, center_y = self.__record_cells_rect[i][team].center
-                draw_text(screen, chess_notations[round_index][team], center_x, center_y, 35, color)
+                draw_text(surface, chess_notations[round_index][team], center_x, center_y, 35, color)
 
     def set_latest(self) -> None:
         self.__latest = True
@@ -0,0 +1,222 @@
+from __future__ import annotations
+import re
+from typing import Optional, Iterator, Iterable, TextIO
+from .chessman import *
+from .fen import *
+from .game import *
+from ..const import *
+from ..type_defs import *
+
+
+PGN_RESULTS = ("1-0", "0-1", "1/2-1/2", "*")
+PGN_CHESSMAN_LETTERS = {King: 'K', Queen: 'Q', Rook: 'R', Bishop: 'B', Knight: 'N', Pawn: ''}
+PGN_CHESSMAN_TYPES = {letter: chessman_type for chessman_type, letter in PGN_CHESSMAN_LETTERS.items() if letter != ''}
+# the seven tag roster, written first and in this order
+PGN_ROSTER_TAGS = (
+    ("Event", "?"), ("Site", "?"), ("Date", "????.??.??"), ("Round", "?"),
+    ("White", "?"), ("Black", "?"), ("Result", "*")
+)
+PGN_LINE_WIDTH = 80
+
+PGN_TAG_PATTERN = re.compile(r'^\[\s*(\w+)\s+"((?:[^"\\]|\\.)*)"\s*\]\s*$')
+# comments, variations, NAGs and move numbers are dropped, the other tokens are moves or results
+PGN_TOKEN_PATTERN = re.compile(r'\{|\}|\(|\)|;|\$\d+|\d+\.+|[^\s{}();.]+')
+SAN_PATTERN = re.compile(r'^([KQRBN])?([a-h])?([1-8])?x?([a-h])([1-8])(?:=?([QRBN]))?$')
+
+def read_pgn(pgn_lines: Iterable[str]) -> Iterator[PgnGameType]:
+    # yield the games one by one, only the current game is kept in memory
+
+    headers, san_moves, result = dict(), list(), None
+    comment_depth, variation_depth = 0, 0
+
+    for line in pgn_lines:
+        line = line.strip()
+
+        # escaped line
+        if comment_depth == 0 and line.startswith('%'): continue
+
+        if comment_depth == 0 and variation_depth == 0 and line.startswith('['):
+            # the tags after the movetext start the next game
+            if len(san_moves) > 0 or result is not None:
+                yield (headers, san_moves, headers.get("Result", "*") if result is None else result)
+                headers, san_moves, result = dict(), list(), None
+
+            tag_match = PGN_TAG_PATTERN.match(line)
+            if tag_match is None:
+                raise ValueError(f"Fail to parse the PGN tag \"{line}\"")
+            headers[tag_match.group(1)] = tag_match.group(2).replace('\\"', '"').replace('\\\\', '\\')
+            continue
+
+        for token in PGN_TOKEN_PATTERN.findall(line):
+            if comment_depth > 0:
+                if token == '}': comment_depth = 0
+                continue
+
+            if token == '{':   comment_depth = 1
+            elif token == ';': break
+            elif token == '(': variation_depth += 1
+            elif token == ')': variation_depth = max(0, variation_depth - 1)
+            elif variation_depth > 0 or token[0] == '$' or token[0].isdigit() and token.endswith('.'):
+                continue
+            elif token in PGN_RESULTS:
+                result = token
+                yield (headers, san_moves, result)
+                headers, san_moves, result = dict(), list(), None
+            else:
+                san_moves.append(token)
+
+    if len(headers) > 0 or len(san_moves) > 0:
+        yield (headers, san_moves, headers.get("Result", "*") if result is None else result)
+
+def move_to_san(chess_game: ChessGame, move: SearchMoveType) -> str:
+    # the standard algebraic notation of a legal move, without the check suffix (given by play_san_move)
+
+    source_pos, dest_pos, promotion_type = move
+    target_chessman = chess_game.get_chessman(source_pos[0], source_pos[1])
+    chessman_type = type(target_chessman)
+    legal_moves = chess_game.get_chess_board().generate_legal_moves(chess_game.get_current_turn())
+
+    action = next(action for action, pos in legal_moves[source_pos] if pos == dest_pos)
+    if action == "Castling":
+        return "O-O" if dest_pos[1] == 'g' else "O-O-O"
+
+    dest_str = f"{dest_pos[1]}{dest_pos[0]}"
+    if chessman_type is Pawn:
+        san = f"{source_pos[1]}x{dest_str}" if action == "Attack" else dest_str
+        if dest_pos[0] in (ROW_VALUE_RANGE[0], ROW_VALUE_RANGE[-1]):
+            san += '=' + PGN_CHESSMAN_LETTERS[Queen if promotion_type is None else promotion_type]
+        return san
+
+    # the other chessmen of the same type which can also reach the destination
+    rivals = [
+        pos for pos, chessman_moves in legal_moves.items()
+        if pos != source_pos and type(chess_game.get_chessman(*pos)) is chessman_type and
+           any(rival_pos == dest_pos for _, rival_pos in chessman_moves)
+    ]
+    disambiguation = ""
+    if len(rivals) > 0:
+        if all(pos[1] != source_pos[1] for pos in rivals):   disambiguation = source_pos[1]
+        elif all(pos[0] != source_pos[0] for pos in rivals): disambiguation = str(source_pos[0])
+        else:                                                disambiguation = f"{source_pos[1]}{source_pos[0]}"
+
+    return PGN_CHESSMAN_LETTERS[chessman_type] + disambiguation + ('x' if action == "Attack" else "") + dest_str
+
+def san_to_move(chess_game: ChessGame, san: str) -> SearchMoveType:
+    # find the only legal move of the side to move written as san
+
+    turn = chess_game.get_current_turn()
+    legal_moves = chess_game.get_chess_board().generate_legal_moves(turn)
+    text = san.rstrip("+#!?")
+
+    if text in ("O-O", "0-0", "O-O-O", "0-0-0"):
+        start_row = ROW_VALUE_RANGE[0] if turn == Team.WHITE else ROW_VALUE_RANGE[-1]
+        source_pos, dest_pos = (start_row, 'e'), (start_row, 'g' if len(text) == 3 else 'c')
+        if ("Castling", dest_pos) not in legal_moves.get(source_pos, set()):
+            raise ValueError(f"Fail to play the illegal move \"{san}\"")
+        return (source_pos, dest_pos, None)
+
+    san_match = SAN_PATTERN.match(text)
+    if san_match is None:
+        raise ValueError(f"Fail to parse the move \"{san}\"")
+
+    letter, source_col, source_row, dest_col, dest_row, promotion_letter = san_match.groups()
+    chessman_type = Pawn if letter is None else PGN_CHESSMAN_TYPES[letter]
+    dest_pos = (int(dest_row), dest_col)
+
+    candidates = [
+        source_pos for source_pos, chessman_moves in legal_moves.items()
+        if type(chess_game.get_chessman(*source_pos)) is chessman_type and
+           (source_col is None or source_pos[1] == source_col) and
+           (source_row is None or source_pos[0] == int(source_row)) and
+           any(pos == dest_pos for _, pos in chessman_moves)
+    ]
+    if len(candidates) != 1:
+        raise ValueError(f"Fail to play the {'illegal' if len(candidates) == 0 else 'ambiguous'} move \"{san}\"")
+
+    promotion_type = None
+    if chessman_type is Pawn and dest_pos[0] in (ROW_VALUE_RANGE[0], ROW_VALUE_RANGE[-1]):
+        if promotion_letter is None:
+            raise ValueError(f"Fail to play the move \"{san}\" without the promotion chessman")
+        promotion_type = PGN_CHESSMAN_TYPES[promotion_letter]
+    return (candidates[0], dest_pos, promotion_type)
+
+def play_san_move(chess_game: ChessGame, move: SearchMoveType) -> str:
+    # play the move and return its standard algebraic notation with the check suffix
+
+    san = move_to_san(chess_game, move)
+    chess_game.play_move(move)
+    if chess_game.get_checkmate() or chess_game.get_game_end(): san += '#'
+    elif chess_game.get_in_check():                             san += '+'
+    return san
+
+def get_game_result(chess_game: ChessGame) -> str:
+
+    if chess_game.get_checkmate() or chess_game.get_game_end():
+        return "1-0" if chess_game.get_winner() == Team.WHITE else "0-1"
+    if chess_game.get_draw(): return "1/2-1/2"
+    return "*"
+
+def write_pgn(
+        pgn_file   : TextIO,
+        chess_game : ChessGame,
+        headers    : Optional[PgnHeadersType] = None
+    ) -> None:
+    # the recorded moves are replayed from the start position of the game to write them in SAN
+
+    start_fen = chess_game.get_start_fen()
+    result = get_game_result(chess_game)
+
+    headers = dict() if headers is None else dict(headers)
+    headers["Result"] = result
+
+    # SetUp and FEN always follow the seven tag roster, and only describe the start position of the game
+    setup_tags = [("SetUp", "1"), ("FEN", start_fen)] if start_fen is not None else []
+    headers.pop("SetUp", None)
+    headers.pop("FEN", None)
+
+    tags = [(tag, headers.pop(tag, default_value)) for tag, default_value in PGN_ROSTER_TAGS]
+    for tag, value in tags + setup_tags + list(headers.items()):
+        value = value.replace('\\', '\\\\').replace('"', '\\"')
+        pgn_file.write(f"[{tag} \"{value}\"]\n")
+    pgn_file.write("\n")
+
+    fullmove_number = 1
+    replay_game = ChessGame(use_bitboard = isinstance(chess_game.get_chess_board(), BitBoard))
+    if start_fen is not None:
+        replay_game.from_fen(start_fen)
+        _, _, _, _, fullmove_number = parse_fen(start_fen)
+
+    tokens = list()
+    for move in chess_game.get_record().get_moves():
+        turn = replay_game.get_current_turn()
+        if turn == Team.WHITE: tokens.append(f"{fullmove_number}.")
+        elif len(tokens) == 0: tokens.append(f"{fullmove_number}...")
+        tokens.append(play_san_move(replay_game, move))
+        if turn == Team.BLACK: fullmove_number += 1
+    tokens.append(result)
+
+    # the movetext is wrapped at PGN_LINE_WIDTH columns
+    line = ""
+    for token in tokens:
+        if len(line) + 1 + len(token) > PGN_LINE_WIDTH:
+            pgn_file.write(line + "\n")
+            line = token
+        else:
+            line = token if line == "" else f"{line} {token}"
+    pgn_file.write(line + "\n\n")
+
+def replay_pgn_game(pgn_game: PgnGameType, use_bitboard: bool = False) -> Tuple[ChessGame, Optional[int]]:
+    # (chess_game, illegal_move_index)
+    # the moves are played until the end or the first illegal one (illegal_move_index: None when all of them are legal)
+
+    headers, san_moves, _ = pgn_game
+    chess_game = ChessGame(use_bitboard = use_bitboard)
+    if "FEN" in headers: chess_game.from_fen(headers["FEN"])
+
+    for i, san in enumerate(san_moves):
+        try:
+            move = san_to_move(chess_game, san)
+        except ValueError:
+            return (chess_game, i)
+        chess_game.play_move(move)
+    return (chess_game, None)
@@ -0,0 +1,58 @@
+from __future__ import annotations
+from typing import Tuple
+from ..const import *
+from ..type_defs import *
+
+
+# square index: (row, col) = (1, 'a') => 0, (1, 'h') => 7, (8, 'a') => 56, (8, 'h') => 63
+# the tables below are built once at import, indexed by square, and hold the BoardPosType targets,
+# so the move generators walk them instead of computing and validating every step
+
+SQUARE_POS = tuple((row, col) for row in ROW_VALUE_RANGE for col in COL_VALUE_RANGE)
+POS_SQUARE = {pos: square for square, pos in enumerate(SQUARE_POS)}
+# the index of the cell color in BOARDCELL_COLORS
+SQUARE_COLORS = tuple((row + COL_VALUE_RANGE.index(col)) % 2 for row, col in SQUARE_POS)
+
+ROOK_DIRECTIONS   = ((1, 0), (-1, 0), (0, 1), (0, -1))
+BISHOP_DIRECTIONS = ((1, 1), (1, -1), (-1, 1), (-1, -1))
+KNIGHT_OFFSETS    = ((2, 1), (2, -1), (1, 2), (1, -2), (-2, 1), (-2, -1), (-1, 2), (-1, -2))
+
+def build_step_targets(offsets: Tuple[Tuple[int, int], ...]) -> Tuple[Tuple[BoardPosType, ...], ...]:
+
+    step_targets = list()
+    for row, col in SQUARE_POS:
+        row_idx, col_idx = row - 1, COL_VALUE_RANGE.index(col)
+        targets = list()
+        for delta_row, delta_col in offsets:
+            next_row_idx, next_col_idx = row_idx + delta_row, col_idx + delta_col
+            if 0 <= next_row_idx < 8 and 0 <= next_col_idx < 8:
+                targets.append(SQUARE_POS[next_row_idx * 8 + next_col_idx])
+        step_targets.append(tuple(targets))
+    return tuple(step_targets)
+
+def build_ray_targets(directions: Tuple[Tuple[int, int], ...]) -> Tuple[Tuple[Tuple[BoardPosType, ...], ...], ...]:
+    # every square owns one ray per direction, a ray lists the positions from the nearest to the farthest
+
+    ray_targets = list()
+    for row, col in SQUARE_POS:
+        rays = list()
+        for delta_row, delta_col in directions:
+            row_idx, col_idx = row - 1 + delta_row, COL_VALUE_RANGE.index(col) + delta_col
+            ray = list()
+            while 0 <= row_idx < 8 and 0 <= col_idx < 8:
+                ray.append(SQUARE_POS[row_idx * 8 + col_idx])
+                row_idx, col_idx = row_idx + delta_row, col_idx + delta_col
+            if len(ray) > 0: rays.append(tuple(ray))
+        ray_targets.append(tuple(rays))
+    return tuple(ray_targets)
+
+KNIGHT_TARGETS     = build_step_targets(KNIGHT_OFFSETS)
+KING_TARGETS       = build_step_targets(ROOK_DIRECTIONS + BISHOP_DIRECTIONS)
+ROOK_RAY_TARGETS   = build_ray_targets(ROOK_DIRECTIONS)
+BISHOP_RAY_TARGETS = build_ray_targets(BISHOP_DIRECTIONS)
+QUEEN_RAY_TARGETS  = build_ray_targets(ROOK_DIRECTIONS + BISHOP_DIRECTIONS)
+# key: advance direction of the pawn (white: 1, black: -1), value: the attacked positions per square
+PAWN_ATTACK_TARGETS = {
+    1:  build_step_targets(((1, 1), (1, -1))),
+    -1: build_step_targets(((-1, 1), (-1, -1)))
+}
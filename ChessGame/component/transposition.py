@@ -0,0 +1,136 @@
+from __future__ import annotations
+from enum import Enum, auto
+from typing import Optional
+from ..const import *
+from ..type_defs import *
+
+
+class Bound(Enum):
+    EXACT = auto()  # the score is exact
+    LOWER = auto()  # the search failed high, the score is a lower bound
+    UPPER = auto()  # the search failed low,  the score is an upper bound
+
+class ReplacementPolicy(Enum):
+    DEPTH_PREFERRED = auto()    # a new entry only replaces the shallowest entry which is not deeper
+    ALWAYS_REPLACE  = auto()    # a new entry always replaces the shallowest entry
+    TWO_TIER        = auto()    # the first slot of a bucket is depth-preferred, the others are always-replace
+
+# rough size of one stored entry (the entry tuple, the hash, the score and the best move) in CPython
+ENTRY_SIZE_BYTES = 320
+
+class TranspositionTable:
+    # a fixed-size hash table of search results, the positions are keyed by their Zobrist hashes,
+    # and every hash maps to a bucket of bucket_size slots
+
+    def __init__(
+            self,
+            memory_limit_mb : float = 16,
+            policy          : ReplacementPolicy = ReplacementPolicy.TWO_TIER,
+            bucket_size     : int = 2
+        ) -> None:
+
+        if memory_limit_mb <= 0 or bucket_size <= 0:
+            raise ValueError(f"Fail to create a transposition table with {memory_limit_mb} MB and bucket size {bucket_size}")
+
+        self.__policy = policy
+        self.__bucket_size = bucket_size
+        self.__bucket_count = max(1, int(memory_limit_mb * 1024 * 1024) // (ENTRY_SIZE_BYTES * bucket_size))
+        self.clear()
+
+    def clear(self) -> None:
+        # entry: (key, depth, score, bound, best_move)
+        self.__slots = [None] * (self.__bucket_count * self.__bucket_size)
+        self.__entry_count = 0
+
+        self.__hits = 0
+        self.__misses = 0
+        self.__collisions = 0
+        self.__stores = 0
+        self.__replacements = 0
+        self.__rejections = 0
+
+    def probe(self, key: int) -> Optional[TranspositionEntryType]:
+
+        start = (key % self.__bucket_count) * self.__bucket_size
+        occupied = False
+        for i in range(start, start + self.__bucket_size):
+            entry = self.__slots[i]
+            if entry is None: continue
+            if entry[0] == key:
+                self.__hits += 1
+                return entry
+            occupied = True
+
+        self.__misses += 1
+        # the bucket is held by other positions
+        if occupied: self.__collisions += 1
+        return None
+
+    def store(
+            self,
+            key       : int,
+            depth     : int,
+            score     : int,
+            bound     : Bound,
+            best_move : Optional[SearchMoveType]
+        ) -> None:
+
+        start = (key % self.__bucket_count) * self.__bucket_size
+        new_entry = (key, depth, score, bound, best_move)
+
+        # the same position or an empty slot is always taken
+        empty_slot = None
+        for i in range(start, start + self.__bucket_size):
+            entry = self.__slots[i]
+            if entry is None:
+                if empty_slot is None: empty_slot = i
+            elif entry[0] == key:
+                # keep the best move of a deeper search when the new result has none
+                if best_move is None: new_entry = (key, depth, score, bound, entry[4])
+                self.__write(i, new_entry)
+                return
+
+        if empty_slot is not None:
+            self.__entry_count += 1
+            self.__write(empty_slot, new_entry)
+            return
+
+        if self.__policy == ReplacementPolicy.TWO_TIER:
+            # the depth-preferred slot keeps the deeper results, the always-replace slots take the others
+            if depth >= self.__slots[start][1] or self.__bucket_size == 1: target_slot = start
+            else:                                                           target_slot = self.__shallowest_slot(start + 1, start + self.__bucket_size)
+        else:
+            target_slot = self.__shallowest_slot(start, start + self.__bucket_size)
+            if self.__policy == ReplacementPolicy.DEPTH_PREFERRED and depth < self.__slots[target_slot][1]:
+                self.__rejections += 1
+                return
+
+        self.__replacements += 1
+        self.__write(target_slot, new_entry)
+
+    def get_capacity(self) -> int:
+        return len(self.__slots)
+
+    def get_stats(self) -> Dict[str, int]:
+        return {
+            "hits":         self.__hits,
+            "misses":       self.__misses,
+            "collisions":   self.__collisions,
+            "stores":       self.__stores,
+            "replacements": self.__replacements,
+            "rejections":   self.__rejections,
+            "entries":      self.__entry_count,
+            "capacity":     self.get_capacity(),
+        }
+
+    def __write(self, slot: int, entry: TranspositionEntryType) -> None:
+        self.__slots[slot] = entry
+        self.__stores += 1
+
+    def __shallowest_slot(self, start: int, end: int) -> int:
+
+        shallowest = start
+        for i in range(start + 1, end):
+            if self.__slots[i][1] < self.__slots[shallowest][1]:
+                shallowest = i
+        return shallowest
@@ -0,0 +1,47 @@
+from __future__ import annotations
+import random
+from typing import Optional
+from .chessman import *
+from ..const import *
+from ..type_defs import *
+
+
+# Zobrist hashing: every (team, chessman type, position) owns a random 64-bit key,
+# and a position hash is the xor of the keys of everything on the board.
+# A fixed seed keeps the hashes the same between runs and processes.
+
+ZOBRIST_SEED = 20250101
+
+zobrist_random = random.Random(ZOBRIST_SEED)
+
+ZOBRIST_CHESSMAN = {
+    team: {
+        type_name: {(row, col): zobrist_random.getrandbits(64) for row in ROW_VALUE_RANGE for col in COL_VALUE_RANGE}
+        for type_name in CHESSMAN_TYPE_NAMES
+    }
+    for team in (Team.WHITE, Team.BLACK)
+}
+
+# (white_long_castling, white_short_castling, black_long_castling, black_short_castling)
+ZOBRIST_CASTLING = tuple(zobrist_random.getrandbits(64) for _ in range(4))
+
+# key: en_passant_pos
+ZOBRIST_EN_PASSANT = {(row, col): zobrist_random.getrandbits(64) for row in (3, 6) for col in COL_VALUE_RANGE}
+
+ZOBRIST_BLACK_TURN = zobrist_random.getrandbits(64)
+
+def chessman_hash(chessman: BaseChessman, pos: BoardPosType) -> int:
+    return ZOBRIST_CHESSMAN[chessman.get_team()][type(chessman).__name__][pos]
+
+def castling_rights_hash(castling_rights: Tuple[bool, bool, bool, bool]) -> int:
+
+    castling_hash = 0
+    for key, has_right in zip(ZOBRIST_CASTLING, castling_rights):
+        if has_right: castling_hash ^= key
+    return castling_hash
+
+def en_passant_hash(en_passant_pos: Optional[BoardPosType]) -> int:
+    return 0 if en_passant_pos is None else ZOBRIST_EN_PASSANT[en_passant_pos]
+
+def turn_hash(turn: Team) -> int:
+    return ZOBRIST_BLACK_TURN if turn == Team.BLACK else 0
@@ -7,6 +7,8 @@ ROW_VALUE_RANGE = tuple(range(1, 9))
 COL_VALUE_RANGE = ('a', 'b', 'c', 'd', 'e', 'f', 'g', 'h')
 
 CHESSMAN_TYPE_NAMES = ("King", "Queen", "Rook", "Bishop", "Knight", "Pawn")
+# the chessmen of one team in the start position
+START_CHESSMAN_COUNT = {"King": 1, "Queen": 1, "Rook": 2, "Bishop": 2, "Knight": 2, "Pawn": 8}
 
 CASTLING_POS = (
     (1, 'g'),   # white short castling
@@ -15,6 +17,17 @@ CASTLING_POS = (
     (8, 'c')    # black long  castling
 )
 
+# the castling rights lost when a chessman leaves (or is captured on) the cell,
+# the indices follow (white_long_castling, white_short_castling, black_long_castling, black_short_castling)
+CASTLING_RIGHTS_CELLS = {
+    (1, 'e'): (0, 1),
+    (1, 'a'): (0,),
+    (1, 'h'): (1,),
+    (8, 'e'): (2, 3),
+    (8, 'a'): (2,),
+    (8, 'h'): (3,)
+}
+
 PROJECT_FOLDER = os.path.dirname(os.path.dirname(__file__))
 AUDIO_FOLDER = os.path.join(PROJECT_FOLDER, "assets", "audio")
 IMAGE_FOLDER = os.path.join(PROJECT_FOLDER, "assets", "image")
\ No newline at end of file
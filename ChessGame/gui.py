@@ -1,17 +1,27 @@
 from __future__ import annotations
+import io
 import os
+import time
+import threading
 import pygame
 from enum import Enum, auto
 from typing import Optional
 from .const import *
 from .gui_const import *
+from .type_defs import *
+from .gui_type_defs import *
 from .component import *
+from .component.gui_chessman import *
+from .component.gui_board import *
 from .component.gui_panel import *
+from .component.gui_clock import *
+from .component.gui_atlas import *
 
 
 class GuiState(Enum):
 
     GAME = auto()
+    COMPUTER_GAME = auto()
     MAIN = auto()
     QUIT = auto()
 
@@ -26,24 +36,89 @@ class GuiState(Enum):
 # Load assets
 scaled_icon = None
 scaled_background = None
-chessman_images = None
+chessman_atlas = None
 
 place_chessman_audio = None
 
-def load_assets() -> None:
-    global scaled_icon, scaled_background, chessman_images, place_chessman_audio
+# the pacing of the GUI loops (set by init_pygame)
+frame_clock = None
+
+# staged startup: the main screen assets are loaded before the first frame, the files of the game screen assets 
+# (audio, chessmen) are read by a background thread started once the first frame is shown, and game_state waits for them,
+# the surfaces and the sound are made from the files on the main thread (SDL does not promise it is safe on other threads)
+game_assets_thread = None
+game_assets_files = None
+game_assets_error = None
+game_assets_bundle_path = None    # the pre-scaled chessman atlas
+startup_timer = None
+startup_report = False      # print the startup times
+
+def load_main_assets() -> None:
+    global scaled_icon, scaled_background
     icon_image = pygame.image.load(os.path.join(IMAGE_FOLDER, "icon.png")).convert()
     scaled_icon = pygame.transform.scale(icon_image, (25, 19))
     
     background_image = pygame.image.load(os.path.join(IMAGE_FOLDER, "background.png")).convert()
     scaled_background = pygame.transform.scale(background_image, (INIT_WIDTH, INIT_HEIGHT))
 
-    place_chessman_audio = pygame.mixer.Sound(os.path.join(AUDIO_FOLDER, "placeChessman.mp3"))
-
-    chessman_images = {Team.BLACK: dict(), Team.WHITE: dict()}
-    for team in (Team.BLACK, Team.WHITE):
-        for type_name in CHESSMAN_TYPE_NAMES:
-            chessman_images[team][type_name] = pygame.image.load(os.path.join(IMAGE_FOLDER, "chessman", f"{type_name.title()}_{team.name.lower()}.png")).convert()
+def read_game_assets(asset_bundle_path: Optional[str] = None) -> Dict[str, bytes]:
+    # the raw files only (key: path), no pygame call is made here
+
+    game_assets_files = read_atlas_files(asset_bundle_path)
+    audio_path = os.path.join(AUDIO_FOLDER, "placeChessman.mp3")
+    with open(audio_path, "rb") as file:
+        game_assets_files[audio_path] = file.read()
+    return game_assets_files
+
+def load_game_assets(asset_bundle_path: Optional[str] = None, asset_files: Optional[Dict[str, bytes]] = None) -> None:
+    # asset_files: the files read ahead by read_game_assets, the missing ones are read from the disk
+    global chessman_atlas, place_chessman_audio
+    asset_files = dict() if asset_files is None else asset_files
+
+    audio_path = os.path.join(AUDIO_FOLDER, "placeChessman.mp3")
+    if audio_path in asset_files: place_chessman_audio = pygame.mixer.Sound(io.BytesIO(asset_files[audio_path]))
+    else:                         place_chessman_audio = pygame.mixer.Sound(audio_path)
+
+    chessman_atlas = ChessmanAtlas(bundle_path = asset_bundle_path, atlas_files = asset_files)
+
+def start_game_assets_thread() -> None:
+    global game_assets_thread, game_assets_files, game_assets_error
+
+    def read() -> None:
+        global game_assets_files, game_assets_error
+        try:
+            game_assets_files = read_game_assets(game_assets_bundle_path)
+            startup_timer.mark("game files")
+        except Exception as error:
+            # raised again by wait_game_assets in the main thread
+            game_assets_error = error
+
+    game_assets_files, game_assets_error = None, None
+    game_assets_thread = threading.Thread(target = read, daemon = True)
+    game_assets_thread.start()
+
+def wait_game_assets() -> None:
+    # the readiness barrier of the game screen, the assets are made from the files on the main thread
+    global game_assets_thread, game_assets_files
+    if startup_timer.get_time("game start") is not None: return
+
+    wait_start = time.perf_counter()
+    if game_assets_thread is not None:
+        game_assets_thread.join()
+        game_assets_thread = None
+        if game_assets_error is not None: raise game_assets_error
+    wait_time = time.perf_counter() - wait_start
+
+    # the files have not been read when the main screen has been skipped
+    load_game_assets(game_assets_bundle_path, game_assets_files)
+    game_assets_files = None
+    startup_timer.mark("game assets")
+
+    startup_timer.mark("game start")
+    if startup_report:
+        print(startup_timer.get_report(("main assets", "first frame", "game files", "game assets", "game start")) + 
+              f", waited {1000 * wait_time:.1f} ms for the game files", flush = True)
+        print(chessman_atlas.get_report(), flush = True)
 
 def gui_choose_chessman(
         chess_game    : ChessGame, 
@@ -114,29 +189,87 @@ def gui_choose_promotion(
     if chosen_chessman_type_name is None:
         return GuiState.PROMOTION
     
+    gui_promote_chessman(chess_game, chessman_bind, chessman_sprite, pawn_chessman, chosen_chessman_type_name, chess_game.get_current_turn())
+
+    return GuiState.NEXT_TURN
+
+def gui_promote_chessman(
+        chess_game         : ChessGame, 
+        chessman_bind      : ChessmanBindType, 
+        chessman_sprite    : pygame.sprite.Group, 
+        pawn_chessman      : Pawn, 
+        chessman_type_name : str, 
+        view_team          : Team
+    ) -> None:
+
     curr_pos, curr_team = pawn_chessman.get_pos(), pawn_chessman.get_team()
-    cell_x, cell_y = GuiChessman.calc_cell_x_y(curr_pos[0], curr_pos[1], chess_game.get_current_turn())
+    cell_x, cell_y = GuiChessman.calc_cell_x_y(curr_pos[0], curr_pos[1], view_team)
 
     chessman_sprite.remove(chessman_bind[pawn_chessman])
     del chessman_bind[pawn_chessman]
     chessman_type_classes = (None, Queen, Rook, Bishop, Knight, None)
-    chess_game.promotion(pawn_chessman, chessman_type_classes[CHESSMAN_TYPE_NAMES.index(chosen_chessman_type_name)])
-    chess_game.record_promotion_info(chosen_chessman_type_name)
+    chess_game.promotion(pawn_chessman, chessman_type_classes[CHESSMAN_TYPE_NAMES.index(chessman_type_name)])
+    chess_game.record_promotion_info(chessman_type_name)
     new_chessman = chess_game.get_chessman(curr_pos[0], curr_pos[1])
-    new_gui_chessman = GuiChessman(cell_x, cell_y, curr_team, chessman_images[curr_team][chosen_chessman_type_name])
+    new_gui_chessman = GuiChessman(cell_x, cell_y, curr_team, chessman_atlas.get_image(curr_team, chessman_type_name))
     chessman_bind[new_chessman] = new_gui_chessman
     chessman_sprite.add(new_gui_chessman)
 
-    return GuiState.NEXT_TURN
+def gui_computer_move(
+        chess_game      : ChessGame, 
+        chessman_bind   : ChessmanBindType, 
+        chessman_sprite : pygame.sprite.Group, 
+        move            : SearchMoveType, 
+        view_team       : Team
+    ) -> GuiState:
+
+    source_pos, dest_pos, promotion_type = move
+    chessman = chess_game.get_chessman(source_pos[0], source_pos[1])
+    game_state, killed_enemy = chess_game.chessman_move(chessman, dest_pos)
+
+    if killed_enemy is not None:
+        chessman_sprite.remove(chessman_bind[killed_enemy])
+        del chessman_bind[killed_enemy]
+
+    if game_state == GameState.PROMOTION:
+        gui_promote_chessman(chess_game, chessman_bind, chessman_sprite, chessman, promotion_type.__name__, view_team)
+
+    GuiChessman.repaint_chessmen(chess_game, chessman_bind, view_team)
+
+    if game_state == GameState.END: return GuiState.END
+    else:                           return GuiState.NEXT_TURN
+
+def gui_next_turn(
+        chess_game    : ChessGame, 
+        gui_board     : GuiBoard, 
+        chessman_bind : ChessmanBindType, 
+        record_panel  : RecordPanel, 
+        view_team     : Optional[Team] = None
+    ) -> GuiState:
+
+    chess_game.next_turn()
+    gui_board.refresh_board()
+    GuiChessman.repaint_chessmen(chess_game, chessman_bind, view_team)
+
+    chess_game.record_board()
+    chess_game.update_in_check()
+    chess_game.update_checkmate()
+    chess_game.update_draw()
+
+    record_panel.set_latest()
+    return GuiState.CHESSMAN_CHOOSE
 
 def gui_game_end(
         chess_game      : ChessGame,  
         record_panel    : RecordPanel, 
         screen          : pygame.Surface, 
         gui_board       : GuiBoard, 
-        chessman_sprite : pygame.sprite.Group
+        chessman_sprite : pygame.sprite.Group, 
+        view_team       : Optional[Team] = None
     ) -> GuiState:
 
+    if view_team is None: view_team = chess_game.get_current_turn()
+
     def refresh_end_screen(end_panel: GameEndPanel) -> None:
         # hide the end panel
         rect_area = pygame.Rect(end_panel.get_x(), end_panel.get_y(), end_panel.get_width(), end_panel.get_height())
@@ -146,9 +279,8 @@ def gui_game_end(
         rect_area = pygame.Rect(INIT_X + CELL_SIDE_LENGTH * 8, INIT_Y - 20, 300, 650)
         pygame.draw.rect(screen, BACKGROUND_COLOR, rect_area)
 
-        rounds, chess_notations = chess_game.get_record().get_chess_notation()
-        record_panel.draw(screen, rounds, chess_notations)
-        gui_board.draw_board(screen, chess_game.get_current_turn())
+        record_panel.draw(screen, chess_game.get_record())
+        gui_board.draw_board(screen, view_team)
         chessman_sprite.draw(screen)
 
     end_panel_display = True
@@ -156,35 +288,57 @@ def gui_game_end(
     end_panel.draw(screen)
     pygame.display.update()
 
+    # the screen only changes with the end panel and the record panel
+    dirty_rects = [
+        pygame.Rect(end_panel.get_x(), end_panel.get_y(), end_panel.get_width(), end_panel.get_height()),
+        record_panel.get_rect()
+    ]
+    need_redraw = False
+
     while True:
-        for event in pygame.event.get():
+        for event in frame_clock.get_events():
             if event.type == pygame.QUIT:
                 return GuiState.QUIT
             elif event.type == pygame.KEYDOWN and event.key == pygame.K_TAB:
-                end_panel_display = False
+                end_panel_display, need_redraw = False, True
             elif event.type == pygame.KEYUP and event.key == pygame.K_TAB:
-                end_panel_display = True
+                end_panel_display, need_redraw = True, True
             elif event.type == pygame.KEYUP and event.key != pygame.K_TAB:
                 return GuiState.MAIN
             elif event.type == pygame.MOUSEBUTTONDOWN:
                 if event.button == pygame.BUTTON_WHEELUP:
                     record_panel.scroll_up()
+                    need_redraw = True
                 elif event.button == pygame.BUTTON_WHEELDOWN:
                     record_panel.scroll_down()
+                    need_redraw = True
 
         # 統一更新畫面
-        refresh_end_screen(end_panel)
-        if end_panel_display:
-            end_panel.draw(screen)
-        pygame.display.update()
-
-def init_pygame() -> None:
+        if need_redraw:
+            refresh_end_screen(end_panel)
+            if end_panel_display:
+                end_panel.draw(screen)
+            pygame.display.update(dirty_rects)
+            frame_clock.add_rendered_frame()
+            need_redraw = False
+
+def init_pygame(
+        event_driven          : bool = True, 
+        frame_report_interval : float = 0.0, 
+        asset_bundle_path     : Optional[str] = None, 
+        timing_report         : bool = False
+    ) -> None:
+    global frame_clock, startup_timer, startup_report, game_assets_bundle_path
+    game_assets_bundle_path = asset_bundle_path
+    startup_report = timing_report
+    startup_timer = StartupTimer()
     pygame.init()
     pygame.display.set_caption("Simple Chess Game")
     screen = pygame.display.set_mode((INIT_WIDTH, INIT_HEIGHT))
-    clock = pygame.time.Clock()
-    clock.tick(FPS)
-    load_assets()
+    startup_timer.mark("pygame init")
+    load_main_assets()
+    startup_timer.mark("main assets")
+    frame_clock = FrameClock(FPS, event_driven, frame_report_interval, extra_reports = (text_cache.get_report,))
 
 def init_chessman_display(
         chess_game: ChessGame
@@ -193,14 +347,13 @@ def init_chessman_display(
     chessman_bind = dict()
     chessman_sprite = pygame.sprite.Group()
 
-    for row in ROW_VALUE_RANGE:
-        for col in COL_VALUE_RANGE:
-            chessman = chess_game.get_chessman(row, col)
-            if chessman is not None:
-                cell_x, cell_y = GuiChessman.calc_cell_x_y(row, col, chess_game.get_current_turn())
-                gui_chessman = GuiChessman(cell_x, cell_y, chessman.get_team(), chessman_images[chessman.get_team()][type(chessman).__name__])
-                chessman_bind[chessman] = gui_chessman
-                chessman_sprite.add(gui_chessman)
+    for team in (Team.WHITE, Team.BLACK):
+        for chessman in chess_game.get_chessmen(team):
+            row, col = chessman.get_pos()
+            cell_x, cell_y = GuiChessman.calc_cell_x_y(row, col, chess_game.get_current_turn())
+            gui_chessman = GuiChessman(cell_x, cell_y, team, chessman_atlas.get_image(team, type(chessman).__name__))
+            chessman_bind[chessman] = gui_chessman
+            chessman_sprite.add(gui_chessman)
     
     return chessman_bind, chessman_sprite
 
@@ -208,41 +361,81 @@ def main_screen_state() -> GuiState:
     
     pygame.display.set_icon(scaled_icon)
     screen = pygame.display.set_mode((INIT_WIDTH, INIT_HEIGHT))
-    clock = pygame.time.Clock()
-    clock.tick(FPS)
     screen.blit(scaled_background, (0, 0))
 
     draw_text(screen, "Chess Game",        INIT_WIDTH // 2,     INIT_HEIGHT // 2 - 80,       100,  BLACK) # text "Chess Game" shadow
     draw_text(screen, "Press any to play", INIT_WIDTH // 2,     INIT_HEIGHT // 2 + 20,       70,   BLACK) # text "Press any to play" shadow
     draw_text(screen, "Chess Game",        INIT_WIDTH // 2 + 3, INIT_HEIGHT // 2 - 80 + 3,   100,  WHITE) 
     draw_text(screen, "Press any to play", INIT_WIDTH // 2 + 3, INIT_HEIGHT // 2 + 20 + 3,   70,   WHITE) 
+    draw_text(screen, "Press C to play against computer", INIT_WIDTH // 2,     INIT_HEIGHT // 2 + 90,     40,   BLACK)
+    draw_text(screen, "Press C to play against computer", INIT_WIDTH // 2 + 2, INIT_HEIGHT // 2 + 90 + 2, 40,   WHITE)
     pygame.display.update()
 
+    if startup_timer.get_time("first frame") is None:
+        startup_timer.mark("first frame")
+        if startup_report: print(startup_timer.get_report(("pygame init", "main assets", "first frame")), flush = True)
+        start_game_assets_thread()
+
     while True:
-        for event in pygame.event.get():
+        for event in frame_clock.get_events():
             if event.type == pygame.QUIT:
                 return GuiState.QUIT
+            elif event.type == pygame.KEYUP and event.key == pygame.K_c:
+                return GuiState.COMPUTER_GAME
             elif event.type == pygame.KEYUP and event.key != pygame.K_ESCAPE:
                 return GuiState.GAME
 
-def game_state() -> GuiState:
+def game_state(vs_computer: bool = False) -> GuiState:
+    wait_game_assets()
     screen = pygame.display.set_mode((WIDTH, HEIGHT))
     screen.fill(BACKGROUND_COLOR)
     chess_game = ChessGame()
     gui_board = GuiBoard()
     chessman_bind, chessman_sprite = init_chessman_display(chess_game)
     promotion_panel = None
-    info_panel, info_panel_display = InfoPanel(chessman_images), False
+    info_panel, info_panel_display = InfoPanel(chessman_atlas), False
     record_panel = RecordPanel()
 
     gui_state = GuiState.CHESSMAN_CHOOSE
     chosen_chessman = None
     valid_moves = None
 
+    # single-player mode: the player is white, and the computer searches its moves in a worker process,
+    # which ponders on the expected reply during the player turn
+    human_team = Team.WHITE
+    engine_worker = EngineWorker(time_limit = COMPUTER_TIME_LIMIT, ponder_time_limit = PONDER_TIME_LIMIT) if vs_computer else None
+
+    # dirty-rectangle rendering: only the regions changed since the last frame are drawn and sent to the display
+    dirty_rects = [screen.get_rect()]
+    status_rect = pygame.Rect(0, 0, WIDTH, INIT_Y)
+    last_status, last_view_team, last_promotion_panel, last_info_panel_display = None, None, None, False
+
     while True:
-        screen.fill(BACKGROUND_COLOR)
-        for event in pygame.event.get():
+        # the chessmen positions before this frame, to find the moved, killed and promoted chessmen
+        last_chessman_rects = {gui_chessman: gui_chessman.rect.copy() for gui_chessman in chessman_sprite}
+        view_team = human_team if vs_computer else chess_game.get_current_turn()
+        is_computer_turn = vs_computer and chess_game.get_current_turn() != human_team
+
+        if is_computer_turn and gui_state == GuiState.CHESSMAN_CHOOSE:
+            if not engine_worker.is_searching():
+                engine_worker.search(chess_game)
+            else:
+                best_move = engine_worker.poll()
+
+                if best_move is not None:
+                    gui_state = gui_computer_move(chess_game, chessman_bind, chessman_sprite, best_move, view_team)
+                    if gui_state == GuiState.NEXT_TURN:
+                        place_chessman_audio.play()
+                        gui_state = gui_next_turn(chess_game, gui_board, chessman_bind, record_panel, view_team)
+
+                    expected_move = engine_worker.get_expected_move()
+                    if gui_state == GuiState.CHESSMAN_CHOOSE and expected_move is not None:
+                        engine_worker.ponder(chess_game, expected_move)
+
+        # the computer search is polled at the frame rate, the human turn waits for the input
+        for event in frame_clock.get_events(animating = engine_worker is not None and engine_worker.is_searching()):
             if event.type == pygame.QUIT:
+                if engine_worker is not None: engine_worker.close()
                 return GuiState.QUIT
             elif event.type == pygame.KEYUP and event.key == pygame.K_ESCAPE:
                 info_panel_display = not info_panel_display
@@ -254,8 +447,9 @@ def game_state() -> GuiState:
                 mouse_pos = pygame.mouse.get_pos()
                 cell_x, cell_y = GuiBoard.get_click_cell(mouse_pos)
 
-                # click out of the board, nothing happens
+                # click out of the board (or during the computer turn), nothing happens
                 if cell_x not in range(8) or cell_y not in range(8): continue
+                if is_computer_turn: continue
 
                 if gui_state == GuiState.CHESSMAN_CHOOSE:
                     gui_state, chosen_chessman, valid_moves = gui_choose_chessman(chess_game, gui_board, chessman_bind, cell_x, cell_y)
@@ -263,7 +457,7 @@ def game_state() -> GuiState:
                     gui_state = gui_choose_moves(chess_game, gui_board, chessman_bind, chessman_sprite, chosen_chessman, valid_moves, cell_x, cell_y)
 
                     if gui_state == GuiState.PROMOTION:
-                        promotion_panel = PromotionPanel(chess_game.get_current_turn(), chessman_images)
+                        promotion_panel = PromotionPanel(chess_game.get_current_turn(), chessman_atlas)
                     if gui_state in [GuiState.PROMOTION, GuiState.NEXT_TURN]:
                         place_chessman_audio.play()
 
@@ -275,45 +469,74 @@ def game_state() -> GuiState:
                         promotion_panel = None
                 
                 if gui_state == GuiState.NEXT_TURN:  
-                    chess_game.next_turn()
-                    gui_board.refresh_board()
-                    GuiChessman.repaint_chessmen(chess_game, chessman_bind)
-                    gui_state = GuiState.CHESSMAN_CHOOSE
-
-                    chess_game.record_board()
-                    chess_game.update_in_check()
-                    chess_game.update_checkmate()
-                    chess_game.update_draw()
-                    
-                    record_panel.set_latest()
+                    gui_state = gui_next_turn(chess_game, gui_board, chessman_bind, record_panel, human_team if vs_computer else None)
             elif event.type == pygame.MOUSEBUTTONUP and event.button == pygame.BUTTON_LEFT:
                 mouse_pos = pygame.mouse.get_pos()
                 cell_x, cell_y = GuiBoard.get_click_cell(mouse_pos)
 
                 # click out of the board, nothing happens
                 if info_panel_display and info_panel.is_in_exit_button(mouse_pos):
+                    if engine_worker is not None: engine_worker.close()
                     return GuiState.MAIN
                 
-        draw_text(screen, f"Turn: {chess_game.get_current_turn().name.title()}", 100, 15, 30, GRAY, BACKGROUND_COLOR)
-
+        status = None
         if chess_game.get_checkmate():
             gui_state = GuiState.END
-            draw_text(screen, "Checkmate", 350, 15, 30, RED, BACKGROUND_COLOR)
+            status = "Checkmate"
         elif chess_game.get_in_check():
-            draw_text(screen, "Check", 350, 15, 30, RED, BACKGROUND_COLOR)
+            status = "Check"
         elif chess_game.get_draw():
             gui_state = GuiState.END
-            draw_text(screen, "Draw", 350, 15, 30, RED, BACKGROUND_COLOR)
-
-        
-        gui_board.draw_board(screen, chess_game.get_current_turn())
-        chessman_sprite.draw(screen)
-        rounds, chess_notations = chess_game.get_record().get_chess_notation()
-        record_panel.draw(screen, rounds, chess_notations)
-        if promotion_panel is not None: promotion_panel.draw(screen)                            # promotion panel
-        if info_panel_display:          info_panel.draw(screen, chess_game.get_dead_chessmen()) 
-        pygame.display.update()
+            status = "Draw"
+        # the progress of the computer search, streamed from the worker at every finished depth
+        search_status = None
+        if engine_worker is not None and engine_worker.is_searching() and engine_worker.get_progress() is not None:
+            depth, _, nodes, _, _ = engine_worker.get_progress()
+            search_status = f"Depth {depth}, {nodes} nodes"
+        status = (f"Turn: {chess_game.get_current_turn().name.title()}", status, search_status)
+
+        # collect the dirty regions
+        dirty_rects.extend(gui_board.pop_dirty_rects())
+        if view_team != last_view_team:                  dirty_rects.append(gui_board.rect) # the whole board is flipped
+        if status != last_status:                        dirty_rects.append(status_rect)
+        if record_panel.update(chess_game.get_record()): dirty_rects.append(record_panel.get_rect())
+
+        chessman_rects = {gui_chessman: gui_chessman.rect for gui_chessman in chessman_sprite}
+        for gui_chessman in last_chessman_rects.keys() | chessman_rects.keys():
+            last_rect, rect = last_chessman_rects.get(gui_chessman), chessman_rects.get(gui_chessman)
+            if last_rect != rect: dirty_rects.extend(dirty_rect for dirty_rect in (last_rect, rect) if dirty_rect is not None)
+
+        if promotion_panel is not last_promotion_panel:
+            dirty_rects.extend(panel.get_rect() for panel in (last_promotion_panel, promotion_panel) if panel is not None)
+        # the dead chessmen on the info panel may change with any other region
+        if info_panel_display != last_info_panel_display or (info_panel_display and len(dirty_rects) > 0):
+            dirty_rects.append(info_panel.get_rect())
+
+        last_status, last_view_team = status, view_team
+        last_promotion_panel, last_info_panel_display = promotion_panel, info_panel_display
+
+        if len(dirty_rects) > 0:
+            # the layers are drawn in order, clipped to the dirty regions
+            screen.set_clip(dirty_rects[0].unionall(dirty_rects[1:]))
+            screen.fill(BACKGROUND_COLOR)
+
+            turn_text, status_text, search_text = status
+            draw_text(screen, turn_text, 100, 15, 30, GRAY, BACKGROUND_COLOR)
+            if status_text is not None: draw_text(screen, status_text, 350, 15, 30, RED, BACKGROUND_COLOR)
+            if search_text is not None: draw_text(screen, search_text, 560, 15, 25, GRAY, BACKGROUND_COLOR)
+
+            gui_board.draw_board(screen, view_team)
+            chessman_sprite.draw(screen)
+            record_panel.draw(screen, chess_game.get_record())
+            if promotion_panel is not None: promotion_panel.draw(screen)                            # promotion panel
+            if info_panel_display:          info_panel.draw(screen, chess_game.get_dead_chessmen()) 
+
+            screen.set_clip(None)
+            pygame.display.update(dirty_rects)
+            frame_clock.add_rendered_frame()
+            dirty_rects = list()
         
         if gui_state == GuiState.END:  break
     
-    return gui_game_end(chess_game, record_panel, screen, gui_board, chessman_sprite)
\ No newline at end of file
+    if engine_worker is not None: engine_worker.close()
+    return gui_game_end(chess_game, record_panel, screen, gui_board, chessman_sprite, view_team)
\ No newline at end of file
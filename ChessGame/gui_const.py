@@ -7,9 +7,15 @@ RECORD_CELL_WITDH, RECORD_CELL_HEIGHT = 120, 40
 INIT_X,       INIT_Y                  = 30, 30
 
 CHESSMAN_SIDE_LENGTH = 60
+INFO_CHESSMAN_SIDE_LENGTH = 50
+ATLAS_SIDE_LENGTHS   = (CHESSMAN_SIDE_LENGTH, INFO_CHESSMAN_SIDE_LENGTH) # the sizes pre-scaled by the chessman atlas
 CELL_SIDE_LENGTH     = 80
 
 FPS = 120
+TEXT_CACHE_SIZE = 256     # the rendered texts kept by draw_text
+
+COMPUTER_TIME_LIMIT = 0.1 # seconds for the computer to search a move
+PONDER_TIME_LIMIT   = 10.0 # seconds for the computer to ponder on the expected reply during the player turn
 
 # color 
 WHITE       = (255, 255, 255)
@@ -0,0 +1,11 @@
+from __future__ import annotations
+import pygame
+from typing import Dict, Tuple, TypeAlias, TYPE_CHECKING
+
+# the GUI components import this module, so the components are only imported for the type checkers
+if TYPE_CHECKING:
+    from .component.chessman import BaseChessman
+    from .component.gui_chessman import GuiChessman
+
+ColorType:        TypeAlias = Tuple[int, int, int]
+ChessmanBindType: TypeAlias = "Dict[BaseChessman, GuiChessman]"
@@ -1,7 +1,6 @@
 from __future__ import annotations
-import pygame
-from typing import Union, Dict, Tuple, Literal, Type, TypeAlias
-from .component import (chessman,  gui_chessman)
+from typing import Union, Dict, Tuple, List, Optional, Literal, Type, TypeAlias
+from .component import (chessman, transposition)
 
 BoardPosType:   TypeAlias = Tuple[int, str]
 CoordinateType: TypeAlias = Tuple[int, int]
@@ -10,13 +9,32 @@ CellPosType:    TypeAlias = Tuple[int, int]
 BoardDictType: TypeAlias    =  Dict[int, Dict[str, chessman.BaseChessman]]
 ActionType:    TypeAlias    = Literal["Move", "Attack", "Castling", "Promotion"]
 MoveType:      TypeAlias    = Tuple[ActionType, BoardPosType]
+# key: source position, value: the legal moves of the chessman
+LegalMovesType: TypeAlias   = Dict[BoardPosType, set[MoveType]]
 PromotionType: TypeAlias    = Union[
                                 Type[chessman.Queen], Type[chessman.Rook], 
                                 Type[chessman.Bishop], Type[chessman.Knight]
                             ]
+# (en_passant_pos, castling_rights, halfmove_clock)
+#   castling_rights: (white_long_castling, white_short_castling, black_long_castling, black_short_castling)
+BoardStateType: TypeAlias   = Tuple[Optional[BoardPosType], Tuple[bool, bool, bool, bool], int]
+# (target_chessman, source_pos, has_moved, killed_enemy, castling_rook, promoted_chessman, board_state)
+UndoType:      TypeAlias    = Tuple[
+                                chessman.BaseChessman, BoardPosType, bool, 
+                                Optional[chessman.BaseChessman], Optional[chessman.Rook], 
+                                Optional[chessman.BaseChessman], BoardStateType
+                            ]
+# (source_pos, dest_pos, promotion_type)
+SearchMoveType:   TypeAlias = Tuple[BoardPosType, BoardPosType, Optional[PromotionType]]
+# (depth, score, nodes, seconds, principal_variation)
+SearchProgressType: TypeAlias = Tuple[int, int, int, float, List[SearchMoveType]]
+# the chessman counts of a team: 
+#   (king, queen, rook, bishop on BOARDCELL_COLORS[0], bishop on BOARDCELL_COLORS[1], knight, pawn)
+MaterialType:     TypeAlias = Tuple[int, int, int, int, int, int, int]
+# (key, depth, score, bound, best_move)
+TranspositionEntryType: TypeAlias = Tuple[int, int, int, transposition.Bound, Optional[SearchMoveType]]
 NotationType:     TypeAlias = Dict[int, Dict[chessman.Team, str]] 
 DeadChessmenType: TypeAlias = Dict[str, Dict[str, int]]
-
-ColorType:        TypeAlias = Tuple[int, int, int]
-ChessmanBindType: TypeAlias =  Dict[chessman.BaseChessman, gui_chessman.GuiChessman]
-ImageDictType:    TypeAlias =  Dict[chessman.Team, Dict[str, pygame.Surface]]
+PgnHeadersType:   TypeAlias = Dict[str, str]
+# (headers, san_moves, result)
+PgnGameType:      TypeAlias = Tuple[PgnHeadersType, List[str], str]
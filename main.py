@@ -1,15 +1,33 @@
-import pygame
-from ChessGame import *
+import argparse
+
+# The GUI (and pygame) is imported in main(): the engine worker process is spawned,
+# and re-imports this file as __mp_main__, so the module level stays free of the GUI modules.
 
 
 def main() -> None:
-    init_pygame()
+
+    import pygame
+    from ChessGame import gui
+
+    parser = argparse.ArgumentParser(description = "Simple Chess Game")
+    parser.add_argument("--polling",      action = "store_true", help = f"redraw loop always capped at {gui.FPS} fps, instead of waiting for the input")
+    parser.add_argument("--frame-report", type = float, default = 0.0, help = "print the measured fps, frame time and text cache hits every this number of seconds")
+    parser.add_argument("--asset-bundle", type = str, default = None, help = "load the pre-scaled chessman images from this file (built at the first run)")
+    parser.add_argument("--timing",       action = "store_true", help = "print the startup stages and the asset load times")
+    args = parser.parse_args()
+
+    gui.init_pygame(
+        event_driven          = not args.polling,
+        frame_report_interval = args.frame_report,
+        asset_bundle_path     = args.asset_bundle,
+        timing_report         = args.timing
+    )
     while True:
-        gui_state = main_screen_state()
-        if gui_state == GuiState.QUIT: break
-        gui_state = game_state()
-        if gui_state == GuiState.QUIT: break
+        gui_state = gui.main_screen_state()
+        if gui_state == gui.GuiState.QUIT: break
+        gui_state = gui.game_state(vs_computer = gui_state == gui.GuiState.COMPUTER_GAME)
+        if gui_state == gui.GuiState.QUIT: break
     pygame.quit()
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    main()
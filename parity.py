@@ -0,0 +1,123 @@
+import sys
+import random
+import argparse
+from ChessGame import *
+
+# Play random games on the dict board and the bitboard side by side,
+# and make sure both engines agree on every move and game state.
+
+PROMOTION_TYPES = {"Queen": Queen, "Rook": Rook, "Bishop": Bishop, "Knight": Knight}
+
+# (name, fen, moves, expected draw reason at the end)
+SCRIPTED_GAMES = (
+    # c2c4 can't be taken en passant (the b4 pawn is pinned on the row), so the position repeats three times
+    ("en passant pin", "8/8/8/8/Rp5k/8/2P5/4K3 w - - 0 1",
+        ("c2c4",) + ("h4h5", "e1e2", "h5h4", "e2e1") * 2, DrawReason.THREEFOLD_REPETITION),
+)
+
+def collect_valid_moves(chess_game: ChessGame) -> List[Tuple[BoardPosType, ActionType, BoardPosType]]:
+
+    # the moves of every chessman one by one, compared with the moves of the whole team (collect_legal_moves)
+    all_moves = list()
+    for chessman in chess_game.get_chessmen(chess_game.get_current_turn()):
+        for action, pos in chess_game.get_valid_moves(chessman):
+            all_moves.append((chessman.get_pos(), action, pos))
+    return sorted(all_moves)
+
+def collect_legal_moves(chess_game: ChessGame) -> List[Tuple[BoardPosType, ActionType, BoardPosType]]:
+
+    legal_moves = chess_game.get_chess_board().generate_legal_moves(chess_game.get_current_turn())
+    return sorted((source_pos, action, pos) for source_pos, moves in legal_moves.items() for action, pos in moves)
+
+def game_state_of(chess_game: ChessGame) -> Tuple[bool, bool, bool, int]:
+    return (
+        chess_game.get_in_check(),
+        chess_game.get_checkmate(),
+        chess_game.get_draw(),
+        chess_game.get_record().get_repetitions()
+    )
+
+def play_parity_game(seed: int, max_plies: int) -> Optional[str]:
+
+    rng = random.Random(seed)
+    dict_game, bit_game = ChessGame(), ChessGame(use_bitboard = True)
+
+    for ply in range(max_plies):
+        dict_moves, bit_moves = collect_valid_moves(dict_game), collect_valid_moves(bit_game)
+        if dict_moves != bit_moves:
+            return f"ply {ply}: valid moves differ\n  dict: {dict_moves}\n  bit:  {bit_moves}"
+        for name, chess_game in (("dict", dict_game), ("bit", bit_game)):
+            if collect_legal_moves(chess_game) != dict_moves:
+                return f"ply {ply}: the legal moves of the {name} board differ from its valid moves"
+        if game_state_of(dict_game) != game_state_of(bit_game):
+            return f"ply {ply}: game state differs, dict: {game_state_of(dict_game)}, bit: {game_state_of(bit_game)}"
+        if len(dict_moves) == 0 or dict_game.get_checkmate() or dict_game.get_draw(): break
+
+        source_pos, _, dest_pos = rng.choice(dict_moves)
+        promotion_name = rng.choice(tuple(PROMOTION_TYPES))
+
+        for chess_game in (dict_game, bit_game):
+            chessman = chess_game.get_chessman(source_pos[0], source_pos[1])
+            game_state, _ = chess_game.chessman_move(chessman, dest_pos)
+
+            if game_state == GameState.PROMOTION:
+                chess_game.promotion(chessman, PROMOTION_TYPES[promotion_name])
+                chess_game.record_promotion_info(promotion_name)
+
+            chess_game.next_turn()
+            chess_game.record_board()
+            chess_game.update_in_check()
+            chess_game.update_checkmate()
+            chess_game.update_draw()
+
+    if dict_game.get_record().get_chess_notation() != bit_game.get_record().get_chess_notation():
+        return "chess notations differ"
+    return None
+
+def play_scripted_game(fen: str, moves: Tuple[str, ...], draw_reason: Optional[DrawReason]) -> Optional[str]:
+
+    dict_game, bit_game = ChessGame(), ChessGame(use_bitboard = True)
+    for chess_game in (dict_game, bit_game):
+        chess_game.from_fen(fen)
+
+    for ply, move in enumerate(moves):
+        source_pos, dest_pos = (int(move[1]), move[0]), (int(move[3]), move[2])
+        for chess_game in (dict_game, bit_game):
+            chess_game.play_move((source_pos, dest_pos, None))
+
+        if dict_game.to_fen() != bit_game.to_fen():
+            return f"ply {ply}: FEN differs, dict: {dict_game.to_fen()}, bit: {bit_game.to_fen()}"
+        if game_state_of(dict_game) != game_state_of(bit_game):
+            return f"ply {ply}: game state differs, dict: {game_state_of(dict_game)}, bit: {game_state_of(bit_game)}"
+
+    if dict_game.get_draw_reason() != draw_reason:
+        return f"draw reason {dict_game.get_draw_reason()}, expected {draw_reason}"
+    return None
+
+def main() -> None:
+
+    parser = argparse.ArgumentParser(description = "Compare ChessBoard and BitBoard over random games.")
+    parser.add_argument("--games", type = int, default = 20,  help = "number of random games")
+    parser.add_argument("--seed",  type = int, default = 0,   help = "seed of the first game")
+    parser.add_argument("--plies", type = int, default = 300, help = "maximum plies per game")
+    args = parser.parse_args()
+
+    failures = 0
+    for name, fen, moves, draw_reason in SCRIPTED_GAMES:
+        error = play_scripted_game(fen, moves, draw_reason)
+        if error is not None:
+            failures += 1
+            print(f"{name}: {error}")
+
+    for seed in range(args.seed, args.seed + args.games):
+        error = play_parity_game(seed, args.plies)
+        if error is not None:
+            failures += 1
+            print(f"game {seed}: {error}")
+
+    game_count = len(SCRIPTED_GAMES) + args.games
+    print(f"{game_count - failures}/{game_count} games agree")
+    sys.exit(1 if failures > 0 else 0)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,126 @@
+import sys
+import time
+import argparse
+from ChessGame import *
+
+# Count the leaf nodes of the move tree from FEN positions (perft),
+# compare them with the reference counts, and report the move generation speed.
+
+PROMOTION_TYPES = (Queen, Rook, Bishop, Knight)
+PROMOTION_LETTERS = {Queen: 'q', Rook: 'r', Bishop: 'b', Knight: 'n'}
+
+# (name, fen, reference counts from depth 1)
+PERFT_POSITIONS = (
+    ("start position", START_FEN,
+        (20, 400, 8902, 197281, 4865609)),
+    ("kiwipete", "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1",
+        (48, 2039, 97862, 4085603)),
+    ("rook endgame", "8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1",
+        (14, 191, 2812, 43238, 674624)),
+    ("promotions", "r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1 w kq - 0 1",
+        (6, 264, 9467, 422333)),
+    ("discovered checks", "rnbq1k1r/pp1Pbppp/2p5/8/2B5/8/PPP1NnPP/RNBQK2R w KQ - 1 8",
+        (44, 1486, 62379, 2103487)),
+    ("middlegame", "r4rk1/1pp1qppp/p1np1n2/2b1p1B1/2B1P3/P1NP1N2/1PP1QPPP/R4RK1 w - - 0 10",
+        (47, 1845, 81467, 3065277)),
+    ("en passant pin", "8/8/8/8/Rp5k/8/2P5/4K3 w - - 0 1",
+        (15, 78, 1357, 9223, 170329)),
+)
+
+def generate_moves(
+        chess_board : ChessBoard,
+        turn        : Team
+    ) -> List[Tuple[BaseChessman, BoardPosType, Optional[PromotionType]]]:
+
+    moves = list()
+    for source_pos, chessman_moves in chess_board.generate_legal_moves(turn).items():
+        chessman = chess_board.get_chessman(source_pos[0], source_pos[1])
+        for _, pos in chessman_moves:
+            # every promotion choice is a separate move
+            if isinstance(chessman, Pawn) and pos[0] in (ROW_VALUE_RANGE[0], ROW_VALUE_RANGE[-1]):
+                moves.extend((chessman, pos, promotion_type) for promotion_type in PROMOTION_TYPES)
+            else:
+                moves.append((chessman, pos, None))
+    return moves
+
+def perft(chess_board: ChessBoard, turn: Team, depth: int) -> int:
+
+    if depth <= 0: return 1
+
+    moves = generate_moves(chess_board, turn)
+    if depth == 1: return len(moves)
+
+    enemy_team = Team.BLACK if turn == Team.WHITE else Team.WHITE
+    nodes = 0
+    for chessman, pos, promotion_type in moves:
+        undo = chess_board.make_move(chessman, pos, promotion_type)
+        nodes += perft(chess_board, enemy_team, depth - 1)
+        chess_board.unmake_move(undo)
+    return nodes
+
+def divide(chess_board: ChessBoard, turn: Team, depth: int) -> int:
+    # print the node count below every root move
+
+    enemy_team = Team.BLACK if turn == Team.WHITE else Team.WHITE
+    total_nodes = 0
+    for chessman, pos, promotion_type in generate_moves(chess_board, turn):
+        source_pos = chessman.get_pos()
+        undo = chess_board.make_move(chessman, pos, promotion_type)
+        nodes = perft(chess_board, enemy_team, depth - 1)
+        chess_board.unmake_move(undo)
+
+        promotion_letter = PROMOTION_LETTERS.get(promotion_type, "")
+        print(f"  {source_pos[1]}{source_pos[0]}{pos[1]}{pos[0]}{promotion_letter}: {nodes}")
+        total_nodes += nodes
+    return total_nodes
+
+def run_perft(
+        board_class : type,
+        fen         : str,
+        depth       : int,
+        expected    : Optional[int] = None,
+        show_divide : bool = False
+    ) -> bool:
+
+    chess_board = board_class()
+    turn = chess_board.from_fen(fen)
+
+    start_time = time.perf_counter()
+    if show_divide: nodes = divide(chess_board, turn, depth)
+    else:           nodes = perft(chess_board, turn, depth)
+    elapsed = time.perf_counter() - start_time
+
+    passed = expected is None or nodes == expected
+    result = "" if expected is None else ("ok" if passed else f"FAIL (expected {expected})")
+    print(f"  depth {depth}: {nodes:>10d} nodes  {elapsed:8.3f} s  {nodes / max(elapsed, 1e-9):10.0f} nodes/s  {result}")
+    return passed
+
+def main() -> None:
+
+    parser = argparse.ArgumentParser(description = "Count perft nodes and check them against the reference counts.")
+    parser.add_argument("--depth",    type = int, default = 3, help = "maximum depth per position")
+    parser.add_argument("--fen",      type = str, default = None, help = "run a single FEN position instead of the suite")
+    parser.add_argument("--expected", type = int, default = None, help = "expected node count of --fen at --depth")
+    parser.add_argument("--divide",   action = "store_true", help = "print the node count of every root move")
+    parser.add_argument("--bitboard", action = "store_true", help = "use BitBoard instead of ChessBoard")
+    args = parser.parse_args()
+
+    board_class = BitBoard if args.bitboard else ChessBoard
+
+    if args.fen is not None:
+        print(args.fen)
+        passed = run_perft(board_class, args.fen, args.depth, args.expected, args.divide)
+        sys.exit(0 if passed else 1)
+
+    failures = 0
+    for name, fen, reference_counts in PERFT_POSITIONS:
+        print(f"{name}: {fen}")
+        for depth, expected in enumerate(reference_counts[:args.depth], start = 1):
+            if not run_perft(board_class, fen, depth, expected, args.divide and depth == args.depth):
+                failures += 1
+
+    print("all perft counts match" if failures == 0 else f"{failures} perft counts differ")
+    sys.exit(1 if failures > 0 else 0)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,49 @@
+import sys
+import time
+import argparse
+from ChessGame import *
+
+# Replay PGN files through the rules engine one game at a time,
+# report the illegal moves and the replay speed (games/s, plies/s).
+
+def main() -> None:
+
+    parser = argparse.ArgumentParser(description = "Replay the games of PGN files and flag the illegal moves.")
+    parser.add_argument("pgn",        nargs = "+", help = "PGN files")
+    parser.add_argument("--limit",    type = int, default = None, help = "stop after this number of games")
+    parser.add_argument("--bitboard", action = "store_true", help = "use BitBoard instead of ChessBoard")
+    parser.add_argument("--output",   type = str, default = None, help = "write the replayed games back as PGN to this file")
+    parser.add_argument("--quiet",    action = "store_true", help = "only print the summary")
+    args = parser.parse_args()
+
+    output_file = open(args.output, "w") if args.output is not None else None
+    game_count, illegal_count, total_plies = 0, 0, 0
+
+    start_time = time.perf_counter()
+    for path in args.pgn:
+        with open(path, encoding = "utf-8", errors = "replace") as pgn_file:
+            for pgn_game in read_pgn(pgn_file):
+                if args.limit is not None and game_count >= args.limit: break
+
+                headers, san_moves, _ = pgn_game
+                chess_game, illegal_move_index = replay_pgn_game(pgn_game, args.bitboard)
+                game_count += 1
+                total_plies += len(san_moves) if illegal_move_index is None else illegal_move_index
+
+                if illegal_move_index is not None:
+                    illegal_count += 1
+                    if not args.quiet:
+                        print(f"game {game_count:>7d}: illegal move {san_moves[illegal_move_index]!r} at ply {illegal_move_index + 1} "
+                              f"({headers.get('White', '?')} - {headers.get('Black', '?')}, {headers.get('Date', '?')})", flush = True)
+
+                if output_file is not None: write_pgn(output_file, chess_game, headers)
+    elapsed = time.perf_counter() - start_time
+
+    if output_file is not None: output_file.close()
+
+    print(f"{game_count} games, {total_plies} plies in {elapsed:.2f} s: "
+          f"{game_count / elapsed:.2f} games/s, {total_plies / elapsed:.0f} plies/s, {illegal_count} games with illegal moves")
+    sys.exit(1 if illegal_count > 0 else 0)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,146 @@
+import io
+import os
+import json
+import time
+import random
+import argparse
+import multiprocessing
+from functools import partial
+from ChessGame import *
+
+# Play many headless games (random or engine players) over a process pool,
+# and stream the result of every game as soon as it finishes.
+
+PLAYER_TYPES = ("random", "engine")
+PROMOTION_TYPES = (Queen, Rook, Bishop, Knight)
+PROMOTION_LETTERS = {Queen: 'q', Rook: 'r', Bishop: 'b', Knight: 'n'}
+
+# (player_types, max_plies, engine_time, engine_nodes, use_bitboard, seed, with_pgn)
+#   player_types: {Team.WHITE: "random" | "engine", Team.BLACK: ...}
+SimulationConfigType = Tuple[Dict[Team, str], int, float, Optional[int], bool, int, bool]
+
+def collect_moves(chess_game: ChessGame) -> List[SearchMoveType]:
+
+    moves = list()
+    for chessman in chess_game.get_chessmen(chess_game.get_current_turn()):
+        source_pos = chessman.get_pos()
+        for _, pos in chess_game.get_valid_moves(chessman):
+            if isinstance(chessman, Pawn) and pos[0] in (ROW_VALUE_RANGE[0], ROW_VALUE_RANGE[-1]):
+                moves.extend((source_pos, pos, promotion_type) for promotion_type in PROMOTION_TYPES)
+            else:
+                moves.append((source_pos, pos, None))
+    # the valid moves come from sets, sort them so a seed always replays the same game
+    return sorted(moves, key = lambda move: (move[0], move[1], PROMOTION_TYPES.index(move[2]) if move[2] else -1))
+
+def move_to_uci(move: SearchMoveType) -> str:
+
+    source_pos, dest_pos, promotion_type = move
+    promotion_letter = PROMOTION_LETTERS.get(promotion_type, "")
+    return f"{source_pos[1]}{source_pos[0]}{dest_pos[1]}{dest_pos[0]}{promotion_letter}"
+
+def play_game(config: SimulationConfigType, game_index: int) -> Dict[str, object]:
+
+    player_types, max_plies, engine_time, engine_nodes, use_bitboard, seed, with_pgn = config
+
+    start_time = time.perf_counter()
+    rng = random.Random(seed + game_index)
+    chess_game = ChessGame(use_bitboard = use_bitboard)
+    engines = {
+        team: SearchEngine(time_limit = engine_time, node_limit = engine_nodes)
+        for team, player_type in player_types.items() if player_type == "engine"
+    }
+
+    moves = list()
+    while len(moves) < max_plies:
+        if chess_game.get_checkmate() or chess_game.get_draw() or chess_game.get_game_end(): break
+
+        turn = chess_game.get_current_turn()
+        if turn in engines: move = engines[turn].search(chess_game.get_chess_board(), turn)
+        else:
+            valid_moves = collect_moves(chess_game)
+            move = rng.choice(valid_moves) if len(valid_moves) > 0 else None
+        if move is None: break
+
+        chess_game.play_move(move)
+        moves.append(move_to_uci(move))
+
+    if chess_game.get_checkmate() or chess_game.get_game_end():
+        result = "1-0" if chess_game.get_winner() == Team.WHITE else "0-1"
+        termination = "checkmate"
+    elif chess_game.get_draw():
+        result = "1/2-1/2"
+        termination = chess_game.get_draw_reason().name.lower()
+    else:
+        result = "*"
+        termination = "max_plies"
+
+    game = {
+        "game":        game_index,
+        "seed":        seed + game_index,
+        "result":      result,
+        "termination": termination,
+        "plies":       len(moves),
+        "seconds":     round(time.perf_counter() - start_time, 3),
+        "moves":       moves,
+    }
+
+    # the PGN text is built in the worker, where the finished game still lives
+    if with_pgn:
+        pgn_text = io.StringIO()
+        write_pgn(pgn_text, chess_game, {
+            "Event": "simulate.py", "Round": str(game_index),
+            "White": player_types[Team.WHITE], "Black": player_types[Team.BLACK]
+        })
+        game["pgn"] = pgn_text.getvalue()
+    return game
+
+def main() -> None:
+
+    parser = argparse.ArgumentParser(description = "Play headless games over a process pool.")
+    parser.add_argument("--games",        type = int,   default = 100, help = "number of games")
+    parser.add_argument("--workers",      type = int,   default = os.cpu_count(), help = "number of worker processes")
+    parser.add_argument("--white",        choices = PLAYER_TYPES, default = "random", help = "white player")
+    parser.add_argument("--black",        choices = PLAYER_TYPES, default = "random", help = "black player")
+    parser.add_argument("--plies",        type = int,   default = 300, help = "maximum plies per game")
+    parser.add_argument("--engine-time",  type = float, default = 0.05, help = "engine search time per move (seconds)")
+    parser.add_argument("--engine-nodes", type = int,   default = None, help = "engine node budget per move")
+    parser.add_argument("--seed",         type = int,   default = 0, help = "seed of the first game")
+    parser.add_argument("--bitboard",     action = "store_true", help = "use BitBoard instead of ChessBoard")
+    parser.add_argument("--output",       type = str,   default = None, help = "write every game as a JSON line to this file")
+    parser.add_argument("--pgn",          type = str,   default = None, help = "write every game as PGN to this file")
+    parser.add_argument("--quiet",        action = "store_true", help = "only print the summary")
+    args = parser.parse_args()
+
+    config = (
+        {Team.WHITE: args.white, Team.BLACK: args.black},
+        args.plies, args.engine_time, args.engine_nodes, args.bitboard, args.seed, args.pgn is not None
+    )
+
+    output_file = open(args.output, "w") if args.output is not None else None
+    pgn_file = open(args.pgn, "w") if args.pgn is not None else None
+    result_count, termination_count, total_plies = dict(), dict(), 0
+
+    start_time = time.perf_counter()
+    with multiprocessing.Pool(processes = max(1, args.workers)) as pool:
+        for game in pool.imap_unordered(partial(play_game, config), range(args.games)):
+            result_count[game["result"]] = result_count.get(game["result"], 0) + 1
+            termination_count[game["termination"]] = termination_count.get(game["termination"], 0) + 1
+            total_plies += game["plies"]
+
+            if pgn_file is not None:    pgn_file.write(game.pop("pgn"))
+            if output_file is not None: output_file.write(json.dumps(game) + "\n")
+            if not args.quiet:
+                print(f"game {game['game']:>5d}: {game['result']:<7s} {game['termination']:<21s} "
+                      f"{game['plies']:>4d} plies  {game['seconds']:7.3f} s", flush = True)
+    elapsed = time.perf_counter() - start_time
+
+    if output_file is not None: output_file.close()
+    if pgn_file is not None:    pgn_file.close()
+
+    print(f"{args.games} games, {total_plies} plies in {elapsed:.2f} s with {args.workers} workers: "
+          f"{args.games / elapsed:.2f} games/s, {total_plies / elapsed:.0f} plies/s")
+    print("results:      " + ", ".join(f"{result} x{count}" for result, count in sorted(result_count.items())))
+    print("terminations: " + ", ".join(f"{termination} x{count}" for termination, count in sorted(termination_count.items())))
+
+if __name__ == '__main__':
+    main()